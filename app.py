@@ -53,29 +53,29 @@
                     <label><input type="radio" name="tripType" value="multicity" class="mr-2"><span data-key="multiCity"> Multi-City</span></label>
                 </div>
                 <div class="grid grid-cols-1 md:grid-cols-4 gap-4">
-                    <input id="flight-origin" type="text" placeholder="Origin" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="originPlaceholder">
-                    <input id="flight-dest" type="text" placeholder="Destination" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="destinationPlaceholder">
-                    <input id="flight-departure" type="date" placeholder="Departure Date" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="departureDatePlaceholder">
-                    <input id="flight-return" type="date" placeholder="Return Date" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="returnDatePlaceholder">
+                    <input id="flight-origin" name="origin" type="text" placeholder="Origin" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="originPlaceholder">
+                    <input id="flight-dest" name="destination" type="text" placeholder="Destination" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="destinationPlaceholder">
+                    <input id="flight-departure" name="departure" type="date" placeholder="Departure Date" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="departureDatePlaceholder">
+                    <input id="flight-return" name="return" type="date" placeholder="Return Date" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="returnDatePlaceholder">
                 </div>
                 <div class="grid grid-cols-1 md:grid-cols-4 gap-4">
-                    <input type="number" placeholder="Passengers (1)" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="passengersPlaceholder">
-                    <select class="form-select border border-gray-300 p-3 rounded-lg"><option value="Economy" data-key="economyClass">Economy</option><option value="Business" data-key="businessClass">Business</option></select>
-                    <select class="form-select border border-gray-300 p-3 rounded-lg"><option value="" data-key="anyCarrier">Any Carrier</option><option value="EK">Emirates (EK)</option></select>
+                    <input name="passengers" type="number" min="1" placeholder="Passengers (1)" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="passengersPlaceholder">
+                    <select name="cabin" class="form-select border border-gray-300 p-3 rounded-lg"><option value="Economy" data-key="economyClass">Economy</option><option value="Business" data-key="businessClass">Business</option></select>
+                    <select name="carrier" class="form-select border border-gray-300 p-3 rounded-lg"><option value="" data-key="anyCarrier">Any Carrier</option><option value="EK">Emirates (EK)</option><option value="SV">Saudia (SV)</option><option value="QR">Qatar Airways (QR)</option><option value="EY">Etihad (EY)</option><option value="GF">Gulf Air (GF)</option><option value="MS">EgyptAir (MS)</option><option value="RJ">Royal Jordanian (RJ)</option><option value="TK">Turkish Airlines (TK)</option><option value="XY">flynas (XY)</option><option value="F3">flyadeal (F3)</option><option value="FZ">flydubai (FZ)</option><option value="WY">Oman Air (WY)</option></select>
                     <button type="submit" class="w-full bg-indigo-600 text-white text-lg font-bold py-3 rounded-lg shadow-xl hover:bg-indigo-700 transition" data-key="searchButton">Search</button>
                 </div>
             </form>
 
             <form id="hotel-search-form" class="hidden bg-white p-6 rounded-xl shadow-lg space-y-4">
                 <div class="grid grid-cols-1 md:grid-cols-4 gap-4">
-                    <input type="text" placeholder="City or Hotel Name" class="md:col-span-2 form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="cityHotelPlaceholder">
-                    <input type="date" placeholder="Check-in" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="checkInPlaceholder">
-                    <input type="date" placeholder="Check-out" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="checkOutPlaceholder">
+                    <input name="destination" type="text" placeholder="City or Hotel Name" class="md:col-span-2 form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="cityHotelPlaceholder">
+                    <input name="checkIn" type="date" placeholder="Check-in" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="checkInPlaceholder">
+                    <input name="checkOut" type="date" placeholder="Check-out" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="checkOutPlaceholder">
                 </div>
                 <div class="grid grid-cols-1 md:grid-cols-4 gap-4">
-                    <select class="form-select border border-gray-300 p-3 rounded-lg"><option value="SA" data-key="nationalitySaudi">Nationality: Saudi</option></select>
-                    <input type="number" placeholder="Rooms" value="1" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="roomsPlaceholder">
-                    <input type="number" placeholder="Adults" value="2" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="adultsPlaceholder">
+                    <select name="nationality" class="form-select border border-gray-300 p-3 rounded-lg"><option value="SA" data-key="nationalitySaudi">Nationality: Saudi</option></select>
+                    <input name="rooms" type="number" min="1" placeholder="Rooms" value="1" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="roomsPlaceholder">
+                    <input name="adults" type="number" min="1" placeholder="Adults" value="2" class="form-input border border-gray-300 p-3 rounded-lg" data-placeholder-key="adultsPlaceholder">
                     <button type="submit" class="w-full bg-indigo-600 text-white text-lg font-bold py-3 rounded-lg shadow-xl hover:bg-indigo-700 transition" data-key="searchButton">Search</button>
                 </div>
             </form>
@@ -89,11 +89,11 @@
                     <div id="filters-container" class="bg-white p-6 rounded-xl shadow-lg space-y-6">
                         <h3 class="text-xl font-bold text-gray-800 border-b pb-2" data-key="filterResults">Filter Results</h3>
                         <div id="flight-filters" class="space-y-4">
-                            <div><label class="font-semibold" data-key="priceFilter">Price</label><input type="range" min="100" max="2000" class="w-full"></div>
-                            <div><label class="font-semibold" data-key="stopsFilter">Stops</label><div class="space-y-1 mt-2"><label class="flex items-center"><input type="checkbox" checked class="mr-2"><span data-key="directFlight"> Direct</span></label></div></div>
+                            <div><label class="font-semibold" data-key="priceFilter">Price</label><input id="price-filter" type="range" min="100" max="5000" step="50" value="5000" class="w-full"><p id="price-filter-value" class="text-xs text-gray-500"></p></div>
+                            <div><label class="font-semibold" data-key="stopsFilter">Stops</label><div class="space-y-1 mt-2"><label class="flex items-center"><input type="checkbox" value="0" checked class="stops-filter mr-2"><span data-key="directFlight"> Direct</span></label><label class="flex items-center"><input type="checkbox" value="1" checked class="stops-filter mr-2"><span data-key="oneStop"> 1 Stop</span></label><label class="flex items-center"><input type="checkbox" value="2" checked class="stops-filter mr-2"><span data-key="twoStops"> 2 Stops</span></label></div></div>
                         </div>
                         <div id="hotel-filters" class="hidden space-y-4">
-                            <div><label class="font-semibold" data-key="starRatingFilter">Star Rating</label><input type="range" min="1" max="5" value="3" class="w-full"></div>
+                            <div><label class="font-semibold" data-key="starRatingFilter">Star Rating</label><input id="stars-filter" type="range" min="1" max="5" value="1" class="w-full"><p id="stars-filter-value" class="text-xs text-gray-500"></p></div>
                         </div>
                         <div class="border-t pt-4"><label class="flex items-center text-sm"><input type="checkbox" id="handling-fee-toggle" checked class="mr-2"><span data-key="showFees"> Show Price Incl. Handling Fees</span></label></div>
                     </div>
@@ -108,7 +108,7 @@
                         <button id="download-excel-btn" class="bg-green-600 text-white text-sm py-2 px-4 rounded-lg hover:bg-green-700 transition" data-key="downloadExcel">⬇️ Download Results (Excel)</button>
                     </div>
                     <div id="results-list" class="space-y-4">
-                        <div class="bg-white p-4 rounded-xl shadow-lg flex flex-col md:flex-row items-center space-y-4 md:space-y-0 md:space-x-4">
+                        <div data-id="1" data-price="950" data-in-policy="false" data-violations="fare" class="bg-white p-4 rounded-xl shadow-lg flex flex-col md:flex-row items-center space-y-4 md:space-y-0 md:space-x-4">
                             <img src="https://placehold.co/100x50/0d9488/FFFFFF?text=Airline" alt="Airline" class="rounded">
                             <div class="flex-1">
                                 <p class="text-lg font-bold">Emirates (EK)</p>
@@ -147,6 +147,8 @@
                             <button id="select-meal-btn" class="flex-1 bg-blue-100 text-blue-700 py-3 rounded-lg font-semibold hover:bg-blue-200" data-key="selectMeal">Select Meal</button>
                             <button id="select-bag-btn" class="flex-1 bg-blue-100 text-blue-700 py-3 rounded-lg font-semibold hover:bg-blue-200" data-key="addBaggage">Add Baggage</button>
                         </div>
+                        <p id="ancillary-summary" class="text-sm text-gray-500 mt-2"></p>
+                        <div id="ancillary-panel" class="hidden mt-4"></div>
                     </div>
                     <div id="policy-breach-section" class="hidden bg-red-100 p-6 rounded-xl shadow-lg border border-red-300">
                         <h3 class="text-xl font-bold text-red-700 mb-2" data-key="policyBreachTitle">Policy Breach Alert</h3>
@@ -165,7 +167,7 @@
                 </div>
 
                 <div class="lg:col-span-1 space-y-6">
-                    <div class="bg-gray-100 p-6 rounded-xl shadow-inner"><h3 class="text-xl font-bold mb-4" data-key="priceSummary">Price Summary</h3><div class="space-y-2 text-sm"><div class="flex justify-between"><span>Total</span> <span id="price-total" class="text-indigo-700">975 $</span></div></div></div>
+                    <div class="bg-gray-100 p-6 rounded-xl shadow-inner"><h3 class="text-xl font-bold mb-4" data-key="priceSummary">Price Summary</h3><div class="space-y-2 text-sm"><div class="flex justify-between"><span data-key="baseFare">Base Fare</span> <span id="price-base">950 $</span></div><div class="flex justify-between"><span data-key="taxesLabel">Taxes</span> <span id="price-taxes">0 $</span></div><div class="flex justify-between"><span data-key="handlingFee">Handling Fee</span> <span id="price-fee">25 $</span></div><div id="price-discount-row" class="hidden flex justify-between text-green-700"><span data-key="promoDiscount">Promo Discount</span> <span id="price-discount">0 $</span></div><div class="flex justify-between border-t pt-2 font-bold"><span>Total</span> <span id="price-total" class="text-indigo-700">975 $</span></div></div></div>
                     <div class="bg-white p-4 rounded-xl shadow-lg"><label for="promo-code" class="text-sm font-semibold" data-key="promoCode">Promo Code</label><div class="flex mt-2"><input type="text" id="promo-code" class="flex-1 border border-gray-300 p-2 rounded-l-lg" data-placeholder-key="promoPlaceholder"><button id="apply-promo" class="bg-gray-700 text-white px-4 rounded-r-lg hover:bg-gray-800" data-key="applyButton">Apply</button></div></div>
                     <div class="bg-white p-6 rounded-xl shadow-lg"><h3 class="text-xl font-bold mb-4" data-key="choosePayment">Choose Payment Method</h3><div class="space-y-3"><label class="flex items-center p-3 border rounded-lg"><input type="radio" name="payment" value="card" checked class="mr-3"><span data-key="cardPayment"> Credit/Debit Card</span></label><label id="payment-deposit-option" class="hidden flex items-center p-3 border rounded-lg"><input type="radio" name="payment" value="deposit" class="mr-3"><span data-key="depositPayment"> Deposit Balance</span></label></div></div>
                     <button id="confirm-booking-btn" class="w-full bg-green-600 text-white text-xl font-extrabold py-4 rounded-xl shadow-2xl hover:bg-green-700 transition" data-key="confirmPayButton">Confirm Booking & Pay</button>
@@ -182,10 +184,10 @@
         // Localization
         const L10N = {
             en: {
-                appTitle: 'TravelSmart', flightsTab: '✈️ Flights', hotelsTab: '🏨 Hotels', oneWay: 'One Way', roundTrip: 'Round Trip', multiCity: 'Multi-City', searchButton: 'Search', backToSearch: 'Back to Search', filterResults: 'Filter Results', priceFilter: 'Price', stopsFilter: 'Stops', directFlight: 'Direct', showFees: 'Show Price Incl. Handling Fees', fareCalendar: 'Fare Calendar View', downloadExcel: '⬇️ Download Results (Excel)', bookNow: 'Book Now', backToResults: 'Back to Results', bookingReview: 'Booking Review and Payment', travelerDetails: 'Traveler Details', ancillaryServices: 'Ancillary Services', selectSeat: 'Select Seat', selectMeal: 'Select Meal', addBaggage: 'Add Baggage', policyBreachTitle: 'Policy Breach Alert', priceSummary: 'Price Summary', promoCode: 'Promo Code', applyButton: 'Apply', choosePayment: 'Choose Payment Method', cardPayment: 'Credit/Debit Card', depositPayment: 'Deposit Balance', confirmPayButton: 'Confirm Booking & Pay', balanceLabel: 'Balance:', toggleToB2B: 'Switch to B2B', toggleToB2C: 'Switch to B2C', rechargeBtn: 'Recharge', originPlaceholder: 'Origin', destinationPlaceholder: 'Destination', departureDatePlaceholder: 'Departure Date', returnDatePlaceholder: 'Return Date', passengersPlaceholder: 'Passengers (1)', economyClass: 'Economy', businessClass: 'Business', anyCarrier: 'Any Carrier', cityHotelPlaceholder: 'City or Hotel Name', checkInPlaceholder: 'Check-in', checkOutPlaceholder: 'Check-out', nationalitySaudi: 'Nationality: Saudi', roomsPlaceholder: 'Rooms', adultsPlaceholder: 'Adults', fullNamePlaceholder: 'Full Name', emailPlaceholder: 'Email', policyReasonPlaceholder: 'Enter reason for out-of-policy selection...', promoPlaceholder: 'Enter Promo Code...', policyReasonError: 'Error: Reason for out-of-policy selection is mandatory.', bookingPendingError: 'Error: Booking is pending with the carrier. Please try again.', bookingSuccess: 'Booking confirmed successfully! Ticket will be emailed.'
+                appTitle: 'TravelSmart', flightsTab: '✈️ Flights', hotelsTab: '🏨 Hotels', oneWay: 'One Way', roundTrip: 'Round Trip', multiCity: 'Multi-City', searchButton: 'Search', backToSearch: 'Back to Search', filterResults: 'Filter Results', priceFilter: 'Price', stopsFilter: 'Stops', directFlight: 'Direct', oneStop: '1 Stop', twoStops: '2 Stops', returnLeg: 'Return', showFees: 'Show Price Incl. Handling Fees', fareCalendar: 'Fare Calendar View', downloadExcel: '⬇️ Download Results (Excel)', bookNow: 'Book Now', backToResults: 'Back to Results', bookingReview: 'Booking Review and Payment', travelerDetails: 'Traveler Details', ancillaryServices: 'Ancillary Services', selectSeat: 'Select Seat', selectMeal: 'Select Meal', addBaggage: 'Add Baggage', policyBreachTitle: 'Policy Breach Alert', priceSummary: 'Price Summary', promoCode: 'Promo Code', applyButton: 'Apply', baseFare: 'Base Fare', taxesLabel: 'Taxes', handlingFee: 'Handling Fee', promoDiscount: 'Promo Discount', choosePayment: 'Choose Payment Method', cardPayment: 'Credit/Debit Card', depositPayment: 'Deposit Balance', confirmPayButton: 'Confirm Booking & Pay', balanceLabel: 'Balance:', toggleToB2B: 'Switch to B2B', toggleToB2C: 'Switch to B2C', rechargeBtn: 'Recharge', originPlaceholder: 'Origin', destinationPlaceholder: 'Destination', departureDatePlaceholder: 'Departure Date', returnDatePlaceholder: 'Return Date', passengersPlaceholder: 'Passengers (1)', economyClass: 'Economy', businessClass: 'Business', anyCarrier: 'Any Carrier', cityHotelPlaceholder: 'City or Hotel Name', checkInPlaceholder: 'Check-in', checkOutPlaceholder: 'Check-out', nationalitySaudi: 'Nationality: Saudi', roomsPlaceholder: 'Rooms', adultsPlaceholder: 'Adults', fullNamePlaceholder: 'Full Name', emailPlaceholder: 'Email', policyReasonPlaceholder: 'Enter reason for out-of-policy selection...', promoPlaceholder: 'Enter Promo Code...', policyReasonError: 'Error: Reason for out-of-policy selection is mandatory.', bookingPendingError: 'Error: Booking is pending with the carrier. Please try again.', bookingSuccess: 'Booking confirmed successfully! Ticket will be emailed.'
             },
             ar: {
-                appTitle: 'ترافل سمارت', flightsTab: '✈️ الطيران', hotelsTab: '🏨 الفنادق', oneWay: 'ذهاب فقط', roundTrip: 'ذهاب وعودة', multiCity: 'مدن متعددة', searchButton: 'بحث', backToSearch: 'العودة للبحث', filterResults: 'تصفية النتائج', priceFilter: 'السعر', stopsFilter: 'التوقفات', directFlight: 'مباشر', showFees: 'عرض السعر شامل رسوم المناولة', fareCalendar: 'عرض أسعار التقويم', downloadExcel: '⬇️ تحميل النتائج (Excel)', bookNow: 'احجز الآن', backToResults: 'العودة للنتائج', bookingReview: 'مراجعة الحجز والدفع', travelerDetails: 'بيانات المسافر', ancillaryServices: 'الخدمات الإضافية', selectSeat: 'اختيار المقعد', selectMeal: 'اختيار الوجبة', addBaggage: 'إضافة أمتعة', policyBreachTitle: 'تنبيه: تجاوز سياسة الشركة', priceSummary: 'ملخص السعر', promoCode: 'رمز ترويجي', applyButton: 'تطبيق', choosePayment: 'اختر طريقة الدفع', cardPayment: 'بطاقة ائتمان / مدين', depositPayment: 'خصم من رصيد الوديعة', confirmPayButton: 'تأكيد الحجز والدفع', balanceLabel: 'الرصيد:', toggleToB2B: 'التبديل إلى B2B', toggleToB2C: 'التبديل إلى B2C', rechargeBtn: 'إعادة شحن', originPlaceholder: 'المغادرة من', destinationPlaceholder: 'الوصول إلى', departureDatePlaceholder: 'تاريخ المغادرة', returnDatePlaceholder: 'تاريخ العودة', passengersPlaceholder: 'المسافرون (1)', economyClass: 'الدرجة السياحية', businessClass: 'درجة رجال الأعمال', anyCarrier: 'أي ناقل', cityHotelPlaceholder: 'المدينة أو اسم الفندق', checkInPlaceholder: 'تاريخ الوصول', checkOutPlaceholder: 'تاريخ المغادرة', nationalitySaudi: 'الجنسية: سعودي', roomsPlaceholder: 'الغرف', adultsPlaceholder: 'البالغون', fullNamePlaceholder: 'الاسم الكامل', emailPlaceholder: 'البريد الإلكتروني', policyReasonPlaceholder: 'اكتب سبب الاختيار هنا...', promoPlaceholder: 'أدخل الرمز الترويجي...', policyReasonError: 'خطأ: يجب تحديد سبب اختيار رحلة خارج سياسة الشركة.', bookingPendingError: 'خطأ: الحجز معلق لدى الناقل. يرجى المحاولة مرة أخرى.', bookingSuccess: 'تم تأكيد الحجز بنجاح! سيتم إرسال التذكرة.'
+                appTitle: 'ترافل سمارت', flightsTab: '✈️ الطيران', hotelsTab: '🏨 الفنادق', oneWay: 'ذهاب فقط', roundTrip: 'ذهاب وعودة', multiCity: 'مدن متعددة', searchButton: 'بحث', backToSearch: 'العودة للبحث', filterResults: 'تصفية النتائج', priceFilter: 'السعر', stopsFilter: 'التوقفات', directFlight: 'مباشر', oneStop: 'توقف واحد', twoStops: 'توقفان', returnLeg: 'العودة', showFees: 'عرض السعر شامل رسوم المناولة', fareCalendar: 'عرض أسعار التقويم', downloadExcel: '⬇️ تحميل النتائج (Excel)', bookNow: 'احجز الآن', backToResults: 'العودة للنتائج', bookingReview: 'مراجعة الحجز والدفع', travelerDetails: 'بيانات المسافر', ancillaryServices: 'الخدمات الإضافية', selectSeat: 'اختيار المقعد', selectMeal: 'اختيار الوجبة', addBaggage: 'إضافة أمتعة', policyBreachTitle: 'تنبيه: تجاوز سياسة الشركة', priceSummary: 'ملخص السعر', promoCode: 'رمز ترويجي', applyButton: 'تطبيق', baseFare: 'السعر الأساسي', taxesLabel: 'الضرائب', handlingFee: 'رسوم المناولة', promoDiscount: 'خصم الرمز الترويجي', choosePayment: 'اختر طريقة الدفع', cardPayment: 'بطاقة ائتمان / مدين', depositPayment: 'خصم من رصيد الوديعة', confirmPayButton: 'تأكيد الحجز والدفع', balanceLabel: 'الرصيد:', toggleToB2B: 'التبديل إلى B2B', toggleToB2C: 'التبديل إلى B2C', rechargeBtn: 'إعادة شحن', originPlaceholder: 'المغادرة من', destinationPlaceholder: 'الوصول إلى', departureDatePlaceholder: 'تاريخ المغادرة', returnDatePlaceholder: 'تاريخ العودة', passengersPlaceholder: 'المسافرون (1)', economyClass: 'الدرجة السياحية', businessClass: 'درجة رجال الأعمال', anyCarrier: 'أي ناقل', cityHotelPlaceholder: 'المدينة أو اسم الفندق', checkInPlaceholder: 'تاريخ الوصول', checkOutPlaceholder: 'تاريخ المغادرة', nationalitySaudi: 'الجنسية: سعودي', roomsPlaceholder: 'الغرف', adultsPlaceholder: 'البالغون', fullNamePlaceholder: 'الاسم الكامل', emailPlaceholder: 'البريد الإلكتروني', policyReasonPlaceholder: 'اكتب سبب الاختيار هنا...', promoPlaceholder: 'أدخل الرمز الترويجي...', policyReasonError: 'خطأ: يجب تحديد سبب اختيار رحلة خارج سياسة الشركة.', bookingPendingError: 'خطأ: الحجز معلق لدى الناقل. يرجى المحاولة مرة أخرى.', bookingSuccess: 'تم تأكيد الحجز بنجاح! سيتم إرسال التذكرة.'
             }
         };
 
@@ -197,7 +199,7 @@
 
         document.addEventListener('DOMContentLoaded', function () {
             var appState = {
-                currentView: 'search', searchType: 'flights', isAgentView: false, mockUser: { name: 'John Doe', email: 'john.doe@example.com' }, mockAgent: { balance: 1500, lowBalanceThreshold: 500 }, selectedResult: null, handlingFee: 25, currentLang: 'en'
+                currentView: 'search', searchType: 'flights', isAgentView: false, mockUser: { name: 'John Doe', email: 'john.doe@example.com' }, mockAgent: { id: 'AGT-1001', balance: 1500, lowBalanceThreshold: 500 }, selectedResult: null, bookingKey: null, ancillaryHold: null, handlingFee: 25, resultSession: null, passengers: 1, operatorToken: '', quote: null, promoCode: '', currentLang: 'en'
             };
 
             var langSelector = document.getElementById('language-selector');
@@ -223,7 +225,11 @@
                     agentUI.section.style.display = 'flex';
                     if (agentUI.depositOption) agentUI.depositOption.style.display = 'flex';
                     if (agentUI.toggleBtn) agentUI.toggleBtn.textContent = t('toggleToB2C', appState.currentLang);
-                    if (appState.mockAgent.balance < appState.mockAgent.lowBalanceThreshold) showAlert('Alert: Low balance (' + appState.mockAgent.balance + '$)!', 'error');
+                    fetch('/api/agents/wallet?agent=' + encodeURIComponent(appState.mockAgent.id)).then(function (r) { return r.json(); }).then(function (wallet) {
+                        if (wallet.error) return;
+                        renderAgentWallet(wallet);
+                        if (wallet.low) lowBalanceAlert();
+                    }).catch(function () {});
                 } else {
                     if (agentUI.section) agentUI.section.style.display = 'none';
                     if (agentUI.depositOption) agentUI.depositOption.style.display = 'none';
@@ -232,6 +238,31 @@
                 }
             }
 
+            function renderAgentWallet(wallet) {
+                appState.mockAgent.balance = wallet.balance;
+                if (wallet.threshold != null) appState.mockAgent.lowBalanceThreshold = wallet.threshold;
+                var low = wallet.balance < appState.mockAgent.lowBalanceThreshold;
+                var balanceEl = document.getElementById('agent-balance');
+                if (balanceEl) { balanceEl.textContent = wallet.balance.toLocaleString() + ' $'; balanceEl.classList.toggle('text-red-600', low); balanceEl.classList.toggle('text-green-600', !low); }
+            }
+
+            function lowBalanceAlert() { showAlert('Alert: Low balance (' + appState.mockAgent.balance + '$)!', 'error'); }
+
+            function rechargeWallet() {
+                var amount = parseFloat(window.prompt(t('rechargeBtn', appState.currentLang) + ' ($)', '500'));
+                if (!(amount > 0)) return;
+                if (!isFinite(amount)) return;
+                // credits are a back-office action: the server wants its operator token
+                if (!appState.operatorToken) appState.operatorToken = window.prompt('Back-office token') || '';
+                if (!appState.operatorToken) return;
+                var body = new URLSearchParams({ agent: appState.mockAgent.id, amount: amount });
+                fetch('/api/agents/recharge', { method: 'POST', body: body, headers: { Authorization: 'Bearer ' + appState.operatorToken } }).then(function (r) { if (r.status === 401) appState.operatorToken = ''; return r.json(); }).then(function (wallet) {
+                    if (wallet.error) { showAlert(wallet.error, 'error'); return; }
+                    renderAgentWallet(wallet);
+                    if (wallet.entry.crossed === 'above') showAlert('');
+                }).catch(function () {});
+            }
+
             function switchSearchTab(type) {
                 appState.searchType = type;
                 [tabs.flights, tabs.hotels].forEach(function (el) { if (el) el.classList.remove('border-indigo-600', 'text-indigo-700', 'text-gray-500'); });
@@ -253,33 +284,204 @@
 
             function performSearch(e) {
                 if (e && e.preventDefault) e.preventDefault();
+                var started = now();
                 showView('results');
+                resetFilters();
                 if (appState.searchType === 'flights') renderFareCalendar(appState.currentLang);
                 showAlert('Displaying search results. Filters are being applied.', 'success');
+                if (appState.searchType === 'flights' && window.fetch && window.TextDecoder) streamFlightResults(new URLSearchParams(new FormData(forms.flights)), started);
+                if (appState.searchType === 'hotels' && window.fetch) searchHotels(new URLSearchParams(new FormData(forms.hotels)));
+            }
+
+            function hotelCard(hotel) {
+                var card = document.createElement('div');
+                card.className = 'bg-white p-4 rounded-xl shadow-lg flex flex-col md:flex-row items-center space-y-4 md:space-y-0 md:space-x-4';
+                card.dataset.pos = hotel.id; card.dataset.price = hotel.price;
+                card.innerHTML = '<div class="flex-1"><p class="text-lg font-bold"></p><p class="text-sm">' + hotel.city + ' | ' + new Array(hotel.stars + 1).join('★') + '</p><p class="text-xs text-gray-500">' + hotel.check_in + ' &rarr; ' + hotel.check_out + ' | ' + hotel.rooms + ' room(s)</p></div>' +
+                    '<div class="text-center md:text-right"><p class="card-price text-2xl font-extrabold text-indigo-700">' + hotel.price + ' $</p></div>';
+                card.querySelector('.text-lg').textContent = appState.currentLang === 'ar' ? hotel.name_ar : hotel.name;
+                return card;
+            }
+
+            function searchHotels(params) {
+                var list = document.getElementById('results-list');
+                if (!list) return;
+                appState.resultSession = null;
+                fetch('/api/hotels/search?' + params.toString()).then(function (r) { return r.json(); }).then(function (res) {
+                    if (res.error) { showAlert(res.error, 'error'); return; }
+                    list.innerHTML = '';
+                    res.hotels.forEach(function (hotel) { list.appendChild(hotelCard(hotel)); });
+                    appState.resultSession = res.session;
+                    if (feesParam() === '0') filterResults({ fees: '0' });
+                    showAlert(res.hotel_count + ' hotels available', 'success');
+                }).catch(function () {});
+            }
+
+            function flightCard(offer) {
+                var card = document.createElement('div');
+                card.className = 'bg-white p-4 rounded-xl shadow-lg flex flex-col md:flex-row items-center space-y-4 md:space-y-0 md:space-x-4';
+                card.dataset.offer = offer.key; card.dataset.id = offer.key; card.dataset.row = offer.ref; card.dataset.price = offer.price;
+                setCardPolicy(card, offer);
+                card.innerHTML = '<div class="flex-1"><p class="text-lg font-bold">' + (offer.leg === 'inbound' ? t('returnLeg', appState.currentLang) + ' &middot; ' : '') + offer.carrier + ' ' + offer.flight_number + '</p><p class="text-sm">' + offer.departure.slice(11) + ' (' + offer.origin + ') &rarr; ' + offer.arrival.slice(11) + ' (' + offer.destination + ')</p><p class="text-xs text-gray-500">' + offer.departure.slice(0, 10) + ' | ' + (offer.stops ? offer.stops + ' stop(s)' : t('directFlight', appState.currentLang)) + ' | ' + offer.cabin + '</p></div>' +
+                    '<div class="text-center md:text-right"><p class="card-price text-2xl font-extrabold text-indigo-700">' + offer.price + ' $</p><button class="book-now-btn w-full md:w-auto bg-indigo-600 text-white py-2 px-6 rounded-lg font-semibold hover:bg-indigo-700 transition">' + t('bookNow', appState.currentLang) + '</button></div>';
+                return card;
+            }
+
+            function setCardPolicy(card, offer) { card.dataset.inPolicy = offer.in_policy ? 'true' : 'false'; card.dataset.violations = (offer.policy_violations || []).join(','); }
+
+            function streamFlightResults(params, started) {
+                // one NDJSON line per supplier answer: render cards as each supplier responds
+                var list = document.getElementById('results-list');
+                if (!list) return;
+                var decoder = new TextDecoder(), buffer = '', cleared = false;
+                appState.passengers = Math.max(1, parseInt(params.get('passengers'), 10) || 1);
+                function handle(msg) {
+                    if (msg.done) {
+                        traceSpan('search', started); if (!msg.count && !cleared) list.innerHTML = '';
+                        // the server prices the merged offers as one session, in the same order as the cards
+                        appState.resultSession = msg.session; appState.handlingFee = msg.handling_fee;
+                        Array.prototype.forEach.call(list.children, function (card, i) { card.dataset.pos = i; });
+                        if (msg.session && appState.promoCode) repriceResults({ promo: appState.promoCode });
+                        showAlert(msg.count + ' results from ' + Object.keys(msg.suppliers).length + ' suppliers', 'success'); return;
+                    }
+                    if (msg.offers.length && !cleared) { list.innerHTML = ''; cleared = true; traceSpan('first_result', started); }
+                    msg.offers.forEach(function (offer) { list.appendChild(flightCard(offer)); });
+                    msg.updated.forEach(function (offer) {
+                        var card = list.querySelector('[data-offer="' + offer.key + '"]');
+                        if (card) { setCardPrice(card, offer.price); setCardPolicy(card, offer); card.dataset.row = offer.ref; }
+                    });
+                }
+                appState.resultSession = null;
+                params.set('fees', feesParam());
+                fetch('/api/flights/stream?' + params.toString()).then(function (r) {
+                    if (!r.ok || !r.body) return;
+                    var reader = r.body.getReader();
+                    function pump() {
+                        return reader.read().then(function (chunk) {
+                            buffer += decoder.decode(chunk.value || new Uint8Array(), { stream: !chunk.done });
+                            var lines = buffer.split('\n'); buffer = lines.pop();
+                            lines.forEach(function (line) { if (line) handle(JSON.parse(line)); });
+                            if (!chunk.done) return pump();
+                        });
+                    }
+                    return pump();
+                }).catch(function () {});
+            }
+
+            // prices come from the server's pricing engine: the whole result set is repriced in one call
+            var feeToggle = document.getElementById('handling-fee-toggle');
+            function feesParam() { return feeToggle && !feeToggle.checked ? '0' : '1'; }
+            function setCardPrice(card, price) { card.dataset.price = price; var el = card.querySelector('.card-price'); if (el) el.textContent = price + ' $'; }
+            function filterResults(change) {
+                // sidebar changes go to the result session; the reply lists only the cards that appeared or disappeared,
+                // plus the price column when the change repriced them (fee toggle or promo)
+                if (!appState.resultSession) return;
+                var list = document.getElementById('results-list');
+                var params = new URLSearchParams(change);
+                params.set('session', appState.resultSession); params.set('limit', 1000);
+                fetch('/api/results/filter?' + params.toString()).then(function (r) { return r.json(); }).then(function (res) {
+                    if (res.error || !list) return;
+                    res.removed.forEach(function (pos) { var card = list.querySelector('[data-pos="' + pos + '"]'); if (card) card.style.display = 'none'; });
+                    res.added.forEach(function (record) {
+                        var card = list.querySelector('[data-pos="' + record.id + '"]');
+                        if (!card && appState.searchType === 'hotels') { card = hotelCard(record); list.appendChild(card); }
+                        if (card) card.style.display = '';
+                    });
+                    (res.price_ids || []).forEach(function (pos, i) { var card = list.querySelector('[data-pos="' + pos + '"]'); if (card) setCardPrice(card, res.prices[i]); });
+                }).catch(function () {});
+            }
+            function repriceResults(extra) { filterResults(extra || {}); }
+            function resetFilters() {
+                // a new search opens an unfiltered session, so the controls go back to "no filter"
+                var price = document.getElementById('price-filter'), stars = document.getElementById('stars-filter');
+                if (price) price.value = price.max;
+                if (stars) stars.value = stars.min;
+                Array.prototype.forEach.call(document.querySelectorAll('.stops-filter'), function (box) { box.checked = true; });
+                ['price-filter-value', 'stars-filter-value'].forEach(function (id) { var el = document.getElementById(id); if (el) el.textContent = ''; });
+            }
+            var priceFilter = document.getElementById('price-filter'), priceFilterValue = document.getElementById('price-filter-value');
+            function showPriceFilter() { if (priceFilter && priceFilterValue) priceFilterValue.textContent = Number(priceFilter.value) >= Number(priceFilter.max) ? '' : '≤ ' + priceFilter.value + ' $'; }
+            if (priceFilter) {
+                priceFilter.addEventListener('input', showPriceFilter);
+                // the slider's top end means no upper limit
+                priceFilter.addEventListener('change', function () { filterResults(Number(priceFilter.value) >= Number(priceFilter.max) ? { min_price: 0 } : { max_price: priceFilter.value }); });
+            }
+            Array.prototype.forEach.call(document.querySelectorAll('.stops-filter'), function (box, i, boxes) {
+                box.addEventListener('change', function () {
+                    var checked = Array.prototype.filter.call(boxes, function (b) { return b.checked; });
+                    filterResults({ stops: checked.length === boxes.length ? 'any' : checked.map(function (b) { return b.value; }).join(',') || '-1' });
+                });
+            });
+            var starsFilter = document.getElementById('stars-filter'), starsFilterValue = document.getElementById('stars-filter-value');
+            if (starsFilter) {
+                starsFilter.addEventListener('input', function () { if (starsFilterValue) starsFilterValue.textContent = starsFilter.value > 1 ? '≥ ' + new Array(Number(starsFilter.value) + 1).join('★') : ''; });
+                starsFilter.addEventListener('change', function () { filterResults({ stars: starsFilter.value > 1 ? starsFilter.value : 0 }); });
+            }
+            function renderQuote(quote) {
+                appState.quote = quote;
+                [['price-base', quote.base], ['price-taxes', quote.taxes], ['price-fee', quote.handling_fee], ['price-discount', -quote.discount], ['price-total', quote.total]].forEach(function (pair) { var el = document.getElementById(pair[0]); if (el) el.textContent = pair[1] + ' $'; });
+                var discountRow = document.getElementById('price-discount-row'); if (discountRow) discountRow.classList.toggle('hidden', !quote.discount);
+            }
+            function quotePrice() {
+                var selected = appState.selectedResult || {};
+                appState.quote = null;
+                if (selected.row == null || selected.row === '') return Promise.resolve(null);
+                var params = new URLSearchParams({ row: selected.row, passengers: selected.passengers || 1 });
+                // streamed cards are quoted at the supplier's offer fare, the price the card showed
+                if (selected.offer) params.set('offer', selected.offer);
+                if (appState.promoCode) params.set('promo', appState.promoCode);
+                return fetch('/api/pricing/quote?' + params.toString()).then(function (r) { return r.json().then(function (res) { if (!r.ok) throw res; renderQuote(res); return res; }); });
+            }
+            function applyPromo() {
+                var input = document.getElementById('promo-code');
+                var code = input ? input.value.trim() : '', previous = appState.promoCode;
+                appState.promoCode = code;
+                quotePrice().then(function (quote) {
+                    repriceResults({ promo: code || '-' });
+                    if (!code) return;
+                    if (!quote || quote.promo.applied) showAlert('Promo code ' + code.toUpperCase() + ' applied.', 'success');
+                    else showAlert('Promo code ' + code.toUpperCase() + ' does not apply to this flight (' + quote.promo.rejected.join(', ') + ').', 'error');
+                }).catch(function (res) { appState.promoCode = previous; showAlert((res && res.error) || 'Promo code could not be applied.', 'error'); quotePrice().catch(function () {}); });
             }
 
             function renderFareCalendar(lang) {
+                // cheapest fare per day of the searched month, read from the server's calendar cube
                 var canvas = document.getElementById('fareCalendarChart');
-                if (!canvas) return;
-                var ctx = canvas.getContext('2d');
-                if (window.myFareChart) window.myFareChart.destroy();
-                var labels = (lang === 'ar') ? ['نوفمبر 25', 'نوفمبر 26', 'نوفمبر 27', 'نوفمبر 28', 'نوفمبر 29'] : ['Nov 25', 'Nov 26', 'Nov 27', 'Nov 28', 'Nov 29'];
-                window.myFareChart = new Chart(ctx, { type: 'bar', data: { labels: labels, datasets: [{ label: t('priceFilter', lang), data: [950, 890, 920, 850, 1100], backgroundColor: 'rgba(79, 70, 229, 0.6)', borderWidth: 1 }] }, options: { responsive: true, maintainAspectRatio: false, plugins: { legend: { display: false } }, scales: { y: { beginAtZero: false, ticks: { callback: function (val) { return '$' + val; } } } } } });
+                if (!canvas || !forms.flights || !window.fetch) return;
+                var started = now();
+                var form = new FormData(forms.flights);
+                var departure = String(form.get('departure') || '') || new Date().toISOString().slice(0, 10);
+                var params = new URLSearchParams({ origin: form.get('origin') || '', destination: form.get('destination') || '', cabin: form.get('cabin') || 'Economy', month: departure.slice(0, 7) });
+                fetch('/api/flights/calendar?' + params.toString()).then(function (r) { return r.json(); }).then(function (res) {
+                    if (res.error || !window.Chart) return;
+                    var labels = res.labels.map(function (day) { return new Date(day + 'T00:00:00').toLocaleDateString(lang === 'ar' ? 'ar' : 'en', { month: 'short', day: 'numeric' }); });
+                    if (window.myFareChart) window.myFareChart.destroy();
+                    window.myFareChart = new Chart(canvas.getContext('2d'), { type: 'bar', data: { labels: labels, datasets: [{ label: t('priceFilter', lang), data: res.fares, backgroundColor: 'rgba(79, 70, 229, 0.6)', borderWidth: 1 }] }, options: { responsive: true, maintainAspectRatio: false, plugins: { legend: { display: false } }, scales: { y: { beginAtZero: false, ticks: { callback: function (val) { return '$' + val; } } } } } });
+                    traceSpan('calendar', started);
+                }).catch(function () {});
             }
 
-            function goToBookingPage() {
-                appState.selectedResult = { id: 1, price: 950 };
+            function goToBookingPage(card) {
+                // cards carry the policy verdict computed for the whole result set at search time
+                var started = now();
+                card = card || document.querySelector('#results-list [data-price]');
+                var data = card ? card.dataset : {};
+                appState.selectedResult = { id: data.id || '', offer: data.offer || '', row: data.row, passengers: appState.passengers, price: parseFloat(data.price) || 0, inPolicy: data.inPolicy !== 'false', violations: data.violations ? data.violations.split(',') : [] };
+                appState.bookingKey = null;
+                releaseAncillaries();
+                quotePrice().catch(function () {});
                 showView('booking');
                 var userProfile = (appState.currentLang === 'ar') ? { name: 'عبدالله العلي', email: 'a.ali@example.com' } : appState.mockUser;
                 var nameEl = document.getElementById('pass-name');
                 var emailEl = document.getElementById('pass-email');
                 if (nameEl) nameEl.value = userProfile.name || '';
                 if (emailEl) emailEl.value = userProfile.email || '';
-                if (appState.selectedResult.price > 900 && !appState.isAgentView) {
+                if (!appState.selectedResult.inPolicy && !appState.isAgentView) {
                     if (policySection) policySection.style.display = 'block';
                 } else {
                     if (policySection) policySection.style.display = 'none';
                 }
+                traceSpan('booking_page', started);
             }
 
             function confirmBooking() {
@@ -291,10 +493,119 @@
                     }
                 }
                 if (reasonEl) reasonEl.classList.remove('border-red-600','ring-2','ring-red-200');
-                if (Math.random() > 0.9) { showAlert(t('bookingPendingError', appState.currentLang), 'error'); return; }
-                showAlert(t('bookingSuccess', appState.currentLang), 'success');
-                setTimeout(function () { showView('search'); }, 1200);
+                // one idempotency key per booking attempt, so a double click or retry cannot book twice
+                if (!appState.bookingKey) appState.bookingKey = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : String(Date.now()) + '-' + Math.random().toString(36).slice(2);
+                var selected = appState.selectedResult || {};
+                var paymentEl = document.querySelector('input[name="payment"]:checked');
+                var body = new URLSearchParams({ key: appState.bookingKey, row: selected.row != null ? selected.row : '', passengers: selected.passengers || 1, quoted_total: appState.quote ? appState.quote.total : (selected.price || ''), promo: appState.promoCode, payment: paymentEl ? paymentEl.value : 'card', agent: appState.isAgentView ? appState.mockAgent.id : '', ancillaries: appState.ancillaryHold ? appState.ancillaryHold.hold : '', offer: selected.offer || '' });
+                var started = now();
+                fetch('/api/bookings/confirm', { method: 'POST', body: body }).then(function (r) { return r.json(); }).then(function (res) {
+                    traceSpan('confirm', started);
+                    if (res.balance != null) renderAgentWallet({ balance: res.balance });
+                    // still running server-side: keep the key so the retry picks up this booking's outcome
+                    if (res.status === 'pending') { showAlert(t('bookingPendingError', appState.currentLang), 'error'); return; }
+                    if (res.status && res.status !== 'confirmed') {
+                        // a final answer for this key: the next attempt is a new booking, at the new price if it moved
+                        appState.bookingKey = null;
+                        if (res.status === 'price_changed' || res.status === 'promo_rejected') quotePrice().catch(function () {});
+                        showAlert(res.error || t('bookingPendingError', appState.currentLang), 'error'); return;
+                    }
+                    if (res.status !== 'confirmed') { showAlert(res.error || t('bookingPendingError', appState.currentLang), 'error'); return; }
+                    appState.bookingKey = null; appState.ancillaryHold = null; renderAncillarySummary();
+                    showAlert(t('bookingSuccess', appState.currentLang), 'success');
+                    setTimeout(function () { showView('search'); if (res.balance_alert === 'below') lowBalanceAlert(); }, 1200);
+                }).catch(function () { showAlert(t('bookingPendingError', appState.currentLang), 'error'); });
+            }
+
+            // seats, meals and bags are held server-side for a couple of minutes and confirmed with the booking
+            var ancillaryPanel = document.getElementById('ancillary-panel');
+            var ancillarySummary = document.getElementById('ancillary-summary');
+            function ancillaryRow() {
+                var selected = appState.selectedResult || {};
+                if (selected.row == null || selected.row === '') { showAlert('Select a flight from the search results first.', 'error'); return null; }
+                return selected.row;
+            }
+            function showAncillaryPanel(title, content) {
+                if (!ancillaryPanel) return;
+                ancillaryPanel.innerHTML = '<p class="text-sm font-semibold mb-2"></p>';
+                ancillaryPanel.firstChild.textContent = title;
+                ancillaryPanel.appendChild(content);
+                ancillaryPanel.classList.remove('hidden');
+            }
+            function renderAncillarySummary() {
+                if (!ancillarySummary) return;
+                var hold = appState.ancillaryHold, parts = [];
+                if (hold) {
+                    if (hold.seats.length) parts.push(hold.seats.join(', '));
+                    Object.keys(hold.meals).concat(Object.keys(hold.bags)).forEach(function (name) { parts.push(name + ' x' + (hold.meals[name] || hold.bags[name])); });
+                }
+                ancillarySummary.textContent = parts.length ? parts.join(' · ') + ' (held ' + Math.round(hold.expires_in / 60) + ' min)' : '';
+            }
+            function holdAncillaries(fields) {
+                var row = ancillaryRow(); if (row == null) return;
+                var body = new URLSearchParams(fields); body.set('row', row);
+                if (appState.ancillaryHold) body.set('hold', appState.ancillaryHold.hold);
+                fetch('/api/ancillaries/hold', { method: 'POST', body: body }).then(function (r) { return r.json(); }).then(function (res) {
+                    if (res.error && /expired hold/.test(res.error) && appState.ancillaryHold) { appState.ancillaryHold = null; holdAncillaries(fields); return; }
+                    if (res.error) showAlert(res.error, 'error'); else { appState.ancillaryHold = res; renderAncillarySummary(); }
+                    if (fields.seats != null) selectSeat();
+                }).catch(function () {});
+            }
+            function releaseAncillaries() {
+                if (appState.ancillaryHold) fetch('/api/ancillaries/release', { method: 'POST', body: new URLSearchParams({ hold: appState.ancillaryHold.hold }) }).catch(function () {});
+                appState.ancillaryHold = null; renderAncillarySummary();
+                if (ancillaryPanel) ancillaryPanel.classList.add('hidden');
+            }
+            function withSeatMap(render) {
+                var row = ancillaryRow(); if (row == null || !ancillaryPanel) return;
+                fetch('/api/ancillaries/seatmap?row=' + encodeURIComponent(row)).then(function (r) { return r.json(); }).then(function (map) {
+                    if (map.error) showAlert(map.error, 'error'); else render(map);
+                }).catch(function () {});
+            }
+            function selectSeat() {
+                withSeatMap(function (map) {
+                    var mine = appState.ancillaryHold ? appState.ancillaryHold.seats : [], cols = map.letters.length;
+                    var grid = document.createElement('div');
+                    grid.style.display = 'grid'; grid.style.gridTemplateColumns = 'repeat(' + cols + ', 2.75rem)'; grid.style.gap = '0.25rem';
+                    for (var i = 0; i < map.seats.length; i++) {
+                        var label = (map.first_row + Math.floor(i / cols)) + map.letters.charAt(i % cols), state = mine.indexOf(label) >= 0 ? 'mine' : map.seats.charAt(i);
+                        var seat = document.createElement('button');
+                        seat.type = 'button'; seat.textContent = label; seat.dataset.seat = label; seat.disabled = state === 'x' || state === 'h';
+                        seat.className = 'text-xs py-1 rounded ' + (state === 'mine' ? 'bg-indigo-600 text-white' : state === '.' ? 'bg-white border' : 'bg-gray-300 text-gray-500');
+                        grid.appendChild(seat);
+                    }
+                    grid.addEventListener('click', function (e) { var label = e.target.dataset && e.target.dataset.seat; if (label && !e.target.disabled) holdAncillaries({ seats: label }); });
+                    showAncillaryPanel(map.cabin + ' · ' + map.available + ' free', grid);
+                });
+            }
+            function selectAncillary(kind) {
+                // one option per kind: choosing one zeroes the others in the same hold
+                withSeatMap(function (map) {
+                    var options = map[kind], count = (appState.selectedResult && appState.selectedResult.passengers) || 1, list = document.createElement('div');
+                    list.className = 'flex flex-wrap gap-2';
+                    Object.keys(options).forEach(function (name) {
+                        var option = document.createElement('button');
+                        option.type = 'button'; option.className = 'px-3 py-2 bg-white border rounded'; option.textContent = name + ' (' + options[name] + ')'; option.disabled = !options[name];
+                        option.addEventListener('click', function () {
+                            var fields = {}; fields[kind] = Object.keys(options).map(function (other) { return other + ':' + (other === name ? count : 0); }).join(',');
+                            holdAncillaries(fields);
+                        });
+                        list.appendChild(option);
+                    });
+                    showAncillaryPanel(t(kind === 'meals' ? 'selectMeal' : 'addBaggage', appState.currentLang), list);
+                });
+            }
+
+            // stage timings, batched to /api/traces and exported as client.<stage> in /metrics
+            var traceBuffer = [];
+            function now() { return window.performance ? performance.now() : Date.now(); }
+            function traceSpan(stage, started) { traceBuffer.push(stage + ':' + (now() - started).toFixed(1)); if (traceBuffer.length >= 20) flushTraces(); }
+            function flushTraces() {
+                if (!traceBuffer.length) return;
+                var body = new URLSearchParams({ spans: traceBuffer.join(',') }); traceBuffer = [];
+                if (navigator.sendBeacon) navigator.sendBeacon('/api/traces', body); else if (window.fetch) fetch('/api/traces', { method: 'POST', body: body, keepalive: true }).catch(function () {});
             }
+            document.addEventListener('visibilitychange', function () { if (document.visibilityState === 'hidden') flushTraces(); });
 
             function showAlert(message, type) {
                 if (!alertMsg) return;
@@ -313,18 +624,24 @@
 
             // events
             if (agentUI.toggleBtn) agentUI.toggleBtn.addEventListener('click', toggleAgentView);
+            var rechargeBtn = document.getElementById('recharge-btn'); if (rechargeBtn) rechargeBtn.addEventListener('click', rechargeWallet);
             if (forms.flights) forms.flights.addEventListener('submit', performSearch);
             if (forms.hotels) forms.hotels.addEventListener('submit', performSearch);
             var backToSearch = document.getElementById('back-to-search-1'); if (backToSearch) backToSearch.addEventListener('click', function () { showView('search'); });
             var backToResults = document.getElementById('back-to-results-1'); if (backToResults) backToResults.addEventListener('click', function () { showView('results'); });
+            var seatBtn = document.getElementById('select-seat-btn'); if (seatBtn) seatBtn.addEventListener('click', selectSeat);
+            var mealBtn = document.getElementById('select-meal-btn'); if (mealBtn) mealBtn.addEventListener('click', function () { selectAncillary('meals'); });
+            var bagBtn = document.getElementById('select-bag-btn'); if (bagBtn) bagBtn.addEventListener('click', function () { selectAncillary('bags'); });
+            var promoBtn = document.getElementById('apply-promo'); if (promoBtn) promoBtn.addEventListener('click', applyPromo);
+            if (feeToggle) feeToggle.addEventListener('change', function () { repriceResults({ fees: feesParam() }); });
             var confirmBtn = document.getElementById('confirm-booking-btn'); if (confirmBtn) confirmBtn.addEventListener('click', confirmBooking);
-            var resultsList = document.getElementById('results-list'); if (resultsList) resultsList.addEventListener('click', function (e) { if (e.target.closest && e.target.closest('.book-now-btn')) goToBookingPage(); });
-            var footerBook = document.getElementById('footer-book-btn'); if (footerBook) footerBook.addEventListener('click', goToBookingPage);
+            var resultsList = document.getElementById('results-list'); if (resultsList) resultsList.addEventListener('click', function (e) { if (e.target.closest && e.target.closest('.book-now-btn')) goToBookingPage(e.target.closest('[data-price]')); });
+            var footerBook = document.getElementById('footer-book-btn'); if (footerBook) footerBook.addEventListener('click', function () { goToBookingPage(); });
 
             var downloadBtn = document.getElementById('download-excel-btn'); if (downloadBtn) downloadBtn.addEventListener('click', function () {
-                var rows = [['Airline','From','To','Depart','Arrive','Price'], ['Emirates','RUH','DXB','08:00','11:30','950']];
-                var csv = rows.map(function (r) { return r.map(function (c) { return '"' + String(c).replace(/"/g,'""') + '"'; }).join(','); }).join('\n');
-                var blob = new Blob([csv], { type: 'text/csv' }); var url = URL.createObjectURL(blob); var a = document.createElement('a'); a.href = url; a.download = 'results.csv'; document.body.appendChild(a); a.click(); a.remove(); URL.revokeObjectURL(url);
+                if (!appState.resultSession) { showAlert('Search first, then download the results.', 'error'); return; }
+                // The server streams the rows still visible under the current filters.
+                var a = document.createElement('a'); a.href = '/api/results/export?session=' + encodeURIComponent(appState.resultSession) + '&format=xlsx'; a.download = 'results.xlsx'; document.body.appendChild(a); a.click(); a.remove();
             });
 
             // quick UX
@@ -390,7 +707,8 @@
 
             // init UI translation and view
             appState.currentLang = langSelector.value;
-            translateUI(appState.currentLang, appState);
+            // pages served pre-rendered in the selected language skip the initial relocalization pass
+            if (document.documentElement.getAttribute('data-prerendered') !== appState.currentLang) translateUI(appState.currentLang, appState);
             switchSearchTab('flights');
             showView('search');
 
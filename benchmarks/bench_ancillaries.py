@@ -0,0 +1,145 @@
+"""Seat holds under contention, plus timing-wheel expiry of many short holds.
+
+Agents (threads) keep a couple of seats held at a time, moving to new random
+seats and now and then confirming one, either all on one popular flight or
+spread over many flights. At the end the benchmark audits that no seat was
+confirmed twice. The same load runs with a single shard (one lock for
+everything) and with the default striping. Tail latency includes waiting
+for the GIL, so a single-agent run is shown as the uncontended baseline.
+
+    python benchmarks/bench_ancillaries.py --agents 16 --ops 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.ancillaries import DEFAULT_SHARDS, AncillaryService, AncillaryUnavailable  # noqa: E402
+from travelsmart.inventory import FareStore  # noqa: E402
+from travelsmart.synthetic import synthetic_fares  # noqa: E402
+
+
+def free_seats(service: AncillaryService, row: int) -> list[str]:
+    seat_map = service.seat_map(row)
+    letters, first = seat_map["letters"], seat_map["first_row"]
+    return [f"{first + i // len(letters)}{letters[i % len(letters)]}" for i, state in enumerate(seat_map["seats"]) if state == "."]
+
+
+def race(service: AncillaryService, rows: list[int], agents: int, args: argparse.Namespace) -> tuple[np.ndarray, dict[int, list[str]], int]:
+    seats = {row: free_seats(service, row) for row in rows}
+    rows = [row for row in rows if seats[row]]
+    latencies: list[list[float]] = [[] for _ in range(agents)]
+    confirmed: dict[int, list[str]] = {row: [] for row in rows}
+    conflicts = [0] * agents
+    lock = threading.Lock()
+    start = threading.Barrier(agents)
+
+    def agent(index: int) -> None:
+        rng = np.random.default_rng(index)
+        held: list[str] = []
+        start.wait()
+        for _ in range(args.ops):
+            row = rows[int(rng.integers(len(rows)))]
+            seat = seats[row][int(rng.integers(len(seats[row])))]
+            t0 = time.perf_counter()
+            try:
+                hold = service.hold(row, seats=[seat], meals={"standard": 1})
+            except AncillaryUnavailable:
+                latencies[index].append(time.perf_counter() - t0)
+                conflicts[index] += 1
+                continue
+            latencies[index].append(time.perf_counter() - t0)
+            if rng.random() < args.confirm:
+                service.confirm(hold["hold"])
+                with lock:
+                    confirmed[row].append(seat)
+                continue
+            held.append(hold["hold"])
+            if len(held) > args.holding:
+                service.release(held.pop(0))
+
+    threads = [threading.Thread(target=agent, args=(i,)) for i in range(agents)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate([np.asarray(samples) for samples in latencies]) * 1e6, confirmed, sum(conflicts)
+
+
+def audit(service: AncillaryService, confirmed: dict[int, list[str]]) -> int:
+    """Seats confirmed twice, or confirmed but not shown as sold (must be 0)."""
+    problems = 0
+    for row, seats in confirmed.items():
+        problems += len(seats) - len(set(seats))
+        sold = set(free_seats(service, row))
+        problems += sum(seat in sold for seat in seats)
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--agents", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=5_000, help="hold attempts per agent")
+    parser.add_argument("--holding", type=int, default=2, help="seats each agent keeps held at once")
+    parser.add_argument("--confirm", type=float, default=0.001, help="share of holds that are confirmed")
+    parser.add_argument("--flights", type=int, default=1_000, help="flights for the spread-out run")
+    parser.add_argument("--expiring", type=int, default=100_000, help="holds for the expiry run")
+    args = parser.parse_args()
+
+    store = FareStore.from_frame(synthetic_fares(args.rows))
+    economy = np.flatnonzero(store.cabin == 0)
+    popular = int(economy[np.argmax(store.seats[economy])])
+    spread = np.random.default_rng(1).choice(len(store), args.flights, replace=False).tolist()
+
+    for label, rows in (("one popular flight", [popular]), (f"{args.flights} flights", spread)):
+        for agents, shards in ((1, DEFAULT_SHARDS), (args.agents, 1), (args.agents, DEFAULT_SHARDS)):
+            service = AncillaryService(store, shards=shards)
+            t0 = time.perf_counter()
+            micros, confirmed, conflicts = race(service, rows, agents, args)
+            elapsed = time.perf_counter() - t0
+            attempts = agents * args.ops
+            print(f"{label:>18} agents={agents:>2} shards={shards:>2}: holds/s={attempts / elapsed:>8,.0f} p50={np.percentile(micros, 50):5.1f}us "
+                  f"p90={np.percentile(micros, 90):6.1f}us p99={np.percentile(micros, 99):7.1f}us conflicts={conflicts / attempts:5.1%} "
+                  f"double_booked={audit(service, confirmed)}")
+
+    seat_map = AncillaryService(store).seat_map(popular)
+    service = AncillaryService(store)
+    probe = free_seats(service, popular)[:1]
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        service.available(popular, probe)
+    print(f"availability check: {(time.perf_counter() - t0) / n * 1e6:.2f}us ({seat_map['cabin']}, {len(seat_map['seats'])} seats)")
+
+    # Many short holds, then one clock jump past their TTL: expiry is one wheel turn per shard.
+    now = [0.0]
+    service = AncillaryService(store, ttl=60.0, clock=lambda: now[0])
+    rows = np.random.default_rng(2).choice(len(store), args.expiring, replace=False).tolist()
+    t0 = time.perf_counter()
+    for row in rows:
+        now[0] += 0.0005
+        try:
+            service.hold(row, meals={"standard": 1})
+        except AncillaryUnavailable:
+            pass  # a full flight has no meals left to hold
+    placed = time.perf_counter() - t0
+    now[0] += 61.0
+    t0 = time.perf_counter()
+    service.sweep()
+    swept = time.perf_counter() - t0
+    stats = service.stats()
+    print(f"expiry: placed {stats['holds']:,} holds (each building its flight's seat map) in {placed:.2f}s; one sweep expired {stats['expired']:,} "
+          f"in {swept * 1000:.1f}ms ({swept / max(stats['expired'], 1) * 1e6:.2f}us/hold), active={stats['active']}")
+
+
+if __name__ == "__main__":
+    main()
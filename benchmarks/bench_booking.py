@@ -0,0 +1,94 @@
+"""Load test for the booking pipeline against local stub suppliers.
+
+Fires a burst of confirmations (with duplicate retries) at a few popular
+fares and reports throughput, tail latency and a double-booking check.
+
+    python benchmarks/bench_booking.py --bookings 20000 --concurrency 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.booking import BookingPipeline, BookingRequest, StubSupplier, latency_summary  # noqa: E402
+from travelsmart.inventory import FareStore  # noqa: E402
+from travelsmart.synthetic import synthetic_fares  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> None:
+    store = FareStore.from_frame(synthetic_fares(100_000, start=dt.date.today()))
+    rng = np.random.default_rng(9)
+    rows = rng.choice(len(store), args.flights, replace=False)
+    store.update(rows, seats=args.seats)
+    seats_before = int(store.seats[rows].sum())
+
+    supplier = StubSupplier(
+        store,
+        latency={"quote": (0.001, 0.003), "hold": (0.001, 0.004), "charge": (0.02, 0.2), "issue": (0.005, 0.02)},
+        failures={"charge": args.payment_failures},
+        seed=1,
+    )
+    # A slice of payments hang well past the others to show they do not stall the pipeline.
+    charge = supplier.charge
+
+    async def slow_charge(request: BookingRequest, amount: float) -> str:
+        if hash(request.idempotency_key) % 100 == 0:
+            await asyncio.sleep(2.0)
+        return await charge(request, amount)
+
+    supplier.charge = slow_charge  # type: ignore[method-assign]
+
+    requests = [
+        BookingRequest(f"bk-{i}", int(rows[i % len(rows)]), passengers=int(rng.integers(1, 3)))
+        for i in range(args.bookings)
+    ]
+    # Every tenth request is re-sent, as a double-clicked Confirm button would.
+    requests += requests[:: 10]
+    order = rng.permutation(len(requests))
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with BookingPipeline(supplier, payment_timeout=1.0) as pipeline:
+
+        async def one(request: BookingRequest):
+            async with semaphore:
+                return await pipeline.submit(request)
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(one(requests[i]) for i in order))
+        elapsed = time.perf_counter() - t0
+        stats = pipeline.stats()
+
+    unique = {result.idempotency_key: result for result in results}
+    confirmed = [result for result in unique.values() if result.confirmed]
+    booked = sum(request.passengers for request in requests[: args.bookings] if unique[request.idempotency_key].confirmed)
+    statuses: dict[str, int] = {}
+    for result in unique.values():
+        statuses[result.status] = statuses.get(result.status, 0) + 1
+    print(f"submissions={len(requests):,} unique={len(unique):,} elapsed={elapsed:.2f}s throughput={len(requests) / elapsed:,.0f}/s")
+    print(f"statuses={statuses} duplicates_joined={stats['duplicates']}")
+    print("latency_ms " + " ".join(f"{k}={v:.1f}" for k, v in latency_summary(list(unique.values())).items()))
+    print(f"seats_sold={seats_before - int(store.seats[rows].sum())} passengers_confirmed={booked} "
+          f"negative_inventory={(store.seats[rows] < 0).any()} tickets={len(confirmed)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=5_000)
+    parser.add_argument("--flights", type=int, default=50)
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--payment-failures", type=float, default=0.02)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Multi-city connection search latency over a full-day schedule.
+
+    python benchmarks/bench_connections.py --rows 10000000 --searches 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.connections import ConnectionPlanner, Leg  # noqa: E402
+from travelsmart.inventory import FareStore  # noqa: E402
+from travelsmart.synthetic import AIRPORTS, synthetic_fares  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--searches", type=int, default=50)
+    args = parser.parse_args()
+
+    start = dt.date.today()
+    store = FareStore.from_frame(synthetic_fares(args.rows, start=start))
+    planner = ConnectionPlanner(store)
+    per_day = len(store) / (int(store.day.max()) - int(store.day.min()) + 1)
+    print(f"rows={len(store):,} connections/day={per_day:,.0f}")
+
+    rng = np.random.default_rng(3)
+    for objective in ("cheapest", "fastest"):
+        samples = []
+        for _ in range(args.searches):
+            cities = [str(code) for code in rng.choice(AIRPORTS, 4, replace=False)]
+            day = start + dt.timedelta(days=int(rng.integers(0, 300)))
+            legs = [Leg(cities[i], cities[i + 1], day + dt.timedelta(days=2 * i)) for i in range(3)]
+            t0 = time.perf_counter()
+            planner.multi_city(legs, objective=objective)
+            samples.append(time.perf_counter() - t0)
+        ms = np.asarray(samples) * 1000
+        print(f"3-leg multi-city {objective}: p50={np.percentile(ms, 50):.1f}ms p99={np.percentile(ms, 99):.1f}ms max={ms.max():.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
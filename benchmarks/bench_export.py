@@ -0,0 +1,60 @@
+"""Streaming export throughput and memory for a large result set.
+
+    python benchmarks/bench_export.py --rows 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.export import flight_frames, iter_csv, iter_xlsx  # noqa: E402
+from travelsmart.inventory import FareStore, ResultSet  # noqa: E402
+from travelsmart.synthetic import synthetic_fares  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    store = FareStore.from_frame(synthetic_fares(args.rows, start=dt.date.today()))
+    result = ResultSet(store, np.arange(len(store)))
+    print(f"rows={len(result):,} store_peak_rss={peak_rss_mb():.0f}MB")
+
+    for name, writer in (("csv", iter_csv), ("xlsx", iter_xlsx)):
+        baseline = rss_mb()
+        growth = 0.0
+        t0 = time.perf_counter()
+        written = 0
+        for block in writer(flight_frames(result, chunk_rows=args.chunk_rows)):
+            written += len(block)
+            growth = max(growth, rss_mb() - baseline)
+        elapsed = time.perf_counter() - t0
+        print(
+            f"{name}: {elapsed:.2f}s {len(result) / elapsed:,.0f} rows/s {written / elapsed / 2**20:.1f} MB/s "
+            f"output={written / 2**20:.1f}MB rss_growth={growth:.0f}MB peak_rss={peak_rss_mb():.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
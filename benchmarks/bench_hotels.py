@@ -0,0 +1,61 @@
+"""City-wide hotel availability latency over a property x night inventory.
+
+    python benchmarks/bench_hotels.py --properties 100000 --nights 365
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.hotels import HotelInventory, HotelQuery  # noqa: E402
+from travelsmart.synthetic import CITIES, synthetic_hotels  # noqa: E402
+
+
+def run(inventory: HotelInventory, start: dt.date, searches: int, label: str) -> None:
+    rng = np.random.default_rng(5)
+    samples, found = [], 0
+    for _ in range(searches):
+        check_in = start + dt.timedelta(days=int(rng.integers(0, inventory.nights - 15)))
+        query = HotelQuery(
+            destination=str(rng.choice(list(inventory.cities))),
+            check_in=check_in,
+            check_out=check_in + dt.timedelta(days=int(rng.integers(1, 14))),
+            rooms=int(rng.integers(1, 3)),
+            adults=int(rng.integers(1, 5)),
+        )
+        t0 = time.perf_counter()
+        found += len(inventory.search(query))
+        samples.append(time.perf_counter() - t0)
+    ms = np.asarray(samples) * 1000
+    print(f"{label}: avg_available={found / searches:,.0f} p50={np.percentile(ms, 50):.2f}ms p99={np.percentile(ms, 99):.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--properties", type=int, default=100_000)
+    parser.add_argument("--nights", type=int, default=365)
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    start = dt.date.today()
+    properties, rooms, rates = synthetic_hotels(args.properties, nights=args.nights)
+    t0 = time.perf_counter()
+    inventory = HotelInventory(properties, rooms, rates, start)
+    print(f"properties={len(inventory):,} nights={args.nights} cities={len(CITIES)} load={time.perf_counter() - t0:.2f}s")
+    run(inventory, start, args.searches, "per-city search")
+
+    # Worst case: every property in one city, so each search spans the whole matrix.
+    properties["city"] = "RUH"
+    run(HotelInventory(properties, rooms, rates, start), start, args.searches, "single-city search (all properties)")
+
+
+if __name__ == "__main__":
+    main()
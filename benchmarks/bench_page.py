@@ -0,0 +1,97 @@
+"""Portal page delivery before and after pre-rendered, pre-compressed snapshots.
+
+"Before" is the raw page as the server used to send it: uncompressed, with
+the Tailwind CDN compiler, a synchronous Chart.js and an ``@import``ed font
+blocking first render, and ``translateUI`` relocalizing every keyed node on
+load. "After" is the snapshot served for each language and encoding.
+
+Browser time-to-interactive needs a real browser; this reports what
+determines it on the server's side: bytes on the wire, render-blocking
+round trips, nodes the client still relocalizes, and the modelled transfer
+time of the HTML on a slow link.
+
+    python benchmarks/bench_page.py --rtt 150 --mbps 1.6
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.inventory import FareStore  # noqa: E402
+from travelsmart.pages import PageSnapshots  # noqa: E402
+from travelsmart.server import PAGE, App  # noqa: E402
+from travelsmart.synthetic import synthetic_fares  # noqa: E402
+
+
+def blocking(head: str) -> int:
+    """Synchronous external scripts and ``@import``s before first paint."""
+    scripts = [tag for tag in re.findall(r"<script src=[^>]*>", head) if " defer" not in tag and " async" not in tag]
+    return len(scripts) + len(re.findall(r"@import url", head))
+
+
+def relocalized(page: str) -> int:
+    if re.search(r"<html[^>]*data-prerendered", page):
+        return 0
+    head = page[: page.index("<script>\n")]
+    return len(re.findall(r"data-(?:placeholder-)?key=", head)) + 4  # plus the four nodes translateUI sets by id
+
+
+def timed(fn, runs: int) -> tuple[float, float]:
+    samples = np.empty(runs)
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - t0
+    us = samples * 1e6
+    return float(np.percentile(us, 50)), float(np.percentile(us, 99))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt", type=float, default=150.0, help="round-trip time in ms for the modelled link")
+    parser.add_argument("--mbps", type=float, default=1.6, help="bandwidth of the modelled link")
+    parser.add_argument("--runs", type=int, default=20_000)
+    args = parser.parse_args()
+
+    def transfer_ms(size: int) -> float:
+        return args.rtt + size * 8 / (args.mbps * 1e6) * 1000
+
+    source = PAGE.read_text(encoding="utf-8")
+    t0 = time.perf_counter()
+    snapshots = PageSnapshots(source)
+    print(f"startup render+compress: {(time.perf_counter() - t0) * 1000:.1f}ms  stylesheet={len(snapshots.stylesheet):,}B")
+
+    raw = PAGE.read_bytes()
+    head = source[: source.index("</head>")]
+    print(f"{'before':>14}: bytes={len(raw):>7,} blocking_round_trips={blocking(head)} relocalized_nodes={relocalized(source)} "
+          f"html_transfer={transfer_ms(len(raw)):.0f}ms (+ Tailwind CDN compile in the browser)")
+    for lang, variants in snapshots.variants.items():
+        for encoding, rep in variants.items():
+            page = variants[None].body.decode("utf-8")
+            label = f"{lang}/{encoding or 'identity'}"
+            print(f"{label:>14}: bytes={len(rep.body):>7,} blocking_round_trips={blocking(page[: page.index('</head>')])} "
+                  f"relocalized_nodes={relocalized(page)} html_transfer={transfer_ms(len(rep.body)):.0f}ms")
+
+    # Server-side cost per request: the old handler read the file every time.
+    app = App(FareStore.from_frame(synthetic_fares(1_000)))
+    environ = {"PATH_INFO": "/", "REQUEST_METHOD": "GET", "QUERY_STRING": "", "wsgi.input": io.BytesIO(), "HTTP_ACCEPT_ENCODING": "gzip, br"}
+    etag = app.pages.get("en", "gzip, br").etag
+    p50, p99 = timed(PAGE.read_bytes, args.runs)
+    print(f"server before: p50={p50:.1f}us p99={p99:.1f}us (read page per request)")
+    p50, p99 = timed(lambda: app(environ, lambda status, headers: None), args.runs)
+    print(f"server after:  p50={p50:.1f}us p99={p99:.1f}us (snapshot lookup)")
+    p50, p99 = timed(lambda: app({**environ, "HTTP_IF_NONE_MATCH": etag}, lambda status, headers: None), args.runs)
+    print(f"server 304:    p50={p50:.1f}us p99={p99:.1f}us (If-None-Match hit, no body)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Travel-policy evaluation latency over large result sets.
+
+    python benchmarks/bench_policy.py --rows 2000000 --results 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.inventory import FareStore, ResultSet  # noqa: E402
+from travelsmart.policy import VIOLATIONS, PolicyEngine, TravelPolicy  # noqa: E402
+from travelsmart.synthetic import synthetic_fares  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--results", type=int, default=10_000, help="itineraries per evaluated result set")
+    parser.add_argument("--routes", type=int, default=20, help="distinct routes mixed into each result set")
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+
+    today = dt.date.today()
+    store = FareStore.from_frame(synthetic_fares(args.rows, start=today))
+    engine = PolicyEngine(store)
+    engine.set_policy(
+        TravelPolicy(
+            "acme",
+            max_cabin="Economy",
+            max_fare=1200.0,
+            max_over_cheapest=1.5,
+            preferred_carriers=("SV", "EK", "QR"),
+            min_advance_days=14,
+        )
+    )
+    t0 = time.perf_counter()
+    engine.compiled("acme")
+    print(f"compile={(time.perf_counter() - t0) * 1000:.3f}ms (cached afterwards)")
+
+    rng = np.random.default_rng(3)
+    routes = np.unique(FareStore.key_route(store.key))
+    samples, flagged = [], 0
+    broken = np.zeros(len(VIOLATIONS))
+    for _ in range(args.runs):
+        picked = np.isin(FareStore.key_route(store.key), rng.choice(routes, args.routes, replace=False))
+        candidates = np.flatnonzero(picked)
+        rows = np.sort(rng.choice(candidates, min(args.results, len(candidates)), replace=False))
+        result = ResultSet(store, rows, 1)
+        t0 = time.perf_counter()
+        mask = engine.evaluate("acme", result, today)
+        samples.append(time.perf_counter() - t0)
+        flagged += int(np.count_nonzero(mask))
+        broken += [np.count_nonzero(mask & (1 << bit)) for bit in range(len(VIOLATIONS))]
+    ms = np.asarray(samples) * 1000
+    print(f"results={len(rows):,} routes={args.routes} p50={np.percentile(ms, 50):.3f}ms p99={np.percentile(ms, 99):.3f}ms "
+          f"out_of_policy={flagged / args.runs / len(rows):.0%}")
+    print("by rule: " + " ".join(f"{name}={count / args.runs / len(rows):.0%}" for name, count in zip(VIOLATIONS, broken)))
+
+
+if __name__ == "__main__":
+    main()
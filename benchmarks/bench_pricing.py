@@ -0,0 +1,128 @@
+"""Re-pricing 100k itineraries, and rejecting brute-forced promo codes.
+
+Prices a 100k-itinerary result set (base fare, taxes, handling fee, promo
+discount) with the vectorized engine and with a per-itinerary Python loop
+doing the same arithmetic, checks the two agree, and times what the page's
+handling-fee toggle and promo button cost on a session of that size.
+
+The promo half loads ``--codes`` codes and throws random guesses at them:
+a plain dict lookup on the code string, :meth:`PromoIndex.get` (Bloom
+filter, then the hash index) and :meth:`PromoIndex.get_many` for a batch.
+It reports the observed false-positive rate against the configured one.
+
+    python benchmarks/bench_pricing.py --itineraries 100000 --codes 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.filters import ResultFilter  # noqa: E402
+from travelsmart.inventory import FareStore, ResultSet  # noqa: E402
+from travelsmart.pricing import PricingEngine, Promo, PromoIndex, normalize_code  # noqa: E402
+from travelsmart.synthetic import synthetic_fares  # noqa: E402
+
+
+def timed(fn, runs: int) -> tuple[float, float]:
+    samples = np.empty(runs)
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - t0
+    ms = samples * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+
+def price_loop(engine: PricingEngine, result: ResultSet, promo: Promo | None) -> list[float]:
+    """The same prices one itinerary at a time, as the page used to do per card."""
+    store, totals = engine.store, []
+    for row in result.rows.tolist():
+        base = round(float(store.fare[row]) * result.passengers, 2)
+        taxes = round(base * engine.tax_rate + float(engine.departure_tax[store.origin[row]]) * result.passengers, 2)
+        discount = 0.0
+        if promo is not None:
+            subtotal = base + taxes
+            carrier_ok = not promo.carriers or store.carriers[store.carrier[row]] in promo.carriers
+            if not promo.expired() and subtotal >= promo.min_total and carrier_ok:
+                off = subtotal * promo.percent / 100 + promo.amount
+                if promo.max_discount is not None:
+                    off = min(off, promo.max_discount)
+                discount = round(min(off, subtotal), 2)
+        totals.append(round(base + taxes - discount, 2))
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--itineraries", type=int, default=100_000)
+    parser.add_argument("--passengers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--codes", type=int, default=100_000, help="promo codes in the index")
+    parser.add_argument("--guesses", type=int, default=200_000, help="random (invalid) codes to look up")
+    args = parser.parse_args()
+
+    store = FareStore.from_frame(synthetic_fares(args.rows))
+    engine = PricingEngine(store)
+    rng = np.random.default_rng(3)
+    result = ResultSet(store, rng.choice(len(store), args.itineraries, replace=False), args.passengers)
+    promos = {"no promo": None, "WELCOME10": engine.promo("WELCOME10"), "SAUDIA15": engine.promo("SAUDIA15")}
+
+    for label, promo in promos.items():
+        p50, p99 = timed(lambda: engine.price(result, promo), args.runs)
+        t0 = time.perf_counter()
+        looped = price_loop(engine, result, promo)
+        loop_ms = (time.perf_counter() - t0) * 1000
+        agree = np.allclose(engine.price(result, promo).total, looped, rtol=0, atol=0.011)  # to the cent
+        print(f"{label:>9}: vectorized p50={p50:6.2f}ms p99={p99:6.2f}ms  per-row loop={loop_ms:8.1f}ms ({loop_ms / p50:5.0f}x)  agree={agree}")
+
+    # What the page's controls cost on a session of this size.
+    prices = engine.price(result)
+    result_filter = ResultFilter({"fare": store.fare[result.rows], "total": prices.total}, handling_fee=engine.handling_fee)
+    result_filter.price_range(None, 1500.0)
+    toggle = iter([False, True] * args.runs)
+    p50, p99 = timed(lambda: result_filter.show_fees(next(toggle)), args.runs)
+    print(f"handling-fee toggle: p50={p50:.2f}ms p99={p99:.2f}ms (swap price column, re-apply price filter)")
+    promo = promos["WELCOME10"]
+    p50, p99 = timed(lambda: result_filter.reprice(engine.price(result, promo, fares=result_filter.columns["fare"]).total), args.runs)
+    print(f"apply promo:         p50={p50:.2f}ms p99={p99:.2f}ms (re-price the session, re-apply price filter)")
+
+    codes = [f"PROMO{i:07d}" for i in range(args.codes)]
+    t0 = time.perf_counter()
+    index = PromoIndex(Promo(code, percent=5) for code in codes)
+    print(f"\npromo index: {len(index):,} codes built in {(time.perf_counter() - t0) * 1000:.0f}ms; "
+          f"filter={index.bloom.bits.nbytes / 1024:.0f}KiB, k={index.bloom.hashes}")
+    by_code = {code: code for code in codes}
+    guesses = [f"{value:011X}" for value in rng.integers(0, 1 << 44, args.guesses).tolist()]
+    valid = [codes[i] for i in rng.integers(0, len(codes), 10_000).tolist()]
+
+    def per_code(fn, batch: list[str]) -> float:
+        t0 = time.perf_counter()
+        for code in batch:
+            fn(code)
+        return (time.perf_counter() - t0) / len(batch) * 1e9
+
+    dict_ns = per_code(lambda code: by_code.get(normalize_code(code)), guesses)
+    get_ns = per_code(index.get, guesses)
+    hit_ns = per_code(index.get, valid)
+    t0 = time.perf_counter()
+    found = index.get_many(guesses)
+    many_ns = (time.perf_counter() - t0) / len(guesses) * 1e9
+    stats = index.stats()
+    false_positives = stats["false_positives"] / (2 * len(guesses))
+    print(f"invalid guesses: dict-only={dict_ns:.0f}ns  get={get_ns:.0f}ns  get_many={many_ns:.0f}ns/code  "
+          f"accepted={sum(promo is not None for promo in found)}")
+    print(f"valid codes:     get={hit_ns:.0f}ns")
+    print(f"bloom: filtered={stats['filtered']:,} false_positives={stats['false_positives']:,} "
+          f"observed_rate={false_positives:.4%} expected={stats['expected_false_positive_rate']:.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Flight search latency over a synthetic fare store.
+
+    python benchmarks/bench_search.py --rows 10000000 --queries 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.inventory import FareStore, FlightQuery  # noqa: E402
+from travelsmart.synthetic import AIRPORTS, CARRIERS, synthetic_fares  # noqa: E402
+
+
+def percentiles(samples: list[float]) -> str:
+    ms = np.asarray(samples) * 1000
+    return f"p50={np.percentile(ms, 50):.3f}ms p99={np.percentile(ms, 99):.3f}ms max={ms.max():.3f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = dt.date.today()
+    t0 = time.perf_counter()
+    frame = synthetic_fares(args.rows, start=start)
+    t1 = time.perf_counter()
+    store = FareStore.from_frame(frame)
+    del frame
+    t2 = time.perf_counter()
+    print(f"rows={len(store):,} generate={t1 - t0:.2f}s load+index={t2 - t1:.2f}s")
+
+    rng = np.random.default_rng(1)
+    queries = []
+    for _ in range(args.queries):
+        origin, destination = rng.choice(AIRPORTS, 2, replace=False)
+        departure = start + dt.timedelta(days=int(rng.integers(0, 350)))
+        trip = "return" if rng.random() < 0.5 else "oneway"
+        queries.append(
+            FlightQuery(
+                origin=str(origin),
+                destination=str(destination),
+                departure=departure,
+                return_date=departure + dt.timedelta(days=int(rng.integers(1, 14))),
+                passengers=int(rng.integers(1, 5)),
+                cabin="Business" if rng.random() < 0.2 else "Economy",
+                carrier=str(rng.choice(CARRIERS)) if rng.random() < 0.3 else None,
+                trip_type=trip,
+                flex_days=3 if rng.random() < 0.2 else 0,
+            )
+        )
+
+    for query in queries[:50]:
+        store.search(query)
+    samples = []
+    hits = 0
+    for query in queries:
+        q0 = time.perf_counter()
+        response = store.search(query)
+        samples.append(time.perf_counter() - q0)
+        hits += len(response.outbound)
+    print(f"queries={len(queries)} avg_results={hits / len(queries):.1f} {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
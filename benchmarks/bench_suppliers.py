@@ -0,0 +1,82 @@
+"""Supplier fan-out: time to first result and total latency as suppliers are added.
+
+Each mock supplier answers after a random delay, and a small share of calls
+stall past the per-supplier deadline. Searches run concurrently so
+pooled connections are actually shared.
+
+    python benchmarks/bench_suppliers.py --suppliers 1,2,4,8,16 --searches 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.inventory import FareStore, FlightQuery  # noqa: E402
+from travelsmart.suppliers import SupplierAggregator, mock_suppliers  # noqa: E402
+from travelsmart.synthetic import AIRPORTS, synthetic_fares  # noqa: E402
+
+
+async def run(store: FareStore, count: int, args: argparse.Namespace) -> None:
+    suppliers = mock_suppliers(store, count, latency=(args.min_latency, args.max_latency), failure_rate=args.failures, stall_rate=args.stalls)
+    aggregator = SupplierAggregator(suppliers, deadline=args.deadline)
+    rng = np.random.default_rng(count)
+    start = dt.date.today()
+    queries = []
+    for _ in range(args.searches):
+        origin, destination = rng.choice(AIRPORTS, 2, replace=False)
+        queries.append(FlightQuery(str(origin), str(destination), start + dt.timedelta(days=int(rng.integers(1, 300))), flex_days=3))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    first, total, offers, timeouts, skipped = [], [], 0, 0, 0
+
+    async def one(query: FlightQuery) -> None:
+        nonlocal offers, timeouts, skipped
+        async with semaphore:
+            t0 = time.perf_counter()
+            seen = False
+            async for batch in aggregator.stream(query):
+                if batch.added and not seen:
+                    first.append(time.perf_counter() - t0)
+                    seen = True
+                offers += len(batch.added)
+                timeouts += batch.status == "timeout"
+                skipped += batch.status == "circuit_open"
+            total.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(one(query) for query in queries))
+    ttfr, done = np.asarray(first) * 1000, np.asarray(total) * 1000
+    pools = aggregator.pool_stats().values()
+    opened, reused = sum(p["opened"] for p in pools), sum(p["reused"] for p in pools)
+    print(f"suppliers={count:>2} ttfr_p50={np.percentile(ttfr, 50):6.1f}ms ttfr_p99={np.percentile(ttfr, 99):6.1f}ms "
+          f"total_p50={np.percentile(done, 50):6.1f}ms total_p99={np.percentile(done, 99):6.1f}ms "
+          f"offers/search={offers / len(queries):5.1f} timeouts={timeouts} circuit_open={skipped} connections opened={opened} reused={reused}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--suppliers", default="1,2,4,8,16")
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--min-latency", type=float, default=0.05)
+    parser.add_argument("--max-latency", type=float, default=0.3)
+    parser.add_argument("--deadline", type=float, default=0.5)
+    parser.add_argument("--failures", type=float, default=0.02)
+    parser.add_argument("--stalls", type=float, default=0.03, help="share of supplier calls that hang past the deadline")
+    args = parser.parse_args()
+
+    store = FareStore.from_frame(synthetic_fares(args.rows, start=dt.date.today()))
+    for count in (int(c) for c in args.suppliers.split(",")):
+        asyncio.run(run(store, count, args))
+
+
+if __name__ == "__main__":
+    main()
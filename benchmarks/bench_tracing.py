@@ -0,0 +1,116 @@
+"""Overhead of stage tracing and the sampling profiler on the API hot paths.
+
+Replays the same mix of flight searches, filter changes and fare-calendar
+lookups through the WSGI app with tracing off, tracing on, and tracing on
+with the profiler sampling. The configurations are interleaved round by
+round so drift affects each one equally. The overhead figures compare
+median round times.
+
+    python benchmarks/bench_tracing.py --rows 2000000 --rounds 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.cache import ResultCache  # noqa: E402
+from travelsmart.inventory import FareStore  # noqa: E402
+from travelsmart.server import App  # noqa: E402
+from travelsmart.synthetic import AIRPORTS, synthetic_fares  # noqa: E402
+from travelsmart.tracing import Histogram, Tracer  # noqa: E402
+
+CONFIGS = ("off", "tracing", "tracing+profiler")
+
+
+def call(app: App, path: str, query: str) -> bytes:
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": "GET", "QUERY_STRING": query, "wsgi.input": io.BytesIO()}
+    return b"".join(app(environ, lambda status, headers: None))
+
+
+def workload(app: App, queries: list[str], rng: np.random.Generator) -> None:
+    for query in queries:
+        session = json.loads(call(app, "/api/flights/search", query))["session"]
+        call(app, "/api/results/filter", f"session={session}&max_price={int(rng.integers(300, 1500))}")
+        call(app, "/api/results/filter", f"session={session}&stops=0")
+        call(app, "/api/flights/calendar", query)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--searches", type=int, default=200, help="searches per round, each followed by two filters and a calendar")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--interval", type=float, default=0.01, help="profiler sampling interval in seconds")
+    args = parser.parse_args()
+
+    start = dt.date.today()
+    store = FareStore.from_frame(synthetic_fares(args.rows, start=start))
+    # No result caching, so every search does the full store lookup.
+    app = App(store, cache=ResultCache(max_entries=1))
+    rng = np.random.default_rng(7)
+    queries = []
+    for _ in range(args.searches):
+        origin, destination = rng.choice(AIRPORTS, 2, replace=False)
+        departure = start + dt.timedelta(days=int(rng.integers(1, 300)))
+        queries.append(f"origin={origin}&destination={destination}&departure={departure}&flex=3")
+
+    # Span primitives in isolation.
+    tracer, histogram, n = Tracer(), Histogram(), 200_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        histogram.record(0.000123)
+    record_ns = (time.perf_counter() - t0) / n * 1e9
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with tracer.span("bench"):
+            pass
+    span_ns = (time.perf_counter() - t0) / n * 1e9
+    tracer.enabled = False
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with tracer.span("bench"):
+            pass
+    print(f"histogram.record={record_ns:.0f}ns span={span_ns:.0f}ns disabled_span={(time.perf_counter() - t0) / n * 1e9:.0f}ns")
+
+    samples = np.random.default_rng(0).lognormal(-7, 1.5, 100_000)
+    histogram = Histogram()
+    for value in samples.tolist():
+        histogram.record(value)
+    errors = {q: abs(v - np.quantile(samples, q)) / np.quantile(samples, q) for q, v in histogram.quantiles().items()}
+    print("quantile relative error: " + " ".join(f"p{q * 100:g}={error:.2%}" for q, error in errors.items()))
+
+    workload(app, queries[:20], rng)
+    times: dict[str, list[float]] = {config: [] for config in CONFIGS}
+    for _ in range(args.rounds):
+        for config in CONFIGS:
+            app.tracer.enabled = config != "off"
+            if config == "tracing+profiler":
+                app.profiler.start(args.interval)
+            t0 = time.perf_counter()
+            workload(app, queries, rng)
+            times[config].append(time.perf_counter() - t0)
+            app.profiler.stop()
+
+    base = float(np.median(times["off"]))
+    requests = len(queries) * 4
+    for config in CONFIGS:
+        median = float(np.median(times[config]))
+        print(f"{config:>17}: round={median * 1000:7.1f}ms per_request={median / requests * 1e6:6.1f}us overhead={(median / base - 1):+.2%}")
+    for name, stats in app.tracer.stats().items():
+        print(f"  span {name:>8}: count={stats['count']:>6} p50={stats['p50_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms")
+    profile = app.profiler.stats(5)
+    print(f"profiler: samples={profile['samples']} sampler_time={profile['sampler_ms']}ms top={[entry['function'] for entry in profile['top']]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Concurrent agent-wallet debits: throughput, tail latency and ledger audit.
+
+Hundreds of threads book against a handful of agents at once, with
+recharges mixed in, then every ledger is replayed and compared with the
+materialized balance.
+
+    python benchmarks/bench_wallet.py --agents 8 --threads 400 --ops 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from travelsmart.wallet import AgentWallets, InsufficientFunds  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=400)
+    parser.add_argument("--ops", type=int, default=500, help="operations per thread")
+    parser.add_argument("--opening", type=float, default=50_000.0)
+    parser.add_argument("--threshold", type=float, default=5_000.0)
+    args = parser.parse_args()
+
+    wallets = AgentWallets()
+    agents = [f"AGT-{i:04d}" for i in range(args.agents)]
+    for agent in agents:
+        wallets.open(agent, threshold=args.threshold, opening_balance=args.opening)
+    alerts: dict[str, list[str]] = {agent: [] for agent in agents}
+    wallets.subscribe(lambda entry, crossed: alerts[entry.agent_id].append(crossed))
+
+    samples: list[np.ndarray] = [np.empty(0)] * args.threads
+    rejected = [0] * args.threads
+    start = threading.Barrier(args.threads + 1)
+
+    def worker(index: int) -> None:
+        rng = np.random.default_rng(index)
+        picks = rng.integers(0, len(agents), args.ops)
+        amounts = np.round(rng.gamma(2.0, 120.0, args.ops), 2) + 0.01
+        recharge = rng.random(args.ops) < 0.05
+        timings = np.empty(args.ops)
+        start.wait()
+        for i in range(args.ops):
+            agent = agents[picks[i]]
+            t0 = time.perf_counter()
+            try:
+                if recharge[i]:
+                    wallets.deposit(agent, float(amounts[i]) * 20)
+                else:
+                    wallets.debit(agent, float(amounts[i]), reference=f"{index}-{i}")
+            except InsufficientFunds:
+                rejected[index] += 1
+            timings[i] = time.perf_counter() - t0
+        samples[index] = timings
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+
+    total = args.threads * args.ops
+    us = np.concatenate(samples) * 1e6
+    print(f"operations={total:,} threads={args.threads} agents={args.agents} elapsed={elapsed:.2f}s "
+          f"throughput={total / elapsed:,.0f}/s rejected={sum(rejected):,}")
+    print(f"write_us p50={np.percentile(us, 50):.1f} p99={np.percentile(us, 99):.1f} max={us.max():.0f}")
+
+    checks = np.empty(100_000)
+    for i in range(len(checks)):
+        t0 = time.perf_counter()
+        wallets.balance(agents[i % len(agents)])
+        checks[i] = time.perf_counter() - t0
+    print(f"balance_check_us p50={np.percentile(checks * 1e6, 50):.2f} p99={np.percentile(checks * 1e6, 99):.2f}")
+
+    for agent in agents:
+        replayed = list(wallets.replay(agent))
+        entries = wallets.entries(agent)
+        consistent = replayed[-1] == round(wallets.balance(agent) * 100) and min(replayed) >= 0
+        # Crossings must alternate below/above, starting with "below".
+        alternating = all(crossed == ("below", "above")[i % 2] for i, crossed in enumerate(alerts[agent]))
+        print(f"{agent}: entries={len(entries):,} balance={wallets.balance(agent):,.2f} "
+              f"ledger_matches={consistent} alerts={len(alerts[agent])} alternating={alternating}")
+
+
+if __name__ == "__main__":
+    main()
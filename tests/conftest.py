@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+import pytest
+
+from travelsmart.inventory import FareStore
+
+from .stores import FARES, fare_frame
+
+
+@pytest.fixture
+def store() -> FareStore:
+    return FareStore.from_frame(fare_frame(FARES))
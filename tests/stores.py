@@ -0,0 +1,40 @@
+"""A small hand-built fare table whose search answers can be worked out by hand."""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import pandas as pd
+
+DAY = dt.date(2030, 1, 10)
+
+# (origin, destination, carrier, flight, day offset, "HH:MM", minutes, cabin, stops, seats, fare)
+FARES = [
+    ("RUH", "DXB", "SV", 101, 0, "08:00", 120, "Economy", 0, 9, 500.0),
+    ("RUH", "DXB", "EK", 201, 0, "10:00", 125, "Economy", 1, 4, 350.0),
+    ("RUH", "DXB", "XY", 301, 0, "12:00", 120, "Economy", 0, 0, 200.0),  # sold out
+    ("RUH", "DXB", "SV", 103, 0, "09:00", 120, "Business", 0, 5, 1500.0),
+    ("DXB", "RUH", "SV", 102, 3, "18:00", 120, "Economy", 0, 9, 450.0),
+    ("DXB", "LHR", "EK", 1, 0, "14:00", 420, "Economy", 0, 9, 700.0),
+    ("RUH", "LHR", "SV", 111, 0, "07:00", 420, "Economy", 0, 9, 1400.0),
+]
+
+
+def fare_frame(fares: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "origin": origin,
+                "destination": destination,
+                "carrier": carrier,
+                "flight_number": flight,
+                "departure": pd.Timestamp(f"{DAY + dt.timedelta(days=offset)} {time}"),
+                "duration": minutes,
+                "cabin": cabin,
+                "stops": stops,
+                "seats": seats,
+                "fare": fare,
+            }
+            for origin, destination, carrier, flight, offset, time, minutes, cabin, stops, seats, fare in fares
+        ]
+    )
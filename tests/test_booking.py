@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from travelsmart.booking import BookingPipeline, BookingRequest, PipelineThread, StubSupplier
+from travelsmart.pricing import PricingEngine
+from travelsmart.wallet import AgentWallets
+
+from .stores import DAY
+
+
+def run(pipeline, *requests):
+    async def main():
+        async with pipeline:
+            return await asyncio.gather(*(pipeline.submit(request) for request in requests))
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def row(store):
+    return int(store.find("RUH", "DXB", DAY).rows[1])  # SV 101, 9 seats at 500.00
+
+
+def test_duplicate_submissions_book_once(store, row):
+    pipeline = BookingPipeline(StubSupplier(store))
+    request = BookingRequest("K1", row, passengers=2)
+    first, second = run(pipeline, request, request)
+    assert first.status == "confirmed"
+    assert second == first
+    assert pipeline.counters["duplicates"] == 1
+    assert store.seats[row] == 7
+
+
+def test_key_reused_for_another_booking_is_refused(store, row):
+    pipeline = BookingPipeline(StubSupplier(store))
+    with pytest.raises(ValueError, match="already used for a different booking"):
+        run(pipeline, BookingRequest("K1", row), BookingRequest("K1", row, passengers=2))
+
+
+def test_price_change_is_reported_before_holding(store, row):
+    pipeline = BookingPipeline(StubSupplier(store), pricing=PricingEngine(store))
+    (result,) = run(pipeline, BookingRequest("K1", row, quoted_total=100.0))
+    assert result.status == "price_changed"
+    assert store.seats[row] == 9
+
+
+def test_sold_out(store):
+    sold_out = int(store.find("RUH", "DXB", DAY, passengers=4).rows[0])  # EK 201, 4 seats
+    pipeline = BookingPipeline(StubSupplier(store))
+    (result,) = run(pipeline, BookingRequest("K1", sold_out, passengers=4))
+    assert result.status == "confirmed"
+    (again,) = run(pipeline, BookingRequest("K2", sold_out))
+    assert again.status == "sold_out"
+
+
+def test_deposit_payment_debits_the_wallet(store, row):
+    wallets = AgentWallets()
+    wallets.open("AGT-1", opening_balance=1000.0)
+    pipeline = BookingPipeline(StubSupplier(store), wallet=wallets)
+    (result,) = run(pipeline, BookingRequest("K1", row, payment_method="deposit", agent_id="AGT-1"))
+    assert result.status == "confirmed"
+    assert wallets.balance("AGT-1") == 500.0
+
+
+def test_supplier_fare_overrides_the_store_fare(store, row):
+    (result,) = run(BookingPipeline(StubSupplier(store)), BookingRequest("K1", row, fare=520.0))
+    assert result.amount == 520.0
+
+
+def test_thread_timeout_leaves_the_booking_running(store, row):
+    bookings = PipelineThread(BookingPipeline(StubSupplier(store, latency={"issue": (0.3, 0.3)})))
+    try:
+        request = BookingRequest("K1", row)
+        with pytest.raises(TimeoutError, match="still in flight"):
+            bookings.submit(request, timeout=0.05)
+        assert bookings.submit(request, timeout=5).status == "confirmed"
+        assert bookings.pipeline.counters["submitted"] == 1
+    finally:
+        bookings.close()
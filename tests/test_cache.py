@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from travelsmart.cache import CachedFareSearch, LocalSharedTier, ResultCache, decode_entry, encode_entry
+from travelsmart.inventory import FlightQuery
+
+from .stores import DAY
+
+
+def test_get_or_compute_caches_until_a_tag_is_invalidated():
+    cache = ResultCache()
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)  # noqa: E731
+    assert cache.get_or_compute("q", compute, ["RUH-DXB"]) == 1
+    assert cache.get_or_compute("q", compute, ["RUH-DXB"]) == 1
+    assert cache.invalidate(["RUH-DXB"]) == 1
+    assert cache.get_or_compute("q", compute, ["RUH-DXB"]) == 2
+
+
+def test_entries_expire():
+    now = [0.0]
+    cache = ResultCache(ttl=10.0, clock=lambda: now[0])
+    cache.put("q", "value")
+    now[0] = 11.0
+    assert cache.get("q") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_value_computed_across_an_invalidation_is_not_cached():
+    cache = ResultCache()
+
+    def compute():
+        cache.invalidate(["RUH-DXB"])  # a fare change lands mid-search
+        return "stale"
+
+    assert cache.get_or_compute("q", compute, ["RUH-DXB"]) == "stale"
+    assert cache.get("q") is None
+    assert cache.stats()["stale_puts"] == 1
+
+
+def test_shared_tier_round_trips_arrays_without_pickle():
+    rows = np.array([3, 1, 2])
+    value, tags = decode_entry(encode_entry((rows, None), (("RUH", "DXB", 1),)))
+    assert value[0].tolist() == [3, 1, 2] and value[1] is None
+    with pytest.raises(TypeError):
+        encode_entry(object(), ())
+
+
+def test_shared_tier_serves_another_process_cache():
+    shared = LocalSharedTier()
+    ResultCache(shared=shared).put("q", (np.arange(3), None), ["t"])
+    value = ResultCache(shared=shared).get("q")
+    assert value[0].tolist() == [0, 1, 2]
+
+
+def test_store_update_drops_only_affected_searches(store):
+    search = CachedFareSearch(store)
+    dxb = FlightQuery("RUH", "DXB", DAY)
+    lhr = FlightQuery("RUH", "LHR", DAY)
+    search.search(dxb), search.search(lhr)
+    store.update(search.search(dxb).outbound.rows[0], fare=999.0)
+    assert search.cache.stats()["invalidations"] == 1
+    assert search.search(dxb).outbound.column("fare").tolist() == [500.0, 999.0]
+    assert search.cache.get(lhr) is not None
@@ -0,0 +1,48 @@
+import datetime as dt
+
+import pytest
+
+from travelsmart.connections import ConnectionPlanner, Leg, parse_legs
+
+from .stores import DAY
+
+
+def carriers(store, itinerary):
+    return [(store.carriers[store.carrier[row]], int(store.flight_number[row])) for row in itinerary.rows]
+
+
+def test_cheapest_connects_and_fastest_flies_direct(store):
+    plans = ConnectionPlanner(store).plan("RUH", "LHR", DAY)
+    assert carriers(store, plans["cheapest"]) == [("EK", 201), ("EK", 1)]
+    assert plans["cheapest"].fare == 1050.0
+    # EK 201 makes a stop of its own, so the itinerary has two.
+    assert plans["cheapest"].stops == 2
+    assert carriers(store, plans["fastest"]) == [("SV", 111)]
+
+
+def test_stop_budget_counts_the_rows_own_stops(store):
+    plans = ConnectionPlanner(store).plan("RUH", "LHR", DAY, max_stops=1)
+    assert carriers(store, plans["cheapest"]) == [("SV", 101), ("EK", 1)]
+
+
+def test_connections_respect_minimum_connection_time(store):
+    plans = ConnectionPlanner(store, mct={"DXB": 300}).plan("RUH", "LHR", DAY)
+    assert carriers(store, plans["cheapest"]) == [("SV", 111)]
+
+
+def test_first_leg_boards_on_the_requested_day(store):
+    plans = ConnectionPlanner(store).plan("RUH", "LHR", DAY - dt.timedelta(days=1))
+    assert plans == {"cheapest": None, "fastest": None}
+
+
+def test_multi_city_waits_for_the_previous_leg(store):
+    legs = [Leg("RUH", "DXB", DAY), Leg("DXB", "RUH", DAY + dt.timedelta(days=3))]
+    outbound, back = ConnectionPlanner(store).multi_city(legs)
+    assert outbound.fare == 350.0 and back.fare == 450.0
+
+
+def test_parse_legs():
+    assert parse_legs("ruh:dxb:2030-01-10,DXB:RUH:2030-01-13") == [Leg("RUH", "DXB", DAY), Leg("DXB", "RUH", dt.date(2030, 1, 13))]
+    for value, message in (("RUH:DXB", "ORIGIN:DESTINATION:YYYY-MM-DD"), ("RUH:DXB:soon", "invalid date"), (",", "at least one")):
+        with pytest.raises(ValueError, match=message):
+            parse_legs(value)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from travelsmart.filters import FilterSessions, ResultFilter
+
+
+@pytest.fixture
+def result_filter():
+    return ResultFilter({"total": np.array([100.0, 200.0, 300.0, 400.0]), "stops": np.array([0, 1, 0, 2])}, handling_fee=25.0)
+
+
+def test_price_range_reports_only_changed_rows(result_filter):
+    delta = result_filter.price_range(None, 250.0)
+    assert delta.removed.tolist() == [2, 3]
+    assert delta.added.tolist() == []
+    delta = result_filter.price_range(None, 350.0)
+    assert delta.added.tolist() == [2]
+    assert delta.count == 3
+
+
+def test_filters_combine(result_filter):
+    result_filter.price_range(None, 350.0)
+    delta = result_filter.one_of("stops", [0])
+    assert result_filter.rows().tolist() == [0, 2]
+    assert delta.removed.tolist() == [1]
+    result_filter.one_of("stops", None)
+    assert result_filter.rows().tolist() == [0, 1, 2]
+
+
+def test_fee_toggle_switches_prices_and_reapplies_the_price_filter(result_filter):
+    result_filter.price_range(None, 300.0)
+    assert result_filter.rows().tolist() == [0, 1]  # 325 with the fee
+    result_filter.show_fees(False)
+    assert result_filter.prices().tolist() == [100.0, 200.0, 300.0, 400.0]
+    assert result_filter.rows().tolist() == [0, 1, 2]
+
+
+def test_reprice_keeps_the_fee_on_top(result_filter):
+    result_filter.reprice(np.array([90.0, 180.0, 270.0, 360.0]))
+    assert result_filter.prices().tolist() == [115.0, 205.0, 295.0, 385.0]
+
+
+def test_sessions_evict_the_least_recently_used():
+    sessions = FilterSessions(max_sessions=2)
+    first = sessions.open(ResultFilter({"total": np.zeros(1)}), "first")
+    second = sessions.open(ResultFilter({"total": np.zeros(1)}), "second")
+    sessions.get(first)
+    sessions.open(ResultFilter({"total": np.zeros(1)}), "third")
+    assert sessions.get(first)[1] == "first"
+    with pytest.raises(KeyError, match="unknown or expired result session"):
+        sessions.get(second)
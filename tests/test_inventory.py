@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from travelsmart.inventory import FlightQuery
+
+from .stores import DAY
+
+
+def carriers(result):
+    return [record["carrier"] for record in result.records()]
+
+
+def test_find_returns_bookable_rows_in_the_cabin_cheapest_first(store):
+    result = store.find("RUH", "DXB", DAY)
+    assert result.column("fare").tolist() == [350.0, 500.0]
+
+
+def test_find_drops_rows_without_enough_seats(store):
+    assert carriers(store.find("RUH", "DXB", DAY, passengers=5)) == ["SV"]
+
+
+def test_find_by_carrier(store):
+    assert carriers(store.find("RUH", "DXB", DAY, carrier="EK")) == ["EK"]
+    assert len(store.find("RUH", "DXB", DAY, carrier="ZZ")) == 0
+
+
+def test_find_unknown_airport_is_empty(store):
+    assert len(store.find("RUH", "XXX", DAY)) == 0
+
+
+def test_search_return_trip_has_inbound(store):
+    query = FlightQuery.from_form({"origin": "ruh", "destination": "dxb", "departure": DAY.isoformat(), "return": "2030-01-13", "tripType": "return"})
+    response = store.search(query)
+    assert len(response.outbound) == 2
+    assert response.inbound.column("fare").tolist() == [450.0]
+
+
+def test_update_reorders_results(store):
+    row = int(store.find("RUH", "DXB", DAY).rows[1])
+    store.update(row, fare=100.0)
+    assert store.find("RUH", "DXB", DAY).rows[0] == row
+
+
+def test_update_notifies_listeners(store):
+    seen = []
+    store.subscribe(lambda rows, old: seen.append((rows.tolist(), old.tolist())))
+    row = int(store.find("RUH", "DXB", DAY).rows[0])
+    store.update(row, seats=1)
+    assert seen == [([row], [350.0])]
+    assert np.all(store.seats[[row]] == 1)
+
+
+def test_from_form_rejects_unknown_cabin_readably():
+    with pytest.raises(ValueError, match="choose one of Economy, Business, First"):
+        FlightQuery.from_form({"origin": "RUH", "destination": "DXB", "departure": DAY.isoformat(), "cabin": "Foo"})
+
+
+def test_one_way_query_drops_return_date():
+    query = FlightQuery.from_form({"origin": "RUH", "destination": "DXB", "departure": DAY.isoformat(), "return": "2030-01-13"})
+    assert query.return_date is None
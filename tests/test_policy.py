@@ -0,0 +1,45 @@
+import datetime as dt
+
+import numpy as np
+
+from travelsmart.inventory import ResultSet
+from travelsmart.policy import CompiledPolicy, PolicyEngine, TravelPolicy, violation_names
+
+from .stores import DAY
+
+
+def masks(store, policy, result):
+    return [violation_names(mask) for mask in CompiledPolicy.compile(policy, store).evaluate(result, today=DAY - dt.timedelta(days=30)).tolist()]
+
+
+def test_baseline_ignores_sold_out_fares(store):
+    result = store.find("RUH", "DXB", DAY)
+    # The sold-out 200.00 fare must not become the baseline; 350.00 is the cheapest bookable one.
+    assert CompiledPolicy.compile(TravelPolicy("acme"), store).route_cheapest(result.rows).tolist() == [350.0, 350.0]
+    assert masks(store, TravelPolicy("acme", max_over_cheapest=1.2), result) == [[], ["relative_fare"]]
+
+
+def test_baseline_does_not_move_with_the_search_filters(store):
+    result = store.find("RUH", "DXB", DAY, carrier="SV")
+    assert masks(store, TravelPolicy("acme", max_over_cheapest=1.2), result) == [["relative_fare"]]
+
+
+def test_nothing_on_sale_flags_nothing(store):
+    economy = store.find("RUH", "DXB", DAY).rows
+    store.update(economy, seats=0)
+    result = ResultSet(store, economy)
+    assert np.isinf(CompiledPolicy.compile(TravelPolicy("acme"), store).route_cheapest(result.rows)).all()
+    assert masks(store, TravelPolicy("acme", max_over_cheapest=1.2), result) == [[], []]
+
+
+def test_cabin_carrier_and_advance_rules(store):
+    business = ResultSet(store, store.find("RUH", "DXB", DAY, cabin="Business").rows)
+    policy = TravelPolicy("acme", max_cabin="Economy", preferred_carriers=("ek",), min_advance_days=60)
+    assert masks(store, policy, business) == [["cabin", "carrier", "advance_purchase"]]
+
+
+def test_engine_defaults_to_the_fare_cap(store):
+    engine = PolicyEngine(store)
+    result = store.find("RUH", "LHR", DAY)
+    assert "default" in engine
+    assert [violation_names(mask) for mask in engine.evaluate("default", result).tolist()] == [["fare"]]
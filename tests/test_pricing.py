@@ -0,0 +1,83 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from travelsmart.inventory import ResultSet
+from travelsmart.pricing import DEMO_PROMOS, PricingEngine, Promo, PromoIndex
+
+from .stores import DAY
+
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def engine(store):
+    return PricingEngine(store, promo_key=KEY)
+
+
+def test_prices_base_taxes_and_fee(engine, store):
+    result = ResultSet(store, store.find("RUH", "DXB", DAY).rows, passengers=2)
+    prices = engine.price(result)
+    assert prices.base.tolist() == [700.0, 1000.0]
+    # 15% of the fare plus 87.00 RUH departure tax per passenger.
+    assert prices.taxes.tolist() == [279.0, 324.0]
+    assert prices.breakdown(0)["total"] == 979.0 + engine.handling_fee
+
+
+def test_promo_discount_and_rejections(engine, store):
+    result = ResultSet(store, store.find("RUH", "DXB", DAY).rows, passengers=2)
+    prices = engine.price(result, engine.promo("welcome10"))
+    assert prices.discount.tolist() == [97.9, 132.4]
+    saudia = engine.price(result, engine.promo("SAUDIA15"))
+    assert saudia.breakdown(0)["promo"] == {"code": "SAUDIA15", "applied": False, "rejected": ["carrier"]}
+    assert saudia.breakdown(1)["promo"]["applied"]
+
+
+def test_expired_promo_is_rejected(store):
+    engine = PricingEngine(store, [Promo("OLD10", percent=10, expires=dt.date(2020, 1, 1))], promo_key=KEY)
+    prices = engine.price(ResultSet(store, store.find("RUH", "DXB", DAY).rows), engine.promo("OLD10"))
+    assert prices.discount.tolist() == [0.0, 0.0]
+    assert prices.breakdown()["promo"]["rejected"] == ["expired"]
+
+
+def test_charge_matches_the_quote(engine, store):
+    row = int(store.find("RUH", "DXB", DAY).rows[0])
+    quote = engine.price(ResultSet(store, np.array([row]), 2), engine.promo("WELCOME10")).breakdown()
+    assert engine.charge(row, 2, 350.0, "WELCOME10") == quote["total"]
+
+
+def test_unknown_promo(engine):
+    with pytest.raises(KeyError, match="NOPE123"):
+        engine.promo("nope123")
+
+
+def test_promo_lookup_counts_outcomes():
+    index = PromoIndex(DEMO_PROMOS, key=KEY)
+    assert index.get(" welcome10 ").code == "WELCOME10"
+    assert index.get("no") is None
+    assert index.get("NOTACODE") is None
+    stats = index.stats()
+    assert stats["lookups"] == 3
+    assert stats["hits"] == 1 and stats["malformed"] == 1
+    assert stats["filtered"] + stats["false_positives"] == 1
+
+
+def test_get_many_agrees_with_get():
+    index = PromoIndex([Promo(f"CODE{i:04d}", percent=5) for i in range(500)], key=KEY)
+    codes = [f"code{i:04d}" for i in range(0, 1000, 7)] + ["x", "??", ""]
+    assert index.get_many(codes) == [index.get(code) for code in codes]
+
+
+def test_digests_depend_only_on_the_key():
+    assert PromoIndex(DEMO_PROMOS, key=KEY).digest("SAVE50") == PromoIndex([], key=KEY).digest("SAVE50")
+    assert PromoIndex(DEMO_PROMOS, key=KEY).digest("SAVE50") != PromoIndex(DEMO_PROMOS, key=b"j" * 32).digest("SAVE50")
+    with pytest.raises(ValueError, match="16-64 bytes"):
+        PromoIndex(DEMO_PROMOS, key="short")
+
+
+def test_promo_validation():
+    with pytest.raises(ValueError, match="3-32 letters or digits"):
+        Promo("a!", percent=5)
+    with pytest.raises(ValueError, match="gives no discount"):
+        Promo("FREE")
@@ -0,0 +1,95 @@
+import datetime as dt
+import io
+import json
+
+import pytest
+
+from travelsmart.hotels import HotelInventory
+from travelsmart.server import App
+from travelsmart.synthetic import synthetic_hotels
+
+from .stores import DAY
+
+
+@pytest.fixture
+def app(store):
+    properties, rooms, rates = synthetic_hotels(200)
+    return App(store, HotelInventory(properties, rooms, rates, dt.date.today()))
+
+
+def call(app, path, query="", method="GET"):
+    statuses = []
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": method, "QUERY_STRING": query, "wsgi.input": io.BytesIO()}
+    body = b"".join(app(environ, lambda status, headers: statuses.append(status)))
+    return statuses[0], body
+
+
+def call_json(app, path, query="", method="GET"):
+    status, body = call(app, path, query, method)
+    return status, json.loads(body)
+
+
+def flight_session(app, extra=""):
+    status, payload = call_json(app, "/api/flights/search", f"origin=RUH&destination=DXB&departure={DAY}{extra}")
+    assert status == "200 OK"
+    return payload
+
+
+@pytest.mark.parametrize(
+    "path, query, message",
+    [
+        ("/api/flights/calendar", f"origin=RUH&destination=DXB&departure={DAY}&cabin=Foo", "unknown cabin 'Foo'"),
+        ("/api/flights/calendar", "origin=RUH&destination=DXB&month=2030", "must be YYYY-MM"),
+        ("/api/flights/itineraries", f"origin=RUH&destination=LHR&departure={DAY}&cabin=Foo", "unknown cabin 'Foo'"),
+        ("/api/flights/itineraries", "legs=RUH:DXB", "must be ORIGIN:DESTINATION:YYYY-MM-DD"),
+    ],
+)
+def test_bad_parameters_get_readable_errors(app, path, query, message):
+    status, payload = call_json(app, path, query)
+    assert status == "400 Bad Request"
+    assert message in payload["error"]
+
+
+def test_filter_sends_prices_only_when_they_change(app):
+    session = flight_session(app)["session"]
+    _, stops = call_json(app, "/api/results/filter", f"session={session}&stops=0")
+    assert stops["count"] == 1 and "prices" not in stops
+    _, fees_off = call_json(app, "/api/results/filter", f"session={session}&stops=any&fees=0")
+    # fare + 15% tax + 87.00 RUH departure tax, without the 25.00 handling fee
+    assert fees_off["prices"] == [489.5, 662.0]
+    _, unchanged = call_json(app, "/api/results/filter", f"session={session}&fees=0")
+    assert "prices" not in unchanged
+    _, promo = call_json(app, "/api/results/filter", f"session={session}&promo=WELCOME10")
+    assert promo["prices"] == [440.55, 595.8]
+
+
+def test_stops_filter_on_a_hotel_session_is_not_a_server_error(app):
+    destination = app.hotels.properties["city"].iloc[0]
+    check_in = dt.date.today() + dt.timedelta(days=10)
+    status, hotels = call_json(app, "/api/hotels/search", f"destination={destination}&checkIn={check_in}&checkOut={check_in + dt.timedelta(days=2)}")
+    assert status == "200 OK"
+    status, payload = call_json(app, "/api/results/filter", f"session={hotels['session']}&stops=0")
+    assert status == "400 Bad Request"
+    assert payload["error"] == "no filter change given"
+
+
+def test_both_legs_are_priced_and_flagged(app):
+    payload = flight_session(app, "&return=2030-01-13&tripType=return")
+    (inbound,) = payload["inbound"]
+    assert inbound["price"] == 450.0 + 67.5 + 75.0 + 25.0  # fare, 15% tax, DXB departure tax, handling fee
+    assert inbound["in_policy"] and inbound["policy_violations"] == []
+    _, filtered = call_json(app, "/api/results/filter", f"session={payload['inbound_session']}&stops=1")
+    assert filtered["removed"] == [0]
+
+
+def test_quote_for_an_unknown_offer_is_404(app):
+    status, payload = call_json(app, "/api/pricing/quote", "offer=0123456789abcdef")
+    assert status == "404 Not Found"
+    assert "search again" in payload["error"]
+
+
+def test_metrics_report_promo_outcomes(app):
+    call_json(app, "/api/pricing/quote", "row=0&promo=WELCOME10")
+    status, body = call(app, "/metrics")
+    assert status == "200 OK"
+    assert b'travelsmart_promo_lookups_total{outcome="hits"} 1' in body
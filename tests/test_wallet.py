@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from travelsmart.wallet import AgentWallets, InsufficientFunds
+
+
+@pytest.fixture
+def wallets():
+    wallets = AgentWallets()
+    wallets.open("AGT-1", threshold=500.0, opening_balance=1000.0)
+    return wallets
+
+
+def test_debit_never_goes_negative(wallets):
+    with pytest.raises(InsufficientFunds):
+        wallets.debit("AGT-1", 1000.01)
+    assert wallets.balance("AGT-1") == 1000.0
+
+
+def test_reference_is_an_idempotency_key(wallets):
+    first = wallets.debit("AGT-1", 100.0, reference="B1")
+    assert wallets.debit("AGT-1", 100.0, reference="B1") is first
+    assert wallets.balance("AGT-1") == 900.0
+    with pytest.raises(ValueError, match="different debit"):
+        wallets.debit("AGT-1", 50.0, reference="B1")
+
+
+def test_threshold_crossings_are_announced(wallets):
+    crossed = []
+    wallets.subscribe(lambda entry, direction: crossed.append(direction))
+    wallets.debit("AGT-1", 600.0)
+    wallets.deposit("AGT-1", 200.0)
+    assert crossed == ["below", "above"]
+
+
+def test_concurrent_debits_balance_with_the_ledger(wallets):
+    def spend():
+        for _ in range(100):
+            try:
+                wallets.debit("AGT-1", 1.5)
+            except InsufficientFunds:
+                pass
+
+    threads = [threading.Thread(target=spend) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 800 attempts ask for 1200.00: 666 succeed and the rest are refused.
+    debits = [entry for entry in wallets.entries("AGT-1") if entry.kind == "debit"]
+    assert len(debits) == 666
+    assert wallets.balance("AGT-1") == 1.0
+    assert list(wallets.replay("AGT-1"))[-1] / 100 == wallets.balance("AGT-1")
+
+
+def test_amounts_must_be_finite_and_positive(wallets):
+    for amount in (0, -5, float("nan"), float("inf")):
+        with pytest.raises(ValueError):
+            wallets.deposit("AGT-1", amount)
@@ -0,0 +1,73 @@
+"""TravelSmart booking backend."""
+
+from .ancillaries import AncillaryService, AncillaryUnavailable, SeatLayout, TimingWheel
+from .autocomplete import PrefixIndex, Suggestion
+from .booking import BookingPipeline, BookingRequest, BookingResult, Overloaded, PipelineThread, StubSupplier, SupplierError
+from .cache import CachedFareSearch, LocalSharedTier, ResultCache, SharedTier
+from .connections import ConnectionPlanner, Itinerary, Leg
+from .fare_calendar import FareCalendar
+from .filters import FilterDelta, FilterSessions, ResultFilter
+from .hotels import HotelInventory, HotelQuery, HotelResults
+from .inventory import CABINS, FareStore, FlightQuery, ResultSet, SearchResponse
+from .pages import PageSnapshots
+from .policy import PolicyEngine, TravelPolicy
+from .pricing import BloomFilter, Prices, PricingEngine, Promo, PromoIndex
+from .suppliers import AggregatorThread, CircuitBreaker, ConnectionPool, MockSupplier, Offer, OfferBook, SupplierAggregator
+from .tracing import Histogram, SamplingProfiler, Tracer
+from .wallet import AgentWallets, InsufficientFunds, LedgerEntry
+
+__all__ = [
+    "AgentWallets",
+    "AggregatorThread",
+    "AncillaryService",
+    "AncillaryUnavailable",
+    "BloomFilter",
+    "BookingPipeline",
+    "BookingRequest",
+    "BookingResult",
+    "CABINS",
+    "CachedFareSearch",
+    "CircuitBreaker",
+    "ConnectionPlanner",
+    "ConnectionPool",
+    "FareCalendar",
+    "FareStore",
+    "FilterDelta",
+    "FilterSessions",
+    "FlightQuery",
+    "Histogram",
+    "HotelInventory",
+    "HotelQuery",
+    "HotelResults",
+    "InsufficientFunds",
+    "Itinerary",
+    "LedgerEntry",
+    "Leg",
+    "LocalSharedTier",
+    "MockSupplier",
+    "Offer",
+    "OfferBook",
+    "Overloaded",
+    "PageSnapshots",
+    "PipelineThread",
+    "PolicyEngine",
+    "PrefixIndex",
+    "Prices",
+    "PricingEngine",
+    "Promo",
+    "PromoIndex",
+    "ResultCache",
+    "ResultFilter",
+    "ResultSet",
+    "SamplingProfiler",
+    "SearchResponse",
+    "SeatLayout",
+    "SharedTier",
+    "StubSupplier",
+    "Suggestion",
+    "SupplierAggregator",
+    "SupplierError",
+    "TimingWheel",
+    "Tracer",
+    "TravelPolicy",
+]
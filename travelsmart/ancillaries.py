@@ -0,0 +1,395 @@
+"""Seat maps plus meal and baggage allotments behind the booking page's ancillary buttons.
+
+Each flight keeps its seat map as two integer bitsets, seats sold and seats
+held, so checking or taking a set of seats is a few bitwise operations. A
+flight is identified by carrier, flight number, departure and cabin, not by
+fare row: two fares on the same aircraft cabin share one seat map, so they
+can never sell the same seat twice. Meal and baggage allotments are plain counters. Holds
+are short-lived: rather than a timer per hold, each is filed on a timing
+wheel under its expiry tick and released in bulk when the wheel reaches it.
+Flights are spread over a fixed set of shards, each with its own lock and
+wheel and the same striping as the agent wallets. Agents picking seats on
+one flight contend only with each other, for the length of a few integer
+operations, and never with agents on other flights. Each shard keeps at most
+its share of ``max_flights`` seat maps; untouched ones (no holds, nothing
+confirmed) are dropped oldest first and rebuilt identically on next use.
+"""
+
+from __future__ import annotations
+
+import itertools
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Mapping
+
+import numpy as np
+
+from .inventory import CABINS, FareStore
+
+DEFAULT_SHARDS = 64
+DEFAULT_TTL = 120.0
+DEFAULT_MAX_FLIGHTS = 100_000
+
+# Departure minute, carrier, flight number and cabin packed into one integer.
+FlightKey = int
+
+# cabin -> (first row number, rows, seat letters)
+LAYOUTS = {"First": (1, 2, "AF"), "Business": (3, 6, "ACDF"), "Economy": (10, 30, "ABCDEF")}
+
+# Allotment per option, as a share of the cabin's seats.
+MEALS = {"standard": 1.0, "vegetarian": 0.15, "child": 0.05, "diabetic": 0.03}
+BAGS = {"23kg": 0.5, "32kg": 0.15}
+
+COUNTERS = ("holds", "conflicts", "expired", "released", "confirmed", "evicted")
+
+
+class AncillaryUnavailable(ValueError):
+    """A seat is already taken or an allotment has run out."""
+
+
+@dataclass(frozen=True)
+class SeatLayout:
+    cabin: str
+    first_row: int
+    rows: int
+    letters: str
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * len(self.letters)
+
+    def label(self, seat: int) -> str:
+        row, column = divmod(seat, len(self.letters))
+        return f"{self.first_row + row}{self.letters[column]}"
+
+    def seat(self, label: str) -> int:
+        row, letter = label[:-1], label[-1:].upper()
+        if not row.isdigit() or letter not in self.letters or not 0 <= int(row) - self.first_row < self.rows:
+            raise ValueError(f"no seat {label!r} in {self.cabin}")
+        return (int(row) - self.first_row) * len(self.letters) + self.letters.index(letter)
+
+    def mask(self, labels: list[str]) -> int:
+        mask = 0
+        for label in labels:
+            mask |= 1 << self.seat(label)
+        return mask
+
+    def labels(self, mask: int) -> list[str]:
+        labels = []
+        while mask:
+            low = mask & -mask
+            labels.append(self.label(low.bit_length() - 1))
+            mask ^= low
+        return labels
+
+
+@dataclass
+class _Flight:
+    layout: SeatLayout
+    sold: int
+    held: int = 0
+    remaining: dict[str, int] = field(default_factory=dict)
+    holds: int = 0
+    confirmed: bool = False
+
+
+@dataclass
+class _Hold:
+    hold_id: str
+    row: int
+    flight: FlightKey
+    seats: int = 0
+    items: dict[str, int] = field(default_factory=dict)
+    expires: float = 0.0
+    tick: int = 0
+
+
+class TimingWheel:
+    """Hashed timing wheel: ``slots`` buckets of ``tick`` seconds, one list per bucket.
+
+    Entries are never removed early; the caller tells a live entry from a
+    stale one by the tick it was filed under. A deadline more than a turn
+    away is filed at the wheel's far edge and comes back to be filed again.
+    """
+
+    def __init__(self, tick: float, slots: int, now: float) -> None:
+        self.tick = tick
+        self.slots: list[list[tuple[int, str]]] = [[] for _ in range(slots)]
+        self.current = int(now / tick)
+
+    def schedule(self, key: str, deadline: float) -> int:
+        """File ``key`` under the first tick after ``deadline``; returns that tick."""
+        tick = min(max(int(deadline / self.tick) + 1, self.current + 1), self.current + len(self.slots) - 1)
+        self.slots[tick % len(self.slots)].append((tick, key))
+        return tick
+
+    def advance(self, now: float) -> list[tuple[int, str]]:
+        """Every ``(tick, key)`` whose tick has passed by ``now``."""
+        target = int(now / self.tick)
+        due: list[tuple[int, str]] = []
+        if target <= self.current:
+            return due
+        for tick in range(max(self.current + 1, target - len(self.slots) + 1), target + 1):
+            bucket = self.slots[tick % len(self.slots)]
+            if bucket:
+                due.extend(bucket)
+                bucket.clear()
+        self.current = target
+        return due
+
+
+class _Shard:
+    __slots__ = ("lock", "flights", "holds", "wheel", "counters")
+
+    def __init__(self, wheel: TimingWheel) -> None:
+        self.lock = threading.Lock()
+        self.flights: OrderedDict[FlightKey, _Flight] = OrderedDict()
+        self.holds: dict[str, _Hold] = {}
+        self.wheel = wheel
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+
+class AncillaryService:
+    """Per-flight seat bitsets and allotment counters with TTL holds, sharded by flight."""
+
+    def __init__(
+        self,
+        store: FareStore,
+        *,
+        ttl: float = DEFAULT_TTL,
+        shards: int = DEFAULT_SHARDS,
+        tick: float = 0.1,
+        slots: int = 2048,
+        clock: Callable[[], float] = time.monotonic,
+        seed: int = 0,
+        max_flights: int = DEFAULT_MAX_FLIGHTS,
+    ) -> None:
+        self.store = store
+        self.ttl = ttl
+        self.seed = seed
+        self._clock = clock
+        self.max_flights_per_shard = max(1, max_flights // shards)
+        # Fare rows are fixed once loaded, so every row's flight key is packed up front.
+        departure = store.day.astype(np.int64) * 1440 + store.minute
+        numbers = int(store.flight_number.max(initial=0)) + 1
+        self._keys = ((departure * len(store.carriers) + store.carrier) * numbers + store.flight_number) * len(CABINS) + store.cabin
+        now = clock()
+        self._shards = [_Shard(TimingWheel(tick, slots, now)) for _ in range(shards)]
+
+    def flight_key(self, row: int) -> FlightKey:
+        """Identity of the aircraft cabin that fare ``row`` sells seats on."""
+        if not 0 <= row < len(self._keys):
+            raise KeyError(f"unknown fare row {row}")
+        return int(self._keys[row])
+
+    def _shard(self, key: FlightKey) -> _Shard:
+        return self._shards[key % len(self._shards)]
+
+    def _fare_rows(self, row: int, key: FlightKey) -> np.ndarray:
+        """Every fare row selling ``key``; they share the row's route-day slice of the store."""
+        span = self.store.key_slice(int(self.store.key[row]))
+        return np.flatnonzero(self._keys[span] == key) + span.start
+
+    def _flight(self, shard: _Shard, row: int, key: FlightKey) -> _Flight:
+        flight = shard.flights.get(key)
+        if flight is not None:
+            shard.flights.move_to_end(key)
+            return flight
+        cabin = CABINS[key % len(CABINS)]
+        layout = SeatLayout(cabin, *LAYOUTS[cabin])
+        # Fewer fare seats left means a fuller cabin; which seats are gone is stable per flight.
+        occupancy = 0.9 - 0.06 * int(self.store.seats[self._fare_rows(row, key)].max())
+        taken = np.random.default_rng((self.seed, key)).random(layout.capacity) < occupancy
+        sold = int.from_bytes(np.packbits(taken, bitorder="little").tobytes(), "little")
+        free = layout.capacity - int(taken.sum())
+        remaining = {f"meal:{name}": int(share * free) for name, share in MEALS.items()}
+        remaining.update({f"bag:{name}": int(share * free) for name, share in BAGS.items()})
+        self._evict(shard, len(shard.flights) + 1 - self.max_flights_per_shard)
+        flight = shard.flights[key] = _Flight(layout, sold, remaining=remaining)
+        return flight
+
+    @staticmethod
+    def _evict(shard: _Shard, excess: int) -> None:
+        """Drop up to ``excess`` of the oldest seat maps that can be rebuilt exactly; caller holds the lock."""
+        if excess <= 0:
+            return
+        idle = list(itertools.islice((key for key, flight in shard.flights.items() if not flight.holds and not flight.confirmed), excess))
+        for key in idle:
+            del shard.flights[key]
+        shard.counters["evicted"] += len(idle)
+
+    def _expire(self, shard: _Shard, now: float) -> None:
+        """Release every hold on ``shard`` whose tick has come round; caller holds the lock."""
+        for tick, hold_id in shard.wheel.advance(now):
+            hold = shard.holds.get(hold_id)
+            if hold is None or hold.tick != tick:
+                continue
+            if hold.expires > now:
+                hold.tick = shard.wheel.schedule(hold_id, hold.expires)
+                continue
+            self._drop(shard, hold)
+            shard.counters["expired"] += 1
+
+    @staticmethod
+    def _drop(shard: _Shard, hold: _Hold) -> None:
+        flight = shard.flights[hold.flight]
+        flight.held &= ~hold.seats
+        flight.holds -= 1
+        for key, count in hold.items.items():
+            flight.remaining[key] += count
+        del shard.holds[hold.hold_id]
+
+    @staticmethod
+    def hold_row(hold_id: str) -> int:
+        """The fare row a hold id was issued for (hold ids start with it)."""
+        row, _, _ = hold_id.partition("-")
+        if not row.isdigit():
+            raise KeyError(f"unknown or expired hold {hold_id!r}")
+        return int(row)
+
+    def _locate(self, hold_id: str) -> _Shard:
+        # Hold ids start with their fare row, so no global hold index is needed.
+        row = self.hold_row(hold_id)
+        if row >= len(self.store):
+            raise KeyError(f"unknown or expired hold {hold_id!r}")
+        return self._shard(self.flight_key(row))
+
+    def seat_map(self, row: int) -> dict[str, object]:
+        """Layout plus one character per seat: ``.`` free, ``x`` sold, ``h`` held."""
+        key = self.flight_key(row)
+        shard = self._shard(key)
+        with shard.lock:
+            self._expire(shard, self._clock())
+            flight = self._flight(shard, row, key)
+            sold, held, remaining = flight.sold, flight.held, dict(flight.remaining)
+        layout = flight.layout
+        seats = "".join("x" if sold >> seat & 1 else "h" if held >> seat & 1 else "." for seat in range(layout.capacity))
+        return {
+            "row": row,
+            "cabin": layout.cabin,
+            "first_row": layout.first_row,
+            "rows": layout.rows,
+            "letters": layout.letters,
+            "seats": seats,
+            "available": seats.count("."),
+            "meals": {name: remaining[f"meal:{name}"] for name in MEALS},
+            "bags": {name: remaining[f"bag:{name}"] for name in BAGS},
+        }
+
+    def available(self, row: int, seats: list[str]) -> bool:
+        key = self.flight_key(row)
+        shard = self._shard(key)
+        with shard.lock:
+            self._expire(shard, self._clock())
+            flight = self._flight(shard, row, key)
+            return not flight.layout.mask(seats) & (flight.sold | flight.held)
+
+    def hold(
+        self,
+        row: int,
+        *,
+        seats: list[str] | None = None,
+        meals: Mapping[str, int] | None = None,
+        bags: Mapping[str, int] | None = None,
+        hold_id: str | None = None,
+    ) -> dict[str, object]:
+        """Take or amend a hold; given ``seats``/``meals``/``bags`` replace what the hold had.
+
+        Every change is all-or-nothing and restarts the hold's TTL. Raises
+        :class:`AncillaryUnavailable` when a seat is taken or an allotment is
+        short, and ``KeyError`` for an expired ``hold_id``.
+        """
+        items = {f"meal:{name}": int(count) for name, count in (meals or {}).items()}
+        items.update({f"bag:{name}": int(count) for name, count in (bags or {}).items()})
+        key = self.flight_key(row)
+        shard = self._shard(key)
+        with shard.lock:
+            now = self._clock()
+            self._expire(shard, now)
+            flight = self._flight(shard, row, key)
+            if hold_id is None:
+                hold = _Hold(f"{row}-{secrets.token_hex(8)}", row, key)
+            else:
+                hold = shard.holds.get(hold_id)
+                if hold is None or hold.row != row:
+                    raise KeyError(f"unknown or expired hold {hold_id!r}")
+            wanted = flight.layout.mask(seats) if seats is not None else hold.seats
+            taken = wanted & (flight.sold | flight.held & ~hold.seats)
+            if taken:
+                shard.counters["conflicts"] += 1
+                raise AncillaryUnavailable(f"seat {', '.join(flight.layout.labels(taken))} is no longer available")
+            counts = {**hold.items, **items}
+            for key, count in counts.items():
+                if key not in flight.remaining or count < 0:
+                    raise ValueError(f"unknown ancillary {key.replace(':', ' ')!r}")
+                if count - hold.items.get(key, 0) > flight.remaining[key]:
+                    shard.counters["conflicts"] += 1
+                    raise AncillaryUnavailable(f"no {key.split(':')[1]} {key.split(':')[0]} left on this flight")
+            flight.held = flight.held & ~hold.seats | wanted
+            for key, count in counts.items():
+                flight.remaining[key] -= count - hold.items.get(key, 0)
+            hold.seats = wanted
+            hold.items = {key: count for key, count in counts.items() if count}
+            hold.expires = now + self.ttl
+            hold.tick = shard.wheel.schedule(hold.hold_id, hold.expires)
+            if hold_id is None:
+                shard.holds[hold.hold_id] = hold
+                flight.holds += 1
+                shard.counters["holds"] += 1
+            return self._describe(hold, flight.layout, now)
+
+    def release(self, hold_id: str) -> None:
+        shard = self._locate(hold_id)
+        with shard.lock:
+            hold = shard.holds.get(hold_id)
+            if hold is not None:
+                self._drop(shard, hold)
+                shard.counters["released"] += 1
+
+    def confirm(self, hold_id: str, row: int | None = None) -> dict[str, object]:
+        """Turn a live hold into sold seats and consumed allotments.
+
+        With ``row``, a hold taken for any other fare row is refused (``KeyError``) and kept.
+        """
+        shard = self._locate(hold_id)
+        with shard.lock:
+            now = self._clock()
+            self._expire(shard, now)
+            hold = shard.holds.get(hold_id)
+            if hold is None:
+                raise KeyError(f"unknown or expired hold {hold_id!r}")
+            if row is not None and hold.row != row:
+                raise KeyError(f"hold {hold_id!r} is for fare row {hold.row}, not {row}")
+            del shard.holds[hold_id]
+            flight = shard.flights[hold.flight]
+            flight.held &= ~hold.seats
+            flight.sold |= hold.seats
+            flight.holds -= 1
+            flight.confirmed = True
+            shard.counters["confirmed"] += 1
+            return {**self._describe(hold, flight.layout, now), "expires_in": None}
+
+    def sweep(self) -> None:
+        """Turn every shard's wheel; shards otherwise turn on their next access."""
+        now = self._clock()
+        for shard in self._shards:
+            with shard.lock:
+                self._expire(shard, now)
+
+    @staticmethod
+    def _describe(hold: _Hold, layout: SeatLayout, now: float) -> dict[str, object]:
+        return {
+            "hold": hold.hold_id,
+            "row": hold.row,
+            "seats": layout.labels(hold.seats),
+            "meals": {key[5:]: count for key, count in hold.items.items() if key.startswith("meal:")},
+            "bags": {key[4:]: count for key, count in hold.items.items() if key.startswith("bag:")},
+            "expires_in": round(hold.expires - now, 1),
+        }
+
+    def stats(self) -> dict[str, int]:
+        stats = {name: sum(shard.counters[name] for shard in self._shards) for name in COUNTERS}
+        return {**stats, "active": sum(len(shard.holds) for shard in self._shards)}
@@ -0,0 +1,123 @@
+"""Typeahead suggestions for the origin, destination and hotel inputs.
+
+Every searchable form of an entry (IATA code, English and Arabic names and
+each word in them) is normalized into one sorted key list. A prefix lookup is
+two ``bisect`` probes into that list, followed by a popularity top-k over the
+matching slice. Hot prefixes are memoized in an LRU because the lookup fires
+on every keystroke.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+_ARABIC_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه", "ؤ": "و", "ئ": "ي"})
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip diacritics/tashkeel and fold Arabic letter variants."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch) and ch != "ـ")
+    return stripped.translate(_ARABIC_FOLD).strip()
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    kind: str
+    code: str
+    name: str
+    name_ar: str = ""
+    popularity: float = 0.0
+
+
+class PrefixIndex:
+    """Sorted-key prefix index over :class:`Suggestion` entries."""
+
+    def __init__(self, entries: Iterable[Suggestion], cache_size: int = 4096) -> None:
+        self.entries = list(entries)
+        pairs = set()
+        for position, entry in enumerate(self.entries):
+            for text in (entry.code, entry.name, entry.name_ar):
+                key = normalize(text)
+                if not key:
+                    continue
+                pairs.add((key, position))
+                for word in _WORD.findall(key)[1:]:
+                    pairs.add((word, position))
+        ordered = sorted(pairs)
+        self.keys = [key for key, _ in ordered]
+        self.key_entry = np.array([position for _, position in ordered], dtype=np.int64)
+        self.popularity = np.array([entry.popularity for entry in self.entries], dtype=np.float64)
+        self.key_popularity = self.popularity[self.key_entry] if len(self.key_entry) else np.empty(0)
+        self._lookup = lru_cache(maxsize=cache_size)(self._search)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def cache_info(self) -> Any:
+        return self._lookup.cache_info()
+
+    def suggest(self, text: str, limit: int = 8) -> list[Suggestion]:
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        return [self.entries[position] for position in self._lookup(prefix, limit)]
+
+    def resolve(self, text: str) -> Suggestion | None:
+        """The most popular entry whose code or full name is exactly ``text``, if any."""
+        key = normalize(text)
+        if not key:
+            return None
+        lo, hi = bisect_left(self.keys, key), bisect_right(self.keys, key)
+        # Word keys ("riyadh" from "Hilton Riyadh") share the range; keep whole-field hits.
+        entries = (self.entries[position] for position in self.key_entry[lo:hi].tolist())
+        exact = [entry for entry in entries if key in (normalize(entry.code), normalize(entry.name), normalize(entry.name_ar))]
+        return max(exact, key=lambda entry: entry.popularity, default=None)
+
+    def _search(self, prefix: str, limit: int) -> tuple[int, ...]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        if lo == hi:
+            return ()
+        score = self.key_popularity[lo:hi].copy()
+        # Exact key hits (e.g. typing a full IATA code) sort ahead of popularity.
+        score[: bisect_right(self.keys, prefix, lo, hi) - lo] = np.inf
+        # An entry can own several keys under one prefix, so over-fetch before
+        # de-duplicating rather than running ``unique`` over the whole range.
+        wanted = min(len(score), limit * 4)
+        while True:
+            top = np.argpartition(-score, wanted - 1)[:wanted] if wanted < len(score) else np.arange(len(score))
+            top = top[np.lexsort((top, -score[top]))]
+            ranked = list(dict.fromkeys(self.key_entry[lo + top].tolist()))
+            if len(ranked) >= limit or wanted == len(score):
+                return tuple(ranked[:limit])
+            wanted = min(len(score), wanted * 4)
+
+
+def airport_suggestions(cities: Mapping[str, tuple[str, str]], codes: Iterable[str], popularity: Mapping[str, float] | None = None) -> list[Suggestion]:
+    """One entry per airport code, named after its city where known."""
+    popularity = popularity or {}
+    return [
+        Suggestion("airport", code, cities.get(code, (code, ""))[0], cities.get(code, (code, ""))[1], popularity.get(code, 0.0))
+        for code in codes
+    ]
+
+
+def place_suggestions(cities: Mapping[str, tuple[str, str]], hotels: pd.DataFrame, popularity: Mapping[str, float] | None = None) -> list[Suggestion]:
+    """City entries plus one entry per hotel, ranked by star rating."""
+    popularity = popularity or {}
+    places = [Suggestion("city", code, en, ar, 1000.0 + popularity.get(code, 0.0)) for code, (en, ar) in cities.items()]
+    places.extend(
+        Suggestion("hotel", str(hotel_id), name, name_ar, float(stars))
+        for hotel_id, name, name_ar, stars in zip(hotels["hotel_id"], hotels["name"], hotels["name_ar"], hotels["stars"])
+    )
+    return places
@@ -0,0 +1,410 @@
+"""Booking confirmation pipeline replacing the random-failure ``confirmBooking``.
+
+A confirmation runs through four asyncio stages (price re-check, inventory
+hold, payment, ticketing). Each stage has its own bounded queue and worker
+pool, so a slow payment provider fills only the payment queue and pushes
+back on admissions instead of stalling the other stages. Requests carry an
+idempotency key: a retried or duplicated confirmation joins the in-flight
+attempt or replays its result rather than booking again.
+
+Whatever a stage or its compensation raises, the booking is finished and its
+worker keeps serving: a refund or release that fails is recorded on the
+result (``compensation``) for manual follow-up rather than hanging the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Mapping, Protocol
+
+import numpy as np
+
+from .inventory import FareStore
+from .pricing import PricingEngine
+from .wallet import AgentWallets, InsufficientFunds
+
+STAGES = ("price", "hold", "payment", "ticket")
+DEFAULT_WORKERS = {"price": 32, "hold": 32, "payment": 512, "ticket": 64}
+PRICE_TOLERANCE = 0.01
+
+
+class SupplierError(Exception):
+    """A supplier rejected or failed a booking step."""
+
+
+class Overloaded(Exception):
+    """The pipeline's admission queue is full."""
+
+
+@dataclass(frozen=True)
+class BookingRequest:
+    idempotency_key: str
+    row: int
+    passengers: int = 1
+    quoted_total: float = 0.0
+    payment_method: str = "card"
+    agent_id: str | None = None
+    promo_code: str | None = None
+    # Per passenger, when booking a supplier's offer rather than the store fare.
+    fare: float | None = None
+
+
+@dataclass
+class BookingResult:
+    idempotency_key: str
+    status: str
+    amount: float = 0.0
+    ticket: str | None = None
+    error: str | None = None
+    latency: float = 0.0
+    balance: float | None = None
+    balance_alert: str | None = None
+    compensation: list[str] | None = None
+
+    @property
+    def confirmed(self) -> bool:
+        return self.status == "confirmed"
+
+
+class Supplier(Protocol):
+    async def quote(self, request: BookingRequest) -> float: ...
+
+    async def hold(self, request: BookingRequest) -> str: ...
+
+    async def release(self, hold_id: str) -> None: ...
+
+    async def charge(self, request: BookingRequest, amount: float) -> str: ...
+
+    async def refund(self, payment_id: str) -> None: ...
+
+    async def issue(self, request: BookingRequest, hold_id: str) -> str: ...
+
+
+class StubSupplier:
+    """Local supplier backed by a :class:`FareStore`, with configurable latency and failures.
+
+    ``latency`` maps a step name (``quote``, ``hold``, ``charge``, ``refund``,
+    ``issue``) to ``(low, high)`` seconds and ``failures`` maps it to a failure
+    probability. Holds take seats out of the store itself.
+    """
+
+    def __init__(
+        self,
+        store: FareStore,
+        latency: Mapping[str, tuple[float, float]] | None = None,
+        failures: Mapping[str, float] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.store = store
+        self.latency = dict(latency or {})
+        self.failures = dict(failures or {})
+        self._random = random.Random(seed)
+        self._holds: dict[str, tuple[int, int]] = {}
+        self._ids = itertools.count(1)
+
+    async def _step(self, name: str) -> None:
+        low, high = self.latency.get(name, (0.0, 0.0))
+        if high:
+            await asyncio.sleep(self._random.uniform(low, high))
+        if self._random.random() < self.failures.get(name, 0.0):
+            raise SupplierError(f"{name} failed at supplier")
+
+    async def quote(self, request: BookingRequest) -> float:
+        await self._step("quote")
+        fare = self.store.fare[request.row] if request.fare is None else request.fare
+        return float(fare) * request.passengers
+
+    async def hold(self, request: BookingRequest) -> str:
+        await self._step("hold")
+        # No await between the check and the decrement: holds are atomic on the loop.
+        seats = int(self.store.seats[request.row])
+        if seats < request.passengers:
+            raise SupplierError("sold out")
+        self.store.update(request.row, seats=seats - request.passengers)
+        hold_id = f"H{next(self._ids)}"
+        self._holds[hold_id] = (request.row, request.passengers)
+        return hold_id
+
+    async def release(self, hold_id: str) -> None:
+        row, passengers = self._holds.pop(hold_id)
+        self.store.update(row, seats=int(self.store.seats[row]) + passengers)
+
+    async def charge(self, request: BookingRequest, amount: float) -> str:
+        await self._step("charge")
+        return f"P{next(self._ids)}"
+
+    async def refund(self, payment_id: str) -> None:
+        await self._step("refund")
+
+    async def issue(self, request: BookingRequest, hold_id: str) -> str:
+        await self._step("issue")
+        self._holds.pop(hold_id, None)
+        return f"TKT{next(self._ids):010d}"
+
+
+@dataclass
+class _Job:
+    request: BookingRequest
+    future: asyncio.Future
+    started: float
+    amount: float = 0.0
+    hold_id: str | None = None
+    payment_id: str | None = None
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+class BookingPipeline:
+    """Bounded, staged, idempotent booking confirmation."""
+
+    def __init__(
+        self,
+        supplier: Supplier,
+        *,
+        workers: Mapping[str, int] | None = None,
+        queue_size: int = 1024,
+        payment_timeout: float = 15.0,
+        remember: int = 100_000,
+        wallet: AgentWallets | None = None,
+        pricing: PricingEngine | None = None,
+    ) -> None:
+        self.supplier = supplier
+        self.wallet = wallet
+        self.pricing = pricing
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.queue_size = queue_size
+        self.payment_timeout = payment_timeout
+        self.remember = remember
+        self.counters = dict.fromkeys(("submitted", "duplicates", "confirmed", "rejected", "failed", "compensation_failures"), 0)
+        self._queues: dict[str, asyncio.Queue[_Job]] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._inflight: dict[str, _Job] = {}
+        self._done: OrderedDict[str, tuple[BookingRequest, BookingResult]] = OrderedDict()
+        self._handlers: dict[str, Callable[[_Job], Awaitable[str | None]]] = {
+            "price": self._price,
+            "hold": self._hold,
+            "payment": self._payment,
+            "ticket": self._ticket,
+        }
+
+    async def start(self) -> None:
+        for stage in STAGES:
+            self._queues[stage] = asyncio.Queue(self.queue_size)
+        for stage in STAGES:
+            for _ in range(self.workers[stage]):
+                self._tasks.append(asyncio.create_task(self._worker(stage)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def __aenter__(self) -> "BookingPipeline":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+    def _attach(self, request: BookingRequest) -> tuple[_Job | BookingResult, bool]:
+        """Return the existing job/result for a key, or a new job and ``True``."""
+        key = request.idempotency_key
+        known = self._inflight.get(key) or self._done.get(key)
+        if known is not None:
+            seen = known.request if isinstance(known, _Job) else known[0]
+            if seen != request:
+                raise ValueError(f"idempotency key {key!r} was already used for a different booking")
+            self.counters["duplicates"] += 1
+            return (known if isinstance(known, _Job) else known[1]), False
+        job = _Job(request, asyncio.get_running_loop().create_future(), time.perf_counter())
+        self._inflight[key] = job
+        self.counters["submitted"] += 1
+        return job, True
+
+    async def submit(self, request: BookingRequest, *, wait: bool = True) -> BookingResult:
+        """Confirm ``request``; with ``wait=False`` a full admission queue raises :class:`Overloaded`."""
+        job, new = self._attach(request)
+        if isinstance(job, BookingResult):
+            return job
+        if new:
+            queue = self._queues["price"]
+            if wait:
+                await queue.put(job)
+            else:
+                try:
+                    queue.put_nowait(job)
+                except asyncio.QueueFull:
+                    del self._inflight[request.idempotency_key]
+                    self.counters["submitted"] -= 1
+                    raise Overloaded("booking queue is full, retry shortly") from None
+        return await asyncio.shield(job.future)
+
+    async def _worker(self, stage: str) -> None:
+        queue = self._queues[stage]
+        handler = self._handlers[stage]
+        following = STAGES.index(stage) + 1
+        while True:
+            job = await queue.get()
+            try:
+                failure = await handler(job)
+            except Exception as exc:  # noqa: BLE001 - any supplier fault fails this booking only
+                await self._compensate(job)
+                failure = f"failed: {exc}"
+            finally:
+                queue.task_done()
+            try:
+                if failure is not None:
+                    self._finish(job, *failure.split(": ", 1))
+                elif following == len(STAGES):
+                    self._finish(job, "confirmed")
+                else:
+                    await self._queues[STAGES[following]].put(job)
+            except Exception as exc:  # noqa: BLE001 - keep the worker alive; never leave a caller hanging
+                if not job.future.done():
+                    job.future.set_exception(exc)
+                self._inflight.pop(job.request.idempotency_key, None)
+
+    async def _price(self, job: _Job) -> str | None:
+        request = job.request
+        job.amount = await self.supplier.quote(request)
+        if self.pricing is not None:
+            # The supplier quotes the fare; taxes, the handling fee and promos are priced here.
+            try:
+                job.amount = self.pricing.charge(request.row, request.passengers, job.amount / request.passengers, request.promo_code)
+            except KeyError as exc:
+                return f"promo_rejected: {exc.args[0]}"
+        if request.quoted_total and job.amount > request.quoted_total + PRICE_TOLERANCE:
+            return f"price_changed: fare is now {job.amount:.2f}"
+        return None
+
+    async def _hold(self, job: _Job) -> str | None:
+        try:
+            job.hold_id = await self.supplier.hold(job.request)
+        except SupplierError as exc:
+            return f"sold_out: {exc}"
+        return None
+
+    async def _payment(self, job: _Job) -> str | None:
+        if job.request.payment_method == "deposit":
+            return await self._debit(job)
+        try:
+            job.payment_id = await asyncio.wait_for(self.supplier.charge(job.request, job.amount), self.payment_timeout)
+        except (SupplierError, asyncio.TimeoutError) as exc:
+            await self._compensate(job)
+            return f"payment_failed: {str(exc) or 'payment timed out'}"
+        return None
+
+    async def _debit(self, job: _Job) -> str | None:
+        request = job.request
+        if self.wallet is None or request.agent_id not in self.wallet:
+            await self._compensate(job)
+            return "payment_failed: deposit payment needs an agent wallet"
+        try:
+            entry = self.wallet.debit(request.agent_id, job.amount, reference=request.idempotency_key)
+        except InsufficientFunds as exc:
+            await self._compensate(job)
+            job.extra["balance"] = self.wallet.balance(request.agent_id)
+            return f"insufficient_funds: {exc}"
+        job.extra["debit"] = entry
+        job.extra["balance"] = entry.balance / 100
+        job.extra["balance_alert"] = entry.crossed
+        return None
+
+    async def _ticket(self, job: _Job) -> str | None:
+        job.extra["ticket"] = await self.supplier.issue(job.request, job.hold_id)
+        return None
+
+    async def _compensate(self, job: _Job) -> None:
+        """Undo the debit, payment and hold; each step runs even if an earlier one fails, and none raises."""
+        debit = job.extra.pop("debit", None)
+        if debit is not None:
+            try:
+                entry = self.wallet.refund(debit.agent_id, -debit.amount / 100, reference=job.request.idempotency_key)
+            except Exception as exc:  # noqa: BLE001
+                self._compensation_failed(job, f"wallet refund of {debit.amount / 100:.2f} to {debit.agent_id}", exc)
+            else:
+                job.extra["balance"] = entry.balance / 100
+                job.extra["balance_alert"] = entry.crossed
+        if job.payment_id is not None:
+            try:
+                await self.supplier.refund(job.payment_id)
+            except Exception as exc:  # noqa: BLE001
+                self._compensation_failed(job, f"refund of payment {job.payment_id}", exc)
+            job.payment_id = None
+        if job.hold_id is not None:
+            try:
+                await self.supplier.release(job.hold_id)
+            except Exception as exc:  # noqa: BLE001
+                self._compensation_failed(job, f"release of hold {job.hold_id}", exc)
+            job.hold_id = None
+
+    def _compensation_failed(self, job: _Job, step: str, exc: Exception) -> None:
+        job.extra.setdefault("compensation", []).append(f"{step} failed: {exc}")
+        self.counters["compensation_failures"] += 1
+
+    def _finish(self, job: _Job, status: str, error: str | None = None) -> None:
+        key = job.request.idempotency_key
+        result = BookingResult(
+            key,
+            status,
+            job.amount,
+            job.extra.get("ticket"),
+            error,
+            time.perf_counter() - job.started,
+            job.extra.get("balance"),
+            job.extra.get("balance_alert"),
+            job.extra.get("compensation"),
+        )
+        self.counters["confirmed" if status == "confirmed" else "failed" if status == "failed" else "rejected"] += 1
+        self._inflight.pop(key, None)
+        self._done[key] = (job.request, result)
+        while len(self._done) > self.remember:
+            self._done.popitem(last=False)
+        if not job.future.done():
+            job.future.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        return dict(self.counters, inflight=len(self._inflight), queued={stage: queue.qsize() for stage, queue in self._queues.items()})
+
+
+class PipelineThread:
+    """Runs a :class:`BookingPipeline` on its own event loop for synchronous callers (e.g. WSGI)."""
+
+    def __init__(self, pipeline: BookingPipeline) -> None:
+        self.pipeline = pipeline
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="booking-pipeline", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(pipeline.start(), self.loop).result()
+
+    def submit(self, request: BookingRequest, timeout: float = 30.0) -> BookingResult:
+        """Confirm ``request``, raising :class:`TimeoutError` if it is still in flight after ``timeout`` seconds.
+
+        Only the wait is abandoned: the booking carries on, and resubmitting the
+        same idempotency key picks up its result.
+        """
+        waiter = asyncio.run_coroutine_threadsafe(self.pipeline.submit(request, wait=False), self.loop)
+        try:
+            return waiter.result(timeout)
+        except concurrent.futures.TimeoutError:
+            waiter.cancel()
+            raise TimeoutError(f"booking {request.idempotency_key!r} is still in flight") from None
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.pipeline.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def latency_summary(results: list[BookingResult]) -> dict[str, float]:
+    latencies = np.array([result.latency for result in results]) * 1000
+    if not len(latencies):
+        return {}
+    return {f"p{q}": float(np.percentile(latencies, q)) for q in (50, 90, 99)} | {"max": float(latencies.max())}
@@ -0,0 +1,341 @@
+"""Search result caching with TTLs and fare-change invalidation.
+
+:class:`ResultCache` is an in-process LRU whose entries expire after a TTL and
+carry tags; an optional shared tier (anything implementing :class:`SharedTier`,
+e.g. a Redis adapter, or :class:`LocalSharedTier` in development) sits behind
+it. :class:`CachedFareSearch` keys flight searches by the normalized
+:class:`FlightQuery` and tags them with every ``(origin, destination, day)``
+they read, so a fare or seat change drops only the searches it can affect.
+
+The shared tier only ever sees :func:`encode_entry` payloads: a JSON header
+plus ``np.save`` blobs written and read with ``allow_pickle=False``, so bytes
+from another process can never run code here. Every invalidation stamps its
+tags with a new epoch; a value computed (or fetched from the shared tier)
+before a stamp on one of its tags is returned to the caller but not cached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Protocol
+
+import numpy as np
+
+from .inventory import FareStore, FlightQuery, ResultSet, SearchResponse, to_day
+
+Tag = Hashable
+SWEEP_EVERY = 1024
+
+
+def _plain(value: Any, arrays: list[np.ndarray]) -> Any:
+    if isinstance(value, np.ndarray):
+        arrays.append(value)
+        return {"array": len(arrays) - 1}
+    if isinstance(value, (tuple, list)):
+        return {"tuple" if isinstance(value, tuple) else "list": [_plain(item, arrays) for item in value]}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"cannot share a {type(value).__name__} through the cache")
+
+
+def _restore(value: Any, arrays: list[np.ndarray]) -> Any:
+    if isinstance(value, dict):
+        if "array" in value:
+            return arrays[value["array"]]
+        if "tuple" in value:
+            return tuple(_restore(item, arrays) for item in value["tuple"])
+        return [_restore(item, arrays) for item in value["list"]]
+    return value
+
+
+def encode_entry(value: Any, tags: tuple[Tag, ...]) -> bytes:
+    """Serialize ``(value, tags)`` made of arrays, tuples, lists and JSON scalars."""
+    arrays: list[np.ndarray] = []
+    header = json.dumps([_plain(value, arrays), _plain(tags, arrays)]).encode("utf-8")
+    buffer = io.BytesIO()
+    buffer.write(len(header).to_bytes(4, "little") + header)
+    for array in arrays:
+        np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_entry(payload: bytes) -> tuple[Any, tuple[Tag, ...]]:
+    """Inverse of :func:`encode_entry`; raises ``ValueError`` on anything else."""
+    try:
+        size = int.from_bytes(payload[:4], "little")
+        value, tags = json.loads(payload[4 : 4 + size].decode("utf-8"))
+        buffer = io.BytesIO(payload[4 + size :])
+        arrays = []
+        while buffer.tell() < len(payload) - 4 - size:
+            arrays.append(np.load(buffer, allow_pickle=False))
+        return _restore(value, arrays), _restore(tags, arrays)
+    except (KeyError, IndexError, TypeError, UnicodeDecodeError, EOFError) as exc:
+        raise ValueError(f"malformed shared cache entry: {exc}") from None
+
+
+class SharedTier(Protocol):
+    """Byte-level cache shared between processes."""
+
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[Tag]) -> None: ...
+
+    def invalidate(self, tags: Iterable[Tag]) -> int: ...
+
+
+class LocalSharedTier:
+    """In-memory stand-in for a shared cache server, with tag sets and expiry."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values: dict[str, tuple[float, bytes, tuple[Tag, ...]]] = {}
+        self._tags: dict[Tag, set[str]] = {}
+        self._writes = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _discard(self, key: str) -> bool:
+        item = self._values.pop(key, None)
+        if item is None:
+            return False
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def _sweep(self) -> None:
+        now = self._clock()
+        for key in [key for key, item in self._values.items() if item[0] <= now]:
+            self._discard(key)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                return None
+            if item[0] <= self._clock():
+                self._discard(key)
+                return None
+            return item[1]
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[Tag]) -> None:
+        with self._lock:
+            self._discard(key)
+            # Entries nobody reads again would otherwise pin their tag sets forever.
+            self._writes += 1
+            if self._writes % SWEEP_EVERY == 0:
+                self._sweep()
+            tags = tuple(tags)
+            self._values[key] = (self._clock() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tags: Iterable[Tag]) -> int:
+        with self._lock:
+            keys = set().union(*(self._tags.get(tag, ()) for tag in tags))
+            return sum(self._discard(key) for key in keys)
+
+
+class ResultCache:
+    """Tagged LRU with per-entry TTL in front of an optional :class:`SharedTier`."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: float = 300.0,
+        shared: SharedTier | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any, tuple[Tag, ...]]] = OrderedDict()
+        self._tags: dict[Tag, set[Hashable]] = {}
+        # Invalidation epochs: the last epoch each tag was invalidated in, kept
+        # only while a lookup that started before it may still store a value.
+        self._epoch = 0
+        self._stamps: dict[Tag, int] = {}
+        self._pending: Counter[int] = Counter()
+        self.counters = dict.fromkeys(
+            ("hits", "shared_hits", "misses", "evictions", "expirations", "invalidations", "stale_puts", "bad_payloads"), 0
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def shared_key(key: Hashable) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def _drop(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _store(self, key: Hashable, value: Any, tags: tuple[Tag, ...], expires: float) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _begin(self) -> int:
+        with self._lock:
+            self._pending[self._epoch] += 1
+            return self._epoch
+
+    def _end(self, epoch: int) -> None:
+        with self._lock:
+            self._pending[epoch] -= 1
+            if not self._pending[epoch]:
+                del self._pending[epoch]
+            oldest = min(self._pending, default=self._epoch)
+            if oldest == self._epoch:
+                self._stamps.clear()
+            elif self._stamps:
+                self._stamps = {tag: stamp for tag, stamp in self._stamps.items() if stamp > oldest}
+
+    def _stale(self, tags: tuple[Tag, ...], since: int) -> bool:
+        return any(self._stamps.get(tag, -1) > since for tag in tags)
+
+    def _lookup(self, key: Hashable, since: int) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[1]
+                self._drop(key)
+                self.counters["expirations"] += 1
+        if self.shared is not None:
+            payload = self.shared.get(self.shared_key(key))
+            if payload is not None:
+                try:
+                    value, tags = decode_entry(payload)
+                except ValueError:
+                    with self._lock:
+                        self.counters["bad_payloads"] += 1
+                else:
+                    with self._lock:
+                        self.counters["shared_hits"] += 1
+                        if not self._stale(tags, since):
+                            self._store(key, value, tags, self._clock() + self.ttl)
+                    return value
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def _put(self, key: Hashable, value: Any, tags: tuple[Tag, ...], since: int) -> None:
+        with self._lock:
+            if self._stale(tags, since):
+                # An invalidation landed while the value was being computed.
+                self.counters["stale_puts"] += 1
+                return
+            self._store(key, value, tags, self._clock() + self.ttl)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), encode_entry(value, tags), self.ttl, tags)
+
+    def get(self, key: Hashable) -> Any | None:
+        since = self._begin()
+        try:
+            return self._lookup(key, since)
+        finally:
+            self._end(since)
+
+    def put(self, key: Hashable, value: Any, tags: Iterable[Tag] = ()) -> None:
+        since = self._begin()
+        try:
+            self._put(key, value, tuple(tags), since)
+        finally:
+            self._end(since)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], tags: Iterable[Tag] = ()) -> Any:
+        """Cached value for ``key``, else ``compute()`` stored unless its tags were invalidated meanwhile."""
+        since = self._begin()
+        try:
+            value = self._lookup(key, since)
+            if value is None:
+                value = compute()
+                self._put(key, value, tuple(tags), since)
+            return value
+        finally:
+            self._end(since)
+
+    def invalidate(self, tags: Iterable[Tag]) -> int:
+        """Drop every entry carrying any of ``tags`` from both tiers."""
+        tags = list(tags)
+        with self._lock:
+            self._epoch += 1
+            if self._pending:
+                self._stamps.update(dict.fromkeys(tags, self._epoch))
+            keys = set().union(*(self._tags.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._drop(key)
+            self.counters["invalidations"] += len(keys)
+        if self.shared is not None:
+            self.shared.invalidate(tags)
+        return len(keys)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats: dict[str, Any] = dict(self.counters, entries=len(self._entries), max_entries=self.max_entries)
+        lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+class CachedFareSearch:
+    """:meth:`FareStore.search` behind a :class:`ResultCache`, invalidated by store updates."""
+
+    def __init__(self, store: FareStore, cache: ResultCache | None = None) -> None:
+        self.store = store
+        self.cache = cache if cache is not None else ResultCache()
+        store.subscribe(self._on_update)
+
+    @staticmethod
+    def tags(query: FlightQuery) -> list[Tag]:
+        centre = to_day(query.departure)
+        days = range(centre - query.flex_days, centre + query.flex_days + 1)
+        tags: list[Tag] = [(query.origin, query.destination, day) for day in days]
+        if query.return_date is not None:
+            back = to_day(query.return_date)
+            tags.extend((query.destination, query.origin, day) for day in range(back - query.flex_days, back + query.flex_days + 1))
+        return tags
+
+    def search(self, query: FlightQuery) -> SearchResponse:
+        # Cache row positions only, so the shared tier carries plain arrays, never the store.
+        outbound, inbound = self.cache.get_or_compute(query, lambda: self._rows(query), self.tags(query))
+        return SearchResponse(
+            ResultSet(self.store, outbound, query.passengers),
+            None if inbound is None else ResultSet(self.store, inbound, query.passengers),
+        )
+
+    def _rows(self, query: FlightQuery) -> tuple[np.ndarray, np.ndarray | None]:
+        response = self.store.search(query)
+        return response.outbound.rows, None if response.inbound is None else response.inbound.rows
+
+    def _on_update(self, rows: np.ndarray, old_fares: np.ndarray) -> None:
+        store = self.store
+        airports = np.asarray(store.airports)
+        changed = set(zip(airports[store.origin[rows]].tolist(), airports[store.destination[rows]].tolist(), store.day[rows].tolist()))
+        self.cache.invalidate(changed)
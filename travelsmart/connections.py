@@ -0,0 +1,229 @@
+"""Connection building for 1–2 stop and multi-city itineraries.
+
+The schedule is treated as a time-dependent graph whose edges are the fare
+rows of the store. :class:`ConnectionPlanner` runs a bounded Connection Scan
+over the rows departing in a short window: connections are visited once in
+departure order, labels are kept per ``(legs taken, airport)``, and a label only
+becomes usable for onward connections once its arrival plus the airport's
+minimum connection time has passed. That makes both "cheapest" and "fastest"
+exact for a fixed leg budget in a single pass.
+
+The leg budget counts stops, not rows: a fare row that itself makes an
+intermediate stop uses ``1 + stops`` of it. Only the first leg is held to the
+requested day; onward legs may depart anywhere in the 36h horizon.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from .inventory import CABINS, FareStore, parse_date, to_day
+
+DEFAULT_MCT = 60
+MCT_MINUTES = {"DXB": 75, "DOH": 60, "IST": 75, "LHR": 90, "CDG": 90, "FRA": 60, "JFK": 120}
+HORIZON_MINUTES = 36 * 60
+
+
+@dataclass(frozen=True)
+class Itinerary:
+    """One journey as store rows, in travel order."""
+
+    rows: tuple[int, ...]
+    fare: float
+    departure: int
+    arrival: int
+    segment_stops: int = 0
+
+    @property
+    def stops(self) -> int:
+        """Connections between rows plus the intermediate stops the rows make themselves."""
+        return len(self.rows) - 1 + self.segment_stops
+
+    @property
+    def duration(self) -> int:
+        return self.arrival - self.departure
+
+
+@dataclass(frozen=True)
+class Leg:
+    origin: str
+    destination: str
+    departure: dt.date
+
+
+def parse_legs(value: str) -> list[Leg]:
+    """``RUH:LHR:2026-11-20,LHR:JFK:2026-11-23`` as legs, in travel order."""
+    legs = []
+    for part in filter(None, value.split(",")):
+        fields = part.split(":")
+        if len(fields) != 3 or not all(text.strip() for text in fields):
+            raise ValueError(f"leg {part!r} must be ORIGIN:DESTINATION:YYYY-MM-DD")
+        origin, destination, departure = (text.strip() for text in fields)
+        try:
+            day = parse_date(departure)
+        except ValueError:
+            raise ValueError(f"leg {part!r} has an invalid date {departure!r}") from None
+        legs.append(Leg(origin.upper(), destination.upper(), day))
+    if not legs:
+        raise ValueError("legs must list at least one ORIGIN:DESTINATION:YYYY-MM-DD leg")
+    return legs
+
+
+@dataclass
+class _Label:
+    arrival: int
+    value: float
+    row: int
+    parent: "_Label | None" = field(default=None, repr=False)
+
+
+class ConnectionPlanner:
+    """Connection Scan over a :class:`FareStore` with minimum-connection-time rules."""
+
+    def __init__(self, store: FareStore, mct: Mapping[str, int] | None = None, default_mct: int = DEFAULT_MCT) -> None:
+        self.store = store
+        rules = MCT_MINUTES if mct is None else mct
+        self.mct = np.full(len(store.airports), default_mct, dtype=np.int64)
+        for code, minutes in rules.items():
+            airport = store.airport_id(code)
+            if airport is not None:
+                self.mct[airport] = minutes
+        # Timetable order: every store row by absolute departure minute.
+        departure = store.day.astype(np.int64) * 1440 + store.minute
+        self.order = np.argsort(departure, kind="stable")
+        self.departure = departure[self.order]
+
+    def _window(self, start: int, passengers: int, cabin: str) -> np.ndarray:
+        lo = np.searchsorted(self.departure, start, side="left")
+        hi = np.searchsorted(self.departure, start + HORIZON_MINUTES, side="right")
+        rows = self.order[lo:hi]
+        store = self.store
+        keep = (store.seats[rows] >= passengers) & (store.cabin[rows] == CABINS.index(cabin))
+        rows = rows[keep]
+        arrival = self.departure[lo:hi][keep] + store.duration[rows]
+        return rows[arrival <= start + HORIZON_MINUTES]
+
+    def _scan(
+        self, origin: int, destination: int, start: int, board_until: int, rows: np.ndarray, max_legs: int, objective: str
+    ) -> Itinerary | None:
+        """Single departure-ordered pass keeping one ready label per ``(legs, airport)``.
+
+        ``legs`` counts segments flown, a row with its own stops counting as
+        several; the first row must depart before ``board_until``.
+
+        ``objective`` is ``"cheapest"`` (label value = fare so far) or
+        ``"fastest"`` (label value = negated first departure, so the latest
+        feasible start wins and duration is minimized).
+        """
+        store = self.store
+        n_air = len(store.airports)
+        mct = self.mct.tolist()
+        ready: list[list[_Label | None]] = [[None] * n_air for _ in range(max_legs)]
+        pending: list[list[list[tuple[int, int, _Label]]]] = [[[] for _ in range(n_air)] for _ in range(max_legs)]
+        ready[0][origin] = _Label(start, 0.0, -1)
+        cheapest = objective == "cheapest"
+        best: _Label | None = None
+        best_score = float("inf")
+        tie = 0
+
+        for row, source, target, dep, duration, fare, row_stops in zip(
+            rows.tolist(),
+            store.origin[rows].tolist(),
+            store.destination[rows].tolist(),
+            (store.day[rows].astype(np.int64) * 1440 + store.minute[rows]).tolist(),
+            store.duration[rows].tolist(),
+            store.fare[rows].tolist(),
+            store.stops[rows].tolist(),
+        ):
+            arrival = dep + duration
+            for legs in range(max_legs):
+                taken = legs + 1 + row_stops
+                if taken > max_legs or (not legs and dep >= board_until):
+                    continue
+                queue = pending[legs][source]
+                # Promote labels whose connection window has opened by now.
+                while queue and queue[0][0] + mct[source] <= dep:
+                    _, _, label = heapq.heappop(queue)
+                    current = ready[legs][source]
+                    if current is None or label.value < current.value:
+                        ready[legs][source] = label
+                label = ready[legs][source]
+                if label is None:
+                    continue
+                if taken == max_legs and target != destination:
+                    continue
+                value = label.value + fare if cheapest else (label.value if legs else -dep)
+                # Fares and elapsed time only grow along a journey, so
+                # anything already worse than the best arrival is pruned.
+                score = value if cheapest else arrival + value
+                if score >= best_score:
+                    continue
+                new = _Label(arrival, value, row, label if legs else None)
+                if target == destination:
+                    best, best_score = new, score
+                elif taken < max_legs and target != origin:
+                    tie += 1
+                    heapq.heappush(pending[taken][target], (arrival, tie, new))
+
+        if best is None:
+            return None
+        legs_taken: list[int] = []
+        label: _Label | None = best
+        while label is not None:
+            legs_taken.append(label.row)
+            label = label.parent
+        legs_taken.reverse()
+        first, last = legs_taken[0], legs_taken[-1]
+        departure = int(store.day[first]) * 1440 + int(store.minute[first])
+        return Itinerary(
+            rows=tuple(legs_taken),
+            fare=float(store.fare[list(legs_taken)].sum()),
+            departure=departure,
+            arrival=int(store.day[last]) * 1440 + int(store.minute[last]) + int(store.duration[last]),
+            segment_stops=int(store.stops[list(legs_taken)].sum()),
+        )
+
+    def plan(
+        self,
+        origin: str,
+        destination: str,
+        day: dt.date,
+        *,
+        max_stops: int = 2,
+        passengers: int = 1,
+        cabin: str = "Economy",
+        earliest: int | None = None,
+        objectives: Sequence[str] = ("cheapest", "fastest"),
+    ) -> dict[str, Itinerary | None]:
+        """Return the cheapest and fastest itineraries with at most ``max_stops`` connections.
+
+        ``earliest`` (absolute minutes) holds departures back, e.g. until a
+        previous multi-city leg has landed and cleared its connection time.
+        The first leg always boards on ``day``; connections may run past it.
+        """
+        o, d = self.store.airport_id(origin.upper()), self.store.airport_id(destination.upper())
+        if o is None or d is None or o == d:
+            return {objective: None for objective in objectives}
+        day_start = to_day(day) * 1440
+        start = max(day_start, earliest or 0)
+        rows = self._window(start, passengers, cabin)
+        return {
+            objective: self._scan(o, d, start, day_start + 1440, rows, max_stops + 1, objective)
+            for objective in objectives
+        }
+
+    def multi_city(self, legs: Sequence[Leg], *, objective: str = "cheapest", **options: Any) -> list[Itinerary | None]:
+        """Plan each leg in turn, never departing before the previous leg connects."""
+        plans: list[Itinerary | None] = []
+        earliest = None
+        for leg in legs:
+            itinerary = self.plan(leg.origin, leg.destination, leg.departure, earliest=earliest, objectives=(objective,), **options)[objective]
+            plans.append(itinerary)
+            if itinerary is not None:
+                earliest = itinerary.arrival + int(self.mct[self.store.destination[itinerary.rows[-1]]])
+        return plans
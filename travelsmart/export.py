@@ -0,0 +1,185 @@
+"""Streaming CSV and XLSX export of result sets for ``#download-excel-btn``.
+
+Both writers consume an iterator of row-chunk frames and yield encoded bytes
+as each chunk is produced, so memory stays bounded by the chunk size rather
+than the result size. XLSX is written as a streamed zip (data descriptors, no
+seeking) with inline strings, so no spreadsheet library is needed.
+"""
+
+from __future__ import annotations
+
+import zipfile
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from .hotels import HotelResults
+from .inventory import ResultSet
+
+CHUNK_ROWS = 50_000
+
+FLIGHT_COLUMNS = {
+    "carrier": "Airline",
+    "flight_number": "Flight",
+    "origin": "From",
+    "destination": "To",
+    "departure": "Depart",
+    "arrival": "Arrive",
+    "stops": "Stops",
+    "cabin": "Cabin",
+    "price": "Price",
+}
+
+
+def flight_frames(
+    result: ResultSet,
+    positions: np.ndarray | None = None,
+    prices: np.ndarray | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Yield export-ready frames of ``chunk_rows`` rows from ``result``.
+
+    ``positions`` selects rows of the result (e.g. those visible after
+    filtering) and ``prices`` the displayed price for each of them.
+    """
+    if positions is None:
+        positions = np.arange(len(result))
+    # At least one (possibly empty) chunk, so an empty export still has its header row.
+    for start in range(0, max(len(positions), 1), chunk_rows):
+        chunk = positions[start:start + chunk_rows]
+        frame = result.take(chunk).to_frame()
+        frame["price"] = frame["total"] if prices is None else prices[start:start + chunk_rows]
+        for column in ("departure", "arrival"):
+            frame[column] = np.datetime_as_string(frame[column].to_numpy(), unit="m")
+        yield frame[list(FLIGHT_COLUMNS)].rename(columns=FLIGHT_COLUMNS)
+
+
+HOTEL_COLUMNS = {
+    "name": "Hotel",
+    "city": "City",
+    "stars": "Stars",
+    "check_in": "Check-in",
+    "check_out": "Check-out",
+    "rooms": "Rooms",
+    "price": "Price",
+}
+
+
+def hotel_frames(
+    result: HotelResults,
+    positions: np.ndarray | None = None,
+    prices: np.ndarray | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Hotel counterpart of :func:`flight_frames`."""
+    if positions is None:
+        positions = np.arange(len(result))
+    for start in range(0, max(len(positions), 1), chunk_rows):
+        frame = result.take(positions[start:start + chunk_rows]).to_frame()
+        frame["price"] = frame["total"] if prices is None else prices[start:start + chunk_rows]
+        yield frame[list(HOTEL_COLUMNS)].rename(columns=HOTEL_COLUMNS)
+
+
+def iter_csv(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class _Sink:
+    """Write-only buffer the streamed zip writes into and the generator drains."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def _string_cells(values: Iterable[str]) -> pd.Series:
+    text = pd.Series(list(values), dtype=object).astype(str)
+    escaped = text.str.replace("&", "&amp;").str.replace("<", "&lt;").str.replace(">", "&gt;")
+    return '<c t="inlineStr"><is><t>' + escaped + "</t></is></c>"
+
+
+def _sheet_rows(frame: pd.DataFrame) -> str:
+    """Render ``frame`` as ``<row>`` elements, one vectorized column at a time."""
+    cells = None
+    for name in frame.columns:
+        column = frame[name]
+        if pd.api.types.is_numeric_dtype(column):
+            rendered = "<c><v>" + column.astype(str) + "</v></c>"
+        else:
+            rendered = _string_cells(column)
+        rendered = rendered.reset_index(drop=True)
+        cells = rendered if cells is None else cells + rendered
+    if cells is None:
+        return ""
+    return "".join(("<row>" + cells + "</row>").tolist())
+
+
+def iter_xlsx(frames: Iterable[pd.DataFrame], sheet_name: str = "Results") -> Iterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name, {'"': "&quot;"})))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield sink.drain()
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode("utf-8"))
+            header = True
+            for frame in frames:
+                if header:
+                    sheet.write(("<row>" + "".join(_string_cells(frame.columns)) + "</row>").encode("utf-8"))
+                    header = False
+                sheet.write(_sheet_rows(frame).encode("utf-8"))
+                yield sink.drain()
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+    yield sink.drain()
@@ -0,0 +1,78 @@
+"""Cheapest-fare-per-day cube behind ``renderFareCalendar``.
+
+The cube is a dense ``(cabin, route, day)`` array of daily minimum fares built
+in one group-by pass over the store. Calendar reads are plain slices of it;
+fare changes reported by :meth:`FareStore.update` only recompute the cells
+they touch.
+"""
+
+from __future__ import annotations
+
+import calendar
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from .inventory import CABINS, FareStore, from_day, to_day
+
+
+class FareCalendar:
+    """Precomputed daily-minimum fares for every route in a :class:`FareStore`."""
+
+    def __init__(self, store: FareStore) -> None:
+        self.store = store
+        self.first_day = int(store.day.min()) if len(store) else 0
+        self.days = int(store.day.max()) - self.first_day + 1 if len(store) else 0
+        # Only routes that exist in the store get a row of the cube.
+        self.routes = np.unique(store.key_route(store.key))
+        self.cube = np.full((len(CABINS), len(self.routes), self.days), np.inf)
+
+        available = store.seats > 0
+        routes = np.searchsorted(self.routes, store.key_route(store.key[available]))
+        cells = self._cells(store.cabin[available], routes, store.day[available])
+        cheapest = pd.Series(store.fare[available]).groupby(cells).min()
+        self.cube.reshape(-1)[cheapest.index.to_numpy()] = cheapest.to_numpy()
+        store.subscribe(self._on_update)
+
+    def _route_index(self, origin: str, destination: str) -> int | None:
+        o, d = self.store.airport_id(origin.upper()), self.store.airport_id(destination.upper())
+        if o is None or d is None:
+            return None
+        route = int(self.store.route_id(o, d))
+        index = int(np.searchsorted(self.routes, route))
+        return index if index < len(self.routes) and self.routes[index] == route else None
+
+    def _cells(self, cabin: np.ndarray, route: np.ndarray, day: np.ndarray) -> np.ndarray:
+        n_routes = self.cube.shape[1]
+        return (cabin.astype(np.int64) * n_routes + route) * self.days + (day.astype(np.int64) - self.first_day)
+
+    def _on_update(self, rows: np.ndarray, old_fares: np.ndarray) -> None:
+        store = self.store
+        for key in np.unique(store.key[rows]):
+            span = store.key_slice(int(key))
+            fares = np.where(store.seats[span] > 0, store.fare[span], np.inf)
+            daily = np.full(len(CABINS), np.inf)
+            np.minimum.at(daily, store.cabin[span], fares)
+            route = int(np.searchsorted(self.routes, store.key_route(key)))
+            self.cube[:, route, int(store.day[span.start]) - self.first_day] = daily
+
+    def range(self, origin: str, destination: str, first: dt.date, last: dt.date, cabin: str = "Economy") -> list[tuple[dt.date, float | None]]:
+        """Cheapest fare for each day in ``[first, last]``; ``None`` where nothing is on sale."""
+        route = self._route_index(origin, destination)
+        lo, hi = to_day(first) - self.first_day, to_day(last) - self.first_day + 1
+        fares = np.full(max(hi - lo, 0), np.inf)
+        clip_lo, clip_hi = max(lo, 0), min(hi, self.days)
+        if route is not None and clip_lo < clip_hi:
+            fares[clip_lo - lo:clip_hi - lo] = self.cube[CABINS.index(cabin), route, clip_lo:clip_hi]
+        start = to_day(first)
+        return [(from_day(start + i), None if np.isinf(f) else float(f)) for i, f in enumerate(fares)]
+
+    def around(self, origin: str, destination: str, day: dt.date, days: int = 3, cabin: str = "Economy") -> list[tuple[dt.date, float | None]]:
+        """Cheapest fare for ``day`` ± ``days``."""
+        delta = dt.timedelta(days=days)
+        return self.range(origin, destination, day - delta, day + delta, cabin)
+
+    def month(self, origin: str, destination: str, year: int, month: int, cabin: str = "Economy") -> list[tuple[dt.date, float | None]]:
+        last = calendar.monthrange(year, month)[1]
+        return self.range(origin, destination, dt.date(year, month, 1), dt.date(year, month, last), cabin)
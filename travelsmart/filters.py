@@ -0,0 +1,139 @@
+"""Incremental result filtering for the results sidebar.
+
+A :class:`ResultFilter` keeps the full column set of one search and one
+boolean mask per active filter. Changing a filter recomputes only that mask
+and ANDs it with the cached others, and the caller gets back the rows that
+appeared and disappeared rather than the whole list.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+HANDLING_FEE = 25.0
+
+
+@dataclass
+class FilterDelta:
+    """Rows (positions in the cached result set) that changed visibility."""
+
+    added: np.ndarray
+    removed: np.ndarray
+    count: int
+
+
+class ResultFilter:
+    """Boolean-mask filters over the cached columns of one result set."""
+
+    def __init__(self, columns: Mapping[str, Any], *, price: str = "total", handling_fee: float = HANDLING_FEE) -> None:
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        self.base_price = price
+        self.handling_fee = handling_fee
+        # Fee-inclusive prices are a column of their own so the toggle only
+        # swaps which column the price filter and the cards read.
+        self.columns["price_with_fee"] = self.columns[price] + handling_fee
+        self.include_fees = True
+        self.size = len(self.columns[price])
+        self.visible = np.ones(self.size, dtype=bool)
+        self._masks: dict[str, np.ndarray] = {}
+        self._price_range: tuple[float | None, float | None] = (None, None)
+
+    def __len__(self) -> int:
+        return int(self.visible.sum())
+
+    @property
+    def price_column(self) -> str:
+        return "price_with_fee" if self.include_fees else self.base_price
+
+    def prices(self, rows: np.ndarray | None = None) -> np.ndarray:
+        prices = self.columns[self.price_column]
+        return prices if rows is None else prices[rows]
+
+    def rows(self) -> np.ndarray:
+        return np.flatnonzero(self.visible)
+
+    def _set(self, name: str, mask: np.ndarray | None) -> FilterDelta:
+        if mask is None:
+            self._masks.pop(name, None)
+        else:
+            self._masks[name] = mask
+        before = self.visible
+        if self._masks:
+            self.visible = np.logical_and.reduce(list(self._masks.values()))
+        else:
+            self.visible = np.ones(self.size, dtype=bool)
+        return self.delta_since(before)
+
+    def delta_since(self, before: np.ndarray) -> FilterDelta:
+        """Compare the current visibility with an earlier copy of :attr:`visible`."""
+        return FilterDelta(
+            added=np.flatnonzero(self.visible & ~before),
+            removed=np.flatnonzero(before & ~self.visible),
+            count=int(self.visible.sum()),
+        )
+
+    def price_range(self, low: float | None = None, high: float | None = None) -> FilterDelta:
+        """Keep rows whose displayed price lies in ``[low, high]``."""
+        self._price_range = (low, high)
+        if low is None and high is None:
+            return self._set("price", None)
+        prices = self.prices()
+        mask = np.ones(self.size, dtype=bool)
+        if low is not None:
+            mask &= prices >= low
+        if high is not None:
+            mask &= prices <= high
+        return self._set("price", mask)
+
+    def one_of(self, column: str, values: Iterable[Any] | None) -> FilterDelta:
+        """Keep rows whose ``column`` is in ``values``; ``None`` clears the filter."""
+        if values is None:
+            return self._set(column, None)
+        return self._set(column, np.isin(self.columns[column], list(values)))
+
+    def at_least(self, column: str, minimum: float | None) -> FilterDelta:
+        if minimum is None:
+            return self._set(column, None)
+        return self._set(column, self.columns[column] >= minimum)
+
+    def show_fees(self, include: bool) -> FilterDelta:
+        """Switch displayed prices to/from the fee-inclusive column."""
+        self.include_fees = include
+        return self.price_range(*self._price_range)
+
+    def reprice(self, prices: np.ndarray) -> FilterDelta:
+        """Replace the fee-exclusive price column (e.g. with a promo applied) and re-apply the price filter."""
+        self.columns[self.base_price] = np.asarray(prices)
+        self.columns["price_with_fee"] = self.columns[self.base_price] + self.handling_fee
+        return self.price_range(*self._price_range)
+
+
+class FilterSessions:
+    """Bounded LRU of live :class:`ResultFilter` objects keyed by session token."""
+
+    def __init__(self, max_sessions: int = 1024) -> None:
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, tuple[ResultFilter, Any]] = OrderedDict()
+
+    def open(self, result_filter: ResultFilter, payload: Any = None) -> str:
+        """Register a filter (plus whatever the caller needs to render rows) and return its token."""
+        token = uuid.uuid4().hex
+        self._sessions[token] = (result_filter, payload)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return token
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, token: str) -> tuple[ResultFilter, Any]:
+        try:
+            self._sessions.move_to_end(token)
+            return self._sessions[token]
+        except KeyError:
+            raise KeyError(f"unknown or expired result session {token!r}") from None
@@ -0,0 +1,168 @@
+"""Hotel availability behind ``#hotel-search-form``.
+
+Inventory is a dense ``(property, night)`` matrix of rooms left plus a
+per-property prefix sum of nightly rates. Properties are grouped by city, so
+a city search reads one contiguous block: availability for a stay is a
+range-min over its nights and the price is a difference of two prefix-sum
+columns, both vectorized across every property at once.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .inventory import parse_date
+
+ADULTS_PER_ROOM = 2
+PROPERTY_COLUMNS = ("hotel_id", "name", "name_ar", "city", "stars")
+
+
+@dataclass(frozen=True)
+class HotelQuery:
+    """A normalized hotel-form query."""
+
+    destination: str
+    check_in: dt.date
+    check_out: dt.date
+    rooms: int = 1
+    adults: int = 2
+    nationality: str = "SA"
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "destination", self.destination.strip())
+        if not self.destination:
+            raise ValueError("destination is required")
+        if self.check_in is None or self.check_out is None:
+            raise ValueError("check-in and check-out dates are required")
+        if self.check_out <= self.check_in:
+            raise ValueError("check-out must be after check-in")
+        if self.rooms < 1 or self.adults < 1:
+            raise ValueError("rooms and adults must be at least 1")
+
+    @property
+    def rooms_needed(self) -> int:
+        return max(self.rooms, math.ceil(self.adults / ADULTS_PER_ROOM))
+
+    @classmethod
+    def from_form(cls, form: Mapping[str, Any]) -> "HotelQuery":
+        """Build a query from the ``#hotel-search-form`` field names."""
+        return cls(
+            destination=str(form.get("destination", "")),
+            check_in=parse_date(form.get("checkIn")),
+            check_out=parse_date(form.get("checkOut")),
+            rooms=int(form.get("rooms") or 1),
+            adults=int(form.get("adults") or 2),
+            nationality=str(form.get("nationality") or "SA"),
+        )
+
+
+class HotelResults:
+    """Available properties for one stay, cheapest first."""
+
+    def __init__(self, inventory: "HotelInventory", positions: np.ndarray, totals: np.ndarray, query: HotelQuery) -> None:
+        self.inventory = inventory
+        self.positions = positions
+        self.totals = totals
+        self.query = query
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def column(self, name: str) -> np.ndarray:
+        if name == "total":
+            return self.totals / 100
+        return self.inventory.properties[name].to_numpy()[self.positions]
+
+    def take(self, positions: np.ndarray) -> "HotelResults":
+        return HotelResults(self.inventory, self.positions[positions], self.totals[positions], self.query)
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = self.inventory.properties.iloc[self.positions].reset_index(drop=True)
+        frame["check_in"] = self.query.check_in.isoformat()
+        frame["check_out"] = self.query.check_out.isoformat()
+        frame["rooms"] = self.query.rooms_needed
+        frame["total"] = self.totals / 100
+        return frame
+
+    def records(self, limit: int | None = None) -> list[dict[str, Any]]:
+        result = self if limit is None else self.take(np.arange(min(limit, len(self))))
+        return result.to_frame().to_dict("records")
+
+
+class HotelInventory:
+    """Per-night room inventory and rates for every property."""
+
+    def __init__(self, properties: pd.DataFrame, rooms: np.ndarray, rates: np.ndarray, first_night: dt.date) -> None:
+        missing = set(PROPERTY_COLUMNS) - set(properties.columns)
+        if missing:
+            raise ValueError(f"property frame is missing columns: {sorted(missing)}")
+        if rooms.shape != rates.shape or rooms.shape[0] != len(properties):
+            raise ValueError("rooms and rates must both be (property, night) matrices")
+        order = np.argsort(properties["city"].to_numpy(), kind="stable")
+        self.properties = properties.iloc[order].reset_index(drop=True)
+        self.first_night = first_night
+        self.nights = rooms.shape[1]
+        self.rooms = np.ascontiguousarray(rooms[order])
+        self.rate_prefix = np.zeros((len(order), self.nights + 1), dtype=np.int64)
+        np.cumsum(rates[order], axis=1, out=self.rate_prefix[:, 1:])
+
+        cities = self.properties["city"].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, cities[1:] != cities[:-1], True])
+        self.cities = {str(cities[lo]): slice(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])}
+        self._positions = pd.Series(np.arange(len(order)), index=self.properties["hotel_id"].to_numpy())
+        self._names = {
+            name.casefold(): position
+            for column in ("name", "name_ar")
+            for position, name in enumerate(self.properties[column])
+        }
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def night(self, day: dt.date) -> int:
+        return (day - self.first_night).days
+
+    def match(self, destination: str) -> slice | np.ndarray:
+        """Properties for a city code, a hotel id or an exact hotel name (English or Arabic)."""
+        code = destination.strip().upper()
+        if code in self.cities:
+            return self.cities[code]
+        if code.isdigit() and int(code) in self._positions.index:
+            return np.array([int(self._positions[int(code)])])
+        position = self._names.get(destination.strip().casefold())
+        if position is not None:
+            return np.array([position])
+        return slice(0, 0)
+
+    def search(self, query: HotelQuery) -> HotelResults:
+        lo, hi = self.night(query.check_in), self.night(query.check_out)
+        if lo < 0 or hi > self.nights:
+            raise ValueError("stay is outside the loaded inventory window")
+        properties = self.match(query.destination)
+        needed = query.rooms_needed
+        # Range-min over the stay's nights, range-sum via two prefix columns.
+        free = self.rooms[properties, lo:hi].min(axis=1)
+        nightly = self.rate_prefix[properties, hi] - self.rate_prefix[properties, lo]
+        available = np.flatnonzero(free >= needed)
+        totals = nightly[available] * needed
+        order = np.argsort(totals, kind="stable")
+        positions = np.arange(len(self))[properties][available[order]]
+        return HotelResults(self, positions, totals[order], query)
+
+    def update(self, hotel_id: int, day: dt.date, *, rooms: int | None = None, rate: int | None = None) -> None:
+        """Set one night's rooms left and/or rate (in cents) for ``hotel_id``."""
+        position = int(self._positions[hotel_id])
+        night = self.night(day)
+        if not 0 <= night < self.nights:
+            raise ValueError(f"{day} is outside the loaded inventory window")
+        if rooms is not None:
+            self.rooms[position, night] = rooms
+        if rate is not None:
+            current = self.rate_prefix[position, night + 1] - self.rate_prefix[position, night]
+            self.rate_prefix[position, night + 1:] += rate - current
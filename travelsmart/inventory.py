@@ -0,0 +1,332 @@
+"""Columnar flight inventory and the search index behind ``performSearch``.
+
+Every fare row lives in a set of parallel NumPy arrays sorted by a composite
+``(origin, destination, departure day)`` key, so a query is a pair of
+``searchsorted`` probes followed by a vectorized filter over the matching
+slice instead of a scan over the whole store.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+CABINS = ("Economy", "Business", "First")
+TRIP_TYPES = ("oneway", "return", "multicity")
+
+FRAME_COLUMNS = (
+    "origin", "destination", "carrier", "flight_number", "departure",
+    "duration", "cabin", "stops", "seats", "fare",
+)
+
+FareListener = Callable[[np.ndarray, np.ndarray], None]
+
+_DAY_BITS = 32
+_EPOCH = dt.date(1970, 1, 1)
+
+
+def to_day(value: dt.date) -> int:
+    """Return ``value`` as days since the Unix epoch."""
+    return (value - _EPOCH).days
+
+
+def from_day(day: int) -> dt.date:
+    return _EPOCH + dt.timedelta(days=int(day))
+
+
+def parse_date(value: Any) -> dt.date | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    return dt.date.fromisoformat(str(value))
+
+
+def parse_cabin(value: Any) -> str:
+    """A form's cabin field, ``Economy`` when empty."""
+    cabin = str(value or "Economy")
+    if cabin not in CABINS:
+        raise ValueError(f"unknown cabin {cabin!r}; choose one of {', '.join(CABINS)}")
+    return cabin
+
+
+def _codes(values: pd.Series, vocabulary: tuple[str, ...] | None = None) -> tuple[np.ndarray, tuple[str, ...]]:
+    """Dictionary-encode ``values``, optionally against a fixed ``vocabulary``."""
+    cat = pd.Categorical(values)
+    categories = tuple(str(c) for c in cat.categories)
+    codes = cat.codes.astype(np.int16)
+    if vocabulary is not None:
+        lookup = np.array([vocabulary.index(c) if c in vocabulary else -1 for c in categories] + [-1], dtype=np.int16)
+        codes = lookup[codes]
+        categories = vocabulary
+    if (codes < 0).any():
+        raise ValueError(f"unknown value in column {values.name!r}")
+    return codes, categories
+
+
+@dataclass(frozen=True)
+class FlightQuery:
+    """A normalized flight-form query."""
+
+    origin: str
+    destination: str
+    departure: dt.date
+    return_date: dt.date | None = None
+    passengers: int = 1
+    cabin: str = "Economy"
+    carrier: str | None = None
+    trip_type: str = "oneway"
+    flex_days: int = 0
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "origin", self.origin.strip().upper())
+        object.__setattr__(self, "destination", self.destination.strip().upper())
+        object.__setattr__(self, "carrier", (self.carrier or "").strip().upper() or None)
+        if self.cabin not in CABINS:
+            raise ValueError(f"unknown cabin {self.cabin!r}")
+        if self.trip_type not in TRIP_TYPES:
+            raise ValueError(f"unknown trip type {self.trip_type!r}")
+        if self.passengers < 1:
+            raise ValueError("passengers must be at least 1")
+        if self.flex_days < 0:
+            raise ValueError("flex_days must not be negative")
+        if self.trip_type != "return":
+            object.__setattr__(self, "return_date", None)
+
+    @classmethod
+    def from_form(cls, form: Mapping[str, Any]) -> "FlightQuery":
+        """Build a query from the ``#flight-search-form`` field names."""
+        return cls(
+            origin=str(form.get("origin", "")),
+            destination=str(form.get("destination", "")),
+            departure=parse_date(form.get("departure")),
+            return_date=parse_date(form.get("return")),
+            passengers=int(form.get("passengers") or 1),
+            cabin=parse_cabin(form.get("cabin")),
+            carrier=form.get("carrier") or None,
+            trip_type=str(form.get("tripType") or "oneway"),
+            flex_days=int(form.get("flex") or 0),
+        )
+
+
+class ResultSet:
+    """Row positions into a :class:`FareStore`, cheapest first."""
+
+    def __init__(self, store: "FareStore", rows: np.ndarray, passengers: int = 1) -> None:
+        self.store = store
+        self.rows = rows
+        self.passengers = passengers
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def column(self, name: str) -> np.ndarray:
+        return getattr(self.store, name)[self.rows]
+
+    def take(self, positions: np.ndarray) -> "ResultSet":
+        return ResultSet(self.store, self.rows[positions], self.passengers)
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.store.frame(self.rows, passengers=self.passengers)
+
+    def records(self, limit: int | None = None) -> list[dict[str, Any]]:
+        rows = self.rows if limit is None else self.rows[:limit]
+        frame = self.store.frame(rows, passengers=self.passengers)
+        for column in ("departure", "arrival"):
+            frame[column] = np.datetime_as_string(frame[column].to_numpy(), unit="m")
+        return frame.to_dict("records")
+
+
+@dataclass
+class SearchResponse:
+    outbound: ResultSet
+    inbound: ResultSet | None = None
+
+
+class FareStore:
+    """Columnar fare store indexed by ``(origin, destination, departure day)``."""
+
+    def __init__(
+        self,
+        *,
+        airports: tuple[str, ...],
+        carriers: tuple[str, ...],
+        origin: np.ndarray,
+        destination: np.ndarray,
+        carrier: np.ndarray,
+        flight_number: np.ndarray,
+        day: np.ndarray,
+        minute: np.ndarray,
+        duration: np.ndarray,
+        cabin: np.ndarray,
+        stops: np.ndarray,
+        seats: np.ndarray,
+        fare: np.ndarray,
+    ) -> None:
+        self.airports = airports
+        self.carriers = carriers
+        self._airport_ids = {code: i for i, code in enumerate(airports)}
+        self._carrier_ids = {code: i for i, code in enumerate(carriers)}
+        self._listeners: list[FareListener] = []
+
+        key = self._key(origin, destination, day)
+        # Sort by key, then by fare so every key range comes out cheapest first.
+        order = np.lexsort((fare, key))
+        self.key = key[order]
+        self.origin = origin[order]
+        self.destination = destination[order]
+        self.carrier = carrier[order]
+        self.flight_number = flight_number[order]
+        self.day = day[order]
+        self.minute = minute[order]
+        self.duration = duration[order]
+        self.cabin = cabin[order]
+        self.stops = stops[order]
+        self.seats = seats[order]
+        self.fare = fare[order]
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "FareStore":
+        """Load a frame with the columns listed in :data:`FRAME_COLUMNS`."""
+        missing = set(FRAME_COLUMNS) - set(frame.columns)
+        if missing:
+            raise ValueError(f"fare frame is missing columns: {sorted(missing)}")
+        _, origins = _codes(frame["origin"])
+        _, destinations = _codes(frame["destination"])
+        airports = tuple(sorted(set(origins) | set(destinations)))
+        origin, _ = _codes(frame["origin"], airports)
+        destination, _ = _codes(frame["destination"], airports)
+        carrier, carriers = _codes(frame["carrier"])
+        cabin, _ = _codes(frame["cabin"], CABINS)
+        minutes = frame["departure"].to_numpy().astype("datetime64[m]").astype(np.int64)
+        return cls(
+            airports=airports,
+            carriers=carriers,
+            origin=origin,
+            destination=destination,
+            carrier=carrier,
+            flight_number=frame["flight_number"].to_numpy(np.int32),
+            day=(minutes // 1440).astype(np.int32),
+            minute=(minutes % 1440).astype(np.int16),
+            duration=frame["duration"].to_numpy(np.int16),
+            cabin=cabin.astype(np.int8),
+            stops=frame["stops"].to_numpy(np.int8),
+            seats=frame["seats"].to_numpy(np.int16),
+            fare=frame["fare"].to_numpy(np.float64),
+        )
+
+    @classmethod
+    def from_schedules(cls, schedules: pd.DataFrame, fares: pd.DataFrame) -> "FareStore":
+        """Join a schedule frame to its fares on ``(carrier, flight_number, departure)``."""
+        on = ["carrier", "flight_number", "departure"]
+        return cls.from_frame(fares.merge(schedules, on=on, how="inner", validate="many_to_one"))
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    def _key(self, origin: Any, destination: Any, day: Any) -> Any:
+        return (self.route_id(origin, destination) << _DAY_BITS) | np.asarray(day, dtype=np.int64)
+
+    def route_id(self, origin: Any, destination: Any) -> Any:
+        return np.asarray(origin, dtype=np.int64) * len(self.airports) + np.asarray(destination, dtype=np.int64)
+
+    @staticmethod
+    def key_route(key: Any) -> Any:
+        """Return the route id packed into index ``key`` values."""
+        return np.asarray(key, dtype=np.int64) >> _DAY_BITS
+
+    def key_slice(self, key: int) -> slice:
+        lo = np.searchsorted(self.key, key, side="left")
+        hi = np.searchsorted(self.key, key, side="right")
+        return slice(int(lo), int(hi))
+
+    def subscribe(self, listener: FareListener) -> None:
+        """Call ``listener(rows, old_fares)`` after every :meth:`update`."""
+        self._listeners.append(listener)
+
+    def update(self, rows: Any, *, fare: Any = None, seats: Any = None) -> None:
+        """Change fares and/or seat counts in place and notify subscribers."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        old_fares = self.fare[rows].copy()
+        if fare is not None:
+            self.fare[rows] = fare
+        if seats is not None:
+            self.seats[rows] = seats
+        for listener in self._listeners:
+            listener(rows, old_fares)
+
+    def airport_id(self, code: str) -> int | None:
+        return self._airport_ids.get(code)
+
+    def carrier_id(self, code: str) -> int | None:
+        return self._carrier_ids.get(code)
+
+    def route_slice(self, origin: str, destination: str, first_day: int, last_day: int) -> slice:
+        """Return the store positions for a route departing in ``[first_day, last_day]``."""
+        o, d = self.airport_id(origin), self.airport_id(destination)
+        if o is None or d is None:
+            return slice(0, 0)
+        lo = np.searchsorted(self.key, self._key(o, d, first_day), side="left")
+        hi = np.searchsorted(self.key, self._key(o, d, last_day), side="right")
+        return slice(int(lo), int(hi))
+
+    def find(
+        self,
+        origin: str,
+        destination: str,
+        day: dt.date,
+        *,
+        passengers: int = 1,
+        cabin: str = "Economy",
+        carrier: str | None = None,
+        flex_days: int = 0,
+    ) -> ResultSet:
+        centre = to_day(day)
+        span = self.route_slice(origin, destination, centre - flex_days, centre + flex_days)
+        mask = (self.seats[span] >= passengers) & (self.cabin[span] == CABINS.index(cabin))
+        if carrier:
+            cid = self.carrier_id(carrier)
+            if cid is None:
+                return ResultSet(self, np.empty(0, dtype=np.int64), passengers)
+            mask &= self.carrier[span] == cid
+        rows = np.flatnonzero(mask) + span.start
+        # Rows are loaded cheapest-first per day, but flex ranges span several
+        # days and :meth:`update` may reprice rows in place.
+        rows = rows[np.argsort(self.fare[rows], kind="stable")]
+        return ResultSet(self, rows, passengers)
+
+    def search(self, query: FlightQuery) -> SearchResponse:
+        options = dict(passengers=query.passengers, cabin=query.cabin, carrier=query.carrier, flex_days=query.flex_days)
+        outbound = self.find(query.origin, query.destination, query.departure, **options)
+        inbound = None
+        if query.return_date is not None:
+            inbound = self.find(query.destination, query.origin, query.return_date, **options)
+        return SearchResponse(outbound, inbound)
+
+    def frame(self, rows: Iterable[int] | np.ndarray, *, passengers: int = 1) -> pd.DataFrame:
+        """Materialize ``rows`` as a display frame."""
+        rows = np.asarray(rows, dtype=np.int64)
+        departure = (self.day[rows].astype(np.int64) * 1440 + self.minute[rows]).astype("datetime64[m]")
+        duration = self.duration[rows]
+        return pd.DataFrame(
+            {
+                "origin": np.asarray(self.airports)[self.origin[rows]],
+                "destination": np.asarray(self.airports)[self.destination[rows]],
+                "carrier": np.asarray(self.carriers)[self.carrier[rows]],
+                "flight_number": self.flight_number[rows],
+                "departure": departure,
+                "arrival": departure + duration.astype("timedelta64[m]"),
+                "duration": duration,
+                "cabin": np.asarray(CABINS)[self.cabin[rows]],
+                "stops": self.stops[rows],
+                "seats": self.seats[rows],
+                "fare": self.fare[rows],
+                "total": self.fare[rows] * passengers,
+            }
+        )
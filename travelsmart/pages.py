@@ -0,0 +1,156 @@
+"""Localized, pre-compressed snapshots of the portal page.
+
+At startup the page source is rendered once per language: every
+``data-key`` / ``data-placeholder-key`` node gets its ``L10N`` string, the
+``<html>`` element gets its ``lang``/``dir``, and the Tailwind CDN compiler
+is replaced by the purged stylesheet from :mod:`travelsmart.stylesheet`.
+Each snapshot is stored identity, gzip and (when the optional ``brotli``
+module is installed) brotli encoded, with a strong ETag per encoding, so a
+request is a dictionary lookup and a conditional request is a 304.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import html
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from .stylesheet import purged_stylesheet
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+LANGUAGES = {"en": "ltr", "ar": "rtl"}
+DEFAULT_LANGUAGE = "en"
+
+# Page text that translateUI sets by id rather than data-key.
+_BY_ID = {"app-title": "appTitle", "balance-label": "balanceLabel", "toggle-view-btn": "toggleToB2B"}
+_SELECTED_FLIGHT = {"en": "Selected Flight: Emirates", "ar": "الرحلة المختارة: طيران الإمارات"}
+
+_L10N_BLOCK = re.compile(r"^\s*(\w+): \{\s*\n(.*?)\n\s*\}", re.M | re.S)
+_L10N_PAIR = re.compile(r"(\w+): '((?:[^'\\]|\\.)*)'")
+_KEYED = re.compile(r'(<(\w+)\b[^>]*?\sdata-key="(\w+)"[^>]*>)[^<]*(</\2>)')
+_PLACEHOLDER = re.compile(r'<[^>]*\sdata-placeholder-key="(\w+)"[^>]*>')
+_TAILWIND_CDN = re.compile(r'\s*<script src="https://cdn\.tailwindcss\.com"></script>')
+_CHART_CDN = re.compile(r'<script src="(https://cdn\.jsdelivr\.net/npm/chart\.js)"></script>')
+_FONT_IMPORT = re.compile(r"\s*@import url\('(https://fonts\.googleapis\.com/[^']+)'\);")
+
+
+@dataclass(frozen=True)
+class Representation:
+    body: bytes
+    etag: str
+    encoding: str | None = None
+
+
+def parse_l10n(source: str) -> dict[str, dict[str, str]]:
+    """Read the ``L10N`` string tables out of the page's script."""
+    start = source.index("const L10N = {")
+    block = source[start:source.index("};", start)]
+    return {
+        lang: {key: value.replace("\\'", "'") for key, value in _L10N_PAIR.findall(body)}
+        for lang, body in _L10N_BLOCK.findall(block)
+    }
+
+
+def render(source: str, lang: str, strings: dict[str, str], stylesheet: str) -> str:
+    """The page as ``translateUI(lang)`` would leave it, with precompiled CSS."""
+    head, sep, script = source.partition("<script>\n")
+
+    def text(key: str) -> str:
+        return html.escape(strings.get(key, key), quote=False)
+
+    head = _KEYED.sub(lambda m: f"{m.group(1)}{text(m.group(3))}{m.group(4)}", head)
+    head = _PLACEHOLDER.sub(lambda m: re.sub(r'placeholder="[^"]*"', f'placeholder="{html.escape(strings.get(m.group(1), m.group(1)))}"', m.group(0)), head)
+    for element_id, key in _BY_ID.items():
+        head = re.sub(rf'(<(\w+)\b[^>]*\sid="{element_id}"[^>]*>)[^<]*(</\2>)', lambda m: f"{m.group(1)}{text(key)}{m.group(3)}", head)
+    head = re.sub(
+        r'(<(\w+)\b[^>]*\sid="selected-flight-text"[^>]*>)[^<]*(</\2>)',
+        lambda m: f"{m.group(1)}{html.escape(_SELECTED_FLIGHT.get(lang, _SELECTED_FLIGHT['en']))}{m.group(3)}",
+        head,
+    )
+    head = re.sub(r'<html lang="\w+" dir="\w+">', f'<html lang="{lang}" dir="{LANGUAGES[lang]}" data-prerendered="{lang}">', head, count=1)
+    head = re.sub(
+        r'<select id="language-selector".*?</select>',
+        lambda m: re.sub(r'(<option value="(\w+)")(?: selected)?>', lambda o: o.group(1) + (" selected>" if o.group(2) == lang else ">"), m.group(0)),
+        head,
+        count=1,
+        flags=re.S,
+    )
+    head = _TAILWIND_CDN.sub(lambda m: f"\n    <style>{stylesheet}</style>", head, count=1)
+    # Chart.js is only needed once results render; the font loads in parallel instead of via @import.
+    head = _CHART_CDN.sub(r'<script src="\1" defer></script>', head, count=1)
+    font = _FONT_IMPORT.search(head)
+    if font is not None:
+        head = _FONT_IMPORT.sub("", head, count=1)
+        head = head.replace(
+            "<style>",
+            f'<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n    <link rel="stylesheet" href="{font.group(1)}">\n    <style>',
+            1,
+        )
+    return head + sep + script
+
+
+def _etag(body: bytes, encoding: str | None) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:20]}{"-" + encoding if encoding else ""}"'
+
+
+def encodings(body: bytes) -> dict[str | None, Representation]:
+    """Identity, gzip and (if available) brotli representations of ``body``."""
+    variants: dict[str | None, Representation] = {None: Representation(body, _etag(body, None))}
+    gz = gzip.compress(body, compresslevel=9, mtime=0)
+    variants["gzip"] = Representation(gz, _etag(body, "gzip"), "gzip")
+    if brotli is not None:
+        variants["br"] = Representation(brotli.compress(body, quality=11), _etag(body, "br"), "br")
+    return variants
+
+
+def pick_language(requested: str | None, accept_language: str = "") -> str:
+    if requested in LANGUAGES:
+        return requested
+    for part in accept_language.split(","):
+        tag = part.split(";")[0].strip().lower()[:2]
+        if tag in LANGUAGES:
+            return tag
+    return DEFAULT_LANGUAGE
+
+
+def pick_encoding(accept_encoding: str, available: dict[str | None, Representation]) -> str | None:
+    """Best encoding the client accepts (``br`` over ``gzip``), honouring ``q=0``."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class PageSnapshots:
+    """Per-language, per-encoding renderings of one page source."""
+
+    def __init__(self, source: str) -> None:
+        self.stylesheet = purged_stylesheet(source)
+        tables = parse_l10n(source)
+        self.variants = {lang: encodings(render(source, lang, tables.get(lang, {}), self.stylesheet).encode("utf-8")) for lang in LANGUAGES}
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PageSnapshots":
+        return cls(path.read_text(encoding="utf-8"))
+
+    def get(self, lang: str, accept_encoding: str = "") -> Representation:
+        variants = self.variants[lang]
+        return variants[pick_encoding(accept_encoding, variants)]
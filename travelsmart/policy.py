@@ -0,0 +1,161 @@
+"""Corporate travel-policy checks, flagged on every card at search time.
+
+A :class:`TravelPolicy` is a company's rule set: a cabin cap, an absolute
+fare ceiling, a ceiling relative to the cheapest fare on the same route,
+preferred carriers and an advance-purchase minimum. :class:`PolicyEngine`
+compiles it once per company against the store's vocabularies (cabin
+ranks, a carrier lookup table) and then evaluates a whole
+:class:`ResultSet` as array comparisons, producing one violation bitmask
+per row. Compiled rule sets are cached per company until the policy is
+replaced.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+import numpy as np
+
+from .inventory import CABINS, FareStore, ResultSet, to_day
+
+# Bit i of a violation mask is set when rule VIOLATIONS[i] is broken.
+VIOLATIONS = ("cabin", "fare", "relative_fare", "carrier", "advance_purchase")
+_BITS = {name: np.uint8(1 << bit) for bit, name in enumerate(VIOLATIONS)}
+
+
+@dataclass(frozen=True)
+class TravelPolicy:
+    """One company's booking rules; ``None`` disables a rule."""
+
+    company: str
+    max_cabin: str | None = None
+    max_fare: float | None = None
+    max_over_cheapest: float | None = None
+    preferred_carriers: tuple[str, ...] = ()
+    min_advance_days: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.max_cabin is not None and self.max_cabin not in CABINS:
+            raise ValueError(f"unknown cabin {self.max_cabin!r}")
+        if self.max_over_cheapest is not None and self.max_over_cheapest < 1:
+            raise ValueError("max_over_cheapest is a ratio to the cheapest fare and must be at least 1")
+        object.__setattr__(self, "preferred_carriers", tuple(code.upper() for code in self.preferred_carriers))
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> "TravelPolicy":
+        """Build a policy from stored company settings."""
+        return cls(
+            company=str(config["company"]),
+            max_cabin=config.get("max_cabin"),
+            max_fare=None if config.get("max_fare") is None else float(config["max_fare"]),
+            max_over_cheapest=None if config.get("max_over_cheapest") is None else float(config["max_over_cheapest"]),
+            preferred_carriers=tuple(config.get("preferred_carriers") or ()),
+            min_advance_days=None if config.get("min_advance_days") is None else int(config["min_advance_days"]),
+        )
+
+
+# The rule the page used to hard-code: fares above 900 need a reason.
+DEFAULT_POLICY = TravelPolicy("default", max_fare=900.0)
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """A :class:`TravelPolicy` resolved against one store's encodings."""
+
+    policy: TravelPolicy
+    cabin_allowed: np.ndarray | None
+    carrier_allowed: np.ndarray | None
+    store: FareStore = field(repr=False)
+
+    @classmethod
+    def compile(cls, policy: TravelPolicy, store: FareStore) -> "CompiledPolicy":
+        cabin_allowed = None
+        if policy.max_cabin is not None:
+            # Store cabin codes index CABINS, whose order is the cabin rank.
+            cabin_allowed = np.arange(len(CABINS)) <= CABINS.index(policy.max_cabin)
+        carrier_allowed = None
+        if policy.preferred_carriers:
+            carrier_allowed = np.isin(np.asarray(store.carriers), policy.preferred_carriers)
+        return cls(policy, cabin_allowed, carrier_allowed, store)
+
+    def evaluate(self, result: ResultSet, today: dt.date | None = None, *, fares: np.ndarray | None = None) -> np.ndarray:
+        """Violation bitmask (``uint8``) for every row of ``result``; 0 means in policy.
+
+        ``fares`` overrides the store fare per row, e.g. with a supplier's own price.
+        """
+        store, rows, policy = self.store, result.rows, self.policy
+        mask = np.zeros(len(rows), dtype=np.uint8)
+        if not len(rows):
+            return mask
+        fare = store.fare[rows] if fares is None else np.asarray(fares, dtype=np.float64)
+        if self.cabin_allowed is not None:
+            mask[~self.cabin_allowed[store.cabin[rows]]] |= _BITS["cabin"]
+        if policy.max_fare is not None:
+            mask[fare > policy.max_fare] |= _BITS["fare"]
+        if policy.max_over_cheapest is not None:
+            mask[fare > self.route_cheapest(rows) * policy.max_over_cheapest] |= _BITS["relative_fare"]
+        if self.carrier_allowed is not None:
+            mask[~self.carrier_allowed[store.carrier[rows]]] |= _BITS["carrier"]
+        if policy.min_advance_days is not None:
+            today_day = to_day(today or dt.date.today())
+            mask[store.day[rows] - today_day < policy.min_advance_days] |= _BITS["advance_purchase"]
+        return mask
+
+    def route_cheapest(self, rows: np.ndarray) -> np.ndarray:
+        """Cheapest store fare in the same cabin on each row's route, over the days the rows span.
+
+        The reference is the whole store slice, not the result rows: a search
+        narrowed to one carrier or by seat count must not move the baseline.
+        Sold-out rows are left out, as in the fare calendar; a cabin with
+        nothing on sale has an infinite baseline and flags nothing.
+        """
+        store = self.store
+        keys = store.key[rows]
+        routes = FareStore.key_route(keys)
+        cabins = store.cabin[rows]
+        cheapest = np.empty(len(rows))
+        # Result rows are grouped by route (and usually are a single one).
+        for route in np.unique(routes).tolist():
+            members = np.flatnonzero(routes == route)
+            # Store keys are (route, day), so one searchsorted pair covers the route's days.
+            lo = np.searchsorted(store.key, keys[members].min(), side="left")
+            hi = np.searchsorted(store.key, keys[members].max(), side="right")
+            per_cabin = np.full(len(CABINS), np.inf)
+            np.minimum.at(per_cabin, store.cabin[lo:hi], np.where(store.seats[lo:hi] > 0, store.fare[lo:hi], np.inf))
+            cheapest[members] = per_cabin[cabins[members]]
+        return cheapest
+
+
+def violation_names(mask: int) -> list[str]:
+    return [name for bit, name in enumerate(VIOLATIONS) if mask >> bit & 1]
+
+
+class PolicyEngine:
+    """Company policies for one store, compiled on first use and cached."""
+
+    def __init__(self, store: FareStore, policies: Mapping[str, TravelPolicy] | None = None) -> None:
+        self.store = store
+        self.policies: dict[str, TravelPolicy] = {DEFAULT_POLICY.company: DEFAULT_POLICY, **(policies or {})}
+        self._compiled: dict[str, CompiledPolicy] = {}
+
+    def __contains__(self, company: object) -> bool:
+        return company in self.policies
+
+    def set_policy(self, policy: TravelPolicy) -> None:
+        self.policies[policy.company] = policy
+        self._compiled.pop(policy.company, None)
+
+    def compiled(self, company: str) -> CompiledPolicy:
+        compiled = self._compiled.get(company)
+        if compiled is None:
+            try:
+                policy = self.policies[company]
+            except KeyError:
+                raise KeyError(f"no travel policy for company {company!r}") from None
+            compiled = self._compiled[company] = CompiledPolicy.compile(policy, self.store)
+        return compiled
+
+    def evaluate(self, company: str, result: ResultSet, today: dt.date | None = None, *, fares: np.ndarray | None = None) -> np.ndarray:
+        return self.compiled(company).evaluate(result, today, fares=fares)
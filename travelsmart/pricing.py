@@ -0,0 +1,354 @@
+"""Price breakdowns for whole result sets, and promo-code lookup.
+
+:class:`PricingEngine` turns fare rows into base fare, taxes, promo
+discount and the flat handling fee in one pass of array arithmetic over
+the result set, so the handling-fee toggle or an applied promo re-prices
+every card at once instead of card by card. Taxes are a fare-proportional
+rate plus a per-passenger departure tax looked up by origin airport.
+
+Promo codes live in a :class:`PromoIndex`: a dict keyed by a 64-bit keyed
+BLAKE2b digest of the normalized code, fronted by a :class:`BloomFilter`
+built from the same digest. The digest depends only on the code and the
+configured ``key``, so an index or filter built in one process is valid in
+any other started with the same key, while guesses that collide with real
+codes cannot be searched for without it. The filter takes about 14 bits
+per code, so it stays small however many campaign codes are loaded. A
+guessed code that is not in it is rejected after ``k`` bit probes, without
+touching the index; only the rare false positive reaches it and is then
+rejected on the exact code. A batch of guesses goes through the filter as
+one numpy pass.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import math
+import secrets
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+from .filters import HANDLING_FEE
+from .inventory import FareStore, ResultSet
+
+TAX_RATE = 0.15
+# Per passenger, by origin airport; anywhere else pays DEFAULT_DEPARTURE_TAX.
+DEPARTURE_TAXES = {"RUH": 87.0, "JED": 87.0, "DMM": 87.0, "MED": 87.0, "AHB": 87.0, "DXB": 75.0, "AUH": 75.0, "SHJ": 75.0, "DOH": 60.0}
+DEFAULT_DEPARTURE_TAX = 50.0
+
+# Bit i of a rejection mask is set when a promo did not apply for reason PROMO_REJECTIONS[i].
+PROMO_REJECTIONS = ("expired", "min_total", "carrier")
+_BITS = {name: np.uint8(1 << bit) for bit, name in enumerate(PROMO_REJECTIONS)}
+
+# How a promo-code lookup ended; PromoIndex counts each one, plus the total ("lookups").
+PROMO_OUTCOMES = ("malformed", "filtered", "false_positives", "hits")
+
+_MASK32 = (1 << 32) - 1
+
+
+def normalize_code(code: str) -> str:
+    return code.strip().upper()
+
+
+def _wellformed(code: str) -> bool:
+    return 3 <= len(code) <= 32 and code.isascii() and code.isalnum()
+
+
+def promo_key(key: str | bytes | None = None) -> bytes:
+    """BLAKE2b key for promo-code digests; ``None`` draws a random one, valid for this process only."""
+    if key is None:
+        return secrets.token_bytes(32)
+    key = key.encode("utf-8") if isinstance(key, str) else bytes(key)
+    if not 16 <= len(key) <= hashlib.blake2b.MAX_KEY_SIZE:
+        raise ValueError(f"promo key must be 16-{hashlib.blake2b.MAX_KEY_SIZE} bytes")
+    return key
+
+
+@dataclass(frozen=True)
+class Promo:
+    """A promo code: ``percent`` off and/or a fixed ``amount`` off the fare plus taxes."""
+
+    code: str
+    percent: float = 0.0
+    amount: float = 0.0
+    max_discount: float | None = None
+    min_total: float = 0.0
+    carriers: tuple[str, ...] = ()
+    expires: dt.date | None = None
+
+    def __post_init__(self) -> None:
+        code = normalize_code(self.code)
+        if not _wellformed(code):
+            raise ValueError(f"promo code {self.code!r} must be 3-32 letters or digits")
+        if not 0 <= self.percent <= 100 or self.amount < 0:
+            raise ValueError("percent must be within 0-100 and amount must not be negative")
+        if not self.percent and not self.amount:
+            raise ValueError(f"promo {code} gives no discount")
+        object.__setattr__(self, "code", code)
+        object.__setattr__(self, "carriers", tuple(carrier.upper() for carrier in self.carriers))
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> "Promo":
+        """Build a promo from stored campaign settings."""
+        return cls(
+            code=str(config["code"]),
+            percent=float(config.get("percent") or 0),
+            amount=float(config.get("amount") or 0),
+            max_discount=None if config.get("max_discount") is None else float(config["max_discount"]),
+            min_total=float(config.get("min_total") or 0),
+            carriers=tuple(config.get("carriers") or ()),
+            expires=None if config.get("expires") is None else dt.date.fromisoformat(str(config["expires"])),
+        )
+
+    def expired(self, today: dt.date | None = None) -> bool:
+        return self.expires is not None and (today or dt.date.today()) > self.expires
+
+
+# Codes the demo portal accepts out of the box.
+DEMO_PROMOS = (
+    Promo("WELCOME10", percent=10, max_discount=150),
+    Promo("SAVE50", amount=50, min_total=400),
+    Promo("SAUDIA15", percent=15, carriers=("SV",)),
+)
+
+
+class BloomFilter:
+    """Bit array answering "maybe present" or "definitely absent" for 64-bit key hashes.
+
+    Probe ``i`` of a hash is bit ``(low + i * high) mod m``, with ``low`` and
+    ``high`` its 32-bit halves (double hashing), computed identically for
+    single keys and numpy batches.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate within (0, 1)")
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        # One buffer, two views: numpy for batches, the bytearray for fast single probes.
+        self._bytes = bytearray((self.size + 7) // 8)
+        self.bits = np.frombuffer(self._bytes, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        """Bit positions, shape ``(self.hashes, len(hashes))``."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        # An odd step, so a zero high half does not send every probe to the same bit.
+        low, high = hashes & np.uint64(_MASK32), (hashes >> np.uint64(32)) | np.uint64(1)
+        probes = np.arange(self.hashes, dtype=np.uint64)[:, None]
+        return (low[None, :] + probes * high[None, :]) % np.uint64(self.size)
+
+    def add_many(self, hashes: np.ndarray) -> None:
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8)))
+        self.count += len(hashes)
+
+    def __contains__(self, key_hash: int) -> bool:
+        bits, size = self._bytes, self.size
+        position, step = key_hash & _MASK32, key_hash >> 32 | 1
+        for _ in range(self.hashes):
+            index = position % size
+            if not bits[index >> 3] >> (index & 7) & 1:
+                return False
+            position += step
+        return True
+
+    def contains_many(self, hashes: np.ndarray) -> np.ndarray:
+        positions = self._positions(hashes)
+        hits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=0)
+
+    def false_positive_rate(self) -> float:
+        """Expected rate at the current fill."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class PromoIndex:
+    """Promo codes by keyed 64-bit digest, behind a :class:`BloomFilter` for cheap rejection.
+
+    ``key`` (see :func:`promo_key`) must be the same wherever an index's
+    digests or filter bits are reused; lookups may come from any thread.
+    """
+
+    def __init__(self, promos: Iterable[Promo], error_rate: float = 0.001, *, key: str | bytes | None = None) -> None:
+        # Copying a keyed state skips re-deriving the key block on every lookup.
+        self._hasher = hashlib.blake2b(digest_size=8, key=promo_key(key))
+        self._by_hash = {self.digest(promo.code): promo for promo in promos}
+        self.bloom = BloomFilter(max(len(self._by_hash), 1), error_rate)
+        self.bloom.add_many(np.fromiter(self._by_hash, dtype=np.uint64, count=len(self._by_hash)))
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(("lookups", *PROMO_OUTCOMES), 0)
+
+    def __len__(self) -> int:
+        return len(self._by_hash)
+
+    def digest(self, code: str) -> int:
+        """Keyed 64-bit digest of a normalized, well-formed code."""
+        hasher = self._hasher.copy()
+        hasher.update(code.encode("ascii"))
+        return int.from_bytes(hasher.digest(), "little")
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def _confirm(self, code: str, key_hash: int) -> Promo | None:
+        promo = self._by_hash.get(key_hash)
+        return promo if promo is not None and promo.code == code else None
+
+    def get(self, code: str) -> Promo | None:
+        code = normalize_code(code)
+        if not _wellformed(code):
+            self._count(lookups=1, malformed=1)
+            return None
+        key_hash = self.digest(code)
+        if key_hash not in self.bloom:
+            self._count(lookups=1, filtered=1)
+            return None
+        promo = self._confirm(code, key_hash)
+        self._count(lookups=1, **({"hits": 1} if promo is not None else {"false_positives": 1}))
+        return promo
+
+    def get_many(self, codes: Iterable[str]) -> list[Promo | None]:
+        """:meth:`get` for a batch of codes, with one vectorized pass through the filter."""
+        codes = [normalize_code(code) for code in codes]
+        found: list[Promo | None] = [None] * len(codes)
+        wellformed = [i for i, code in enumerate(codes) if _wellformed(code)]
+        if not wellformed:
+            self._count(lookups=len(codes), malformed=len(codes))
+            return found
+        hashes = np.fromiter((self.digest(codes[i]) for i in wellformed), dtype=np.uint64, count=len(wellformed))
+        maybe = self.bloom.contains_many(hashes)
+        hits = 0
+        for position in np.flatnonzero(maybe).tolist():
+            i = wellformed[position]
+            found[i] = self._confirm(codes[i], int(hashes[position]))
+            hits += found[i] is not None
+        candidates = int(np.count_nonzero(maybe))
+        self._count(
+            lookups=len(codes),
+            malformed=len(codes) - len(wellformed),
+            filtered=len(wellformed) - candidates,
+            false_positives=candidates - hits,
+            hits=hits,
+        )
+        return found
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "codes": len(self),
+            "filter_bits": self.bloom.size,
+            "filter_hashes": self.bloom.hashes,
+            "expected_false_positive_rate": round(self.bloom.false_positive_rate(), 6),
+        }
+
+
+@dataclass(frozen=True)
+class Prices:
+    """Per-row price components for the whole party; ``total`` excludes the flat handling fee."""
+
+    base: np.ndarray
+    taxes: np.ndarray
+    discount: np.ndarray
+    rejected: np.ndarray
+    handling_fee: float
+    promo: Promo | None = None
+
+    @property
+    def total(self) -> np.ndarray:
+        return np.round(self.base + self.taxes - self.discount, 2)
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def breakdown(self, position: int = 0) -> dict[str, Any]:
+        """One row's price summary, handling fee included in ``total``."""
+        base, taxes, discount = (float(column[position]) for column in (self.base, self.taxes, self.discount))
+        summary: dict[str, Any] = {
+            "base": base,
+            "taxes": taxes,
+            "handling_fee": self.handling_fee,
+            "discount": discount,
+            "total": round(base + taxes - discount + self.handling_fee, 2),
+            "promo": None,
+        }
+        if self.promo is not None:
+            mask = int(self.rejected[position])
+            summary["promo"] = {
+                "code": self.promo.code,
+                "applied": not mask,
+                "rejected": [name for bit, name in enumerate(PROMO_REJECTIONS) if mask >> bit & 1],
+            }
+        return summary
+
+
+class PricingEngine:
+    """Vectorized base + taxes + promo pricing over one store, plus the promo index."""
+
+    def __init__(
+        self,
+        store: FareStore,
+        promos: Iterable[Promo] = DEMO_PROMOS,
+        *,
+        tax_rate: float = TAX_RATE,
+        departure_taxes: Mapping[str, float] | None = None,
+        handling_fee: float = HANDLING_FEE,
+        promo_key: str | bytes | None = None,
+    ) -> None:
+        self.store = store
+        self.tax_rate = tax_rate
+        self.handling_fee = handling_fee
+        taxes = DEPARTURE_TAXES if departure_taxes is None else departure_taxes
+        # Indexed by the store's origin codes, so taxes are a single gather per result set.
+        self.departure_tax = np.array([taxes.get(code, DEFAULT_DEPARTURE_TAX) for code in store.airports], dtype=np.float64)
+        self.promos = PromoIndex(promos, key=promo_key)
+        self._carriers: dict[str, np.ndarray] = {}
+
+    def promo(self, code: str) -> Promo:
+        promo = self.promos.get(code)
+        if promo is None:
+            raise KeyError(f"unknown promo code {normalize_code(code)!r}")
+        return promo
+
+    def _carrier_allowed(self, promo: Promo) -> np.ndarray:
+        allowed = self._carriers.get(promo.code)
+        if allowed is None:
+            allowed = self._carriers[promo.code] = np.isin(np.asarray(self.store.carriers), promo.carriers)
+        return allowed
+
+    def price(self, result: ResultSet, promo: Promo | None = None, *, fares: Any = None, today: dt.date | None = None) -> Prices:
+        """Price every row of ``result``; ``fares`` overrides the store's per-passenger fares (e.g. supplier offers)."""
+        store, rows, passengers = self.store, result.rows, result.passengers
+        fare = store.fare[rows] if fares is None else np.asarray(fares, dtype=np.float64)
+        base = np.round(fare * passengers, 2)
+        taxes = np.round(base * self.tax_rate + self.departure_tax[store.origin[rows]] * passengers, 2)
+        discount = np.zeros(len(rows))
+        rejected = np.zeros(len(rows), dtype=np.uint8)
+        if promo is not None:
+            subtotal = base + taxes
+            if promo.expired(today):
+                rejected |= _BITS["expired"]
+            rejected[subtotal < promo.min_total] |= _BITS["min_total"]
+            if promo.carriers:
+                rejected[~self._carrier_allowed(promo)[store.carrier[rows]]] |= _BITS["carrier"]
+            off = subtotal * (promo.percent / 100) + promo.amount
+            if promo.max_discount is not None:
+                off = np.minimum(off, promo.max_discount)
+            discount = np.where(rejected == 0, np.round(np.minimum(off, subtotal), 2), 0.0)
+        return Prices(base, taxes, discount, rejected, self.handling_fee, promo)
+
+    def charge(self, row: int, passengers: int, fare: float, promo_code: str | None = None) -> float:
+        """Amount to charge for one booking at per-passenger ``fare``, handling fee included."""
+        promo = self.promo(promo_code) if promo_code else None
+        prices = self.price(ResultSet(self.store, np.array([row]), passengers), promo, fares=[fare])
+        return prices.breakdown()["total"]
+
+    def stats(self) -> dict[str, Any]:
+        return self.promos.stats()
@@ -0,0 +1,762 @@
+"""Minimal WSGI API serving the portal page and the search backends.
+
+Run locally with ``python -m travelsmart.server --rows 1000000``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hmac
+import json
+import os
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+from urllib.parse import parse_qsl
+from wsgiref.simple_server import make_server
+
+import numpy as np
+
+from .ancillaries import AncillaryService, AncillaryUnavailable
+from .autocomplete import PrefixIndex, airport_suggestions, place_suggestions
+from .booking import BookingPipeline, BookingRequest, Overloaded, PipelineThread, StubSupplier
+from .cache import CachedFareSearch, LocalSharedTier, ResultCache
+from .connections import ConnectionPlanner, Itinerary, parse_legs
+from .export import flight_frames, hotel_frames, iter_csv, iter_xlsx
+from .fare_calendar import FareCalendar
+from .filters import FilterSessions, ResultFilter
+from .hotels import HotelInventory, HotelQuery, HotelResults
+from .inventory import FareStore, FlightQuery, ResultSet, parse_cabin, parse_date
+from .pages import PageSnapshots, pick_language
+from .policy import PolicyEngine, TravelPolicy, violation_names
+from .pricing import DEMO_PROMOS, PROMO_OUTCOMES, PricingEngine, Promo
+from .suppliers import AggregatorThread, Batch, Offer, OfferBook, SupplierAggregator, mock_suppliers
+from .synthetic import CITIES, synthetic_fares, synthetic_hotels
+from .tracing import SamplingProfiler, Tracer, metric, server_timing
+from .wallet import AgentWallets
+
+PAGE = Path(__file__).resolve().parent.parent / "app.py"
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "results.csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "results.xlsx"),
+}
+
+# Stages the page times and reports to /api/traces (recorded as ``client.<stage>``).
+CLIENT_SPANS = ("search", "first_result", "calendar", "booking_page", "confirm")
+
+# Matches ``appState.mockAgent`` in the page.
+DEMO_AGENT = ("AGT-1001", 1500.0, 500.0)
+
+StartResponse = Callable[..., Any]
+Handler = Callable[[dict[str, Any], dict[str, str]], Any]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: str, message: str, details: dict[str, Any] | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.details = details or {}
+
+
+def read_counts(value: str | None) -> dict[str, int] | None:
+    """``vegetarian:1,child:1`` (a bare name counts as one) as a dict; ``None`` when absent."""
+    if value is None:
+        return None
+    counts = {}
+    for part in filter(None, value.split(",")):
+        name, _, count = part.partition(":")
+        counts[name] = int(count or 1)
+    return counts
+
+
+def read_params(environ: dict[str, Any]) -> dict[str, str]:
+    """Merge query-string and form/JSON body parameters."""
+    params = dict(parse_qsl(environ.get("QUERY_STRING", "")))
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    if length:
+        body = environ["wsgi.input"].read(length)
+        if environ.get("CONTENT_TYPE", "").startswith("application/json"):
+            params.update(json.loads(body or b"{}"))
+        else:
+            params.update(parse_qsl(body.decode("utf-8")))
+    return params
+
+
+class App:
+    """Route table plus the shared backends every handler reads from."""
+
+    def __init__(
+        self,
+        store: FareStore,
+        hotels: HotelInventory | None = None,
+        cache: ResultCache | None = None,
+        bookings: PipelineThread | None = None,
+        wallets: AgentWallets | None = None,
+        suppliers: AggregatorThread | None = None,
+        ancillaries: AncillaryService | None = None,
+        pricing: PricingEngine | None = None,
+        operator_token: str | None = None,
+        search_cache: CachedFareSearch | None = None,
+    ) -> None:
+        self.store = store
+        # Back-office actions (wallet credits, the profiler) need ``Authorization: Bearer <token>``.
+        self.operator_token = operator_token
+        self.hotels = hotels
+        self._bookings = bookings
+        self._suppliers = suppliers
+        self.pages = PageSnapshots.from_file(PAGE)
+        self.wallets = wallets if wallets is not None else AgentWallets()
+        self.ancillaries = ancillaries if ancillaries is not None else AncillaryService(store)
+        self.search_cache = search_cache if search_cache is not None else CachedFareSearch(store, cache)
+        self.calendar = FareCalendar(store)
+        self.sessions = FilterSessions()
+        self.offers = OfferBook()
+        self.planner = ConnectionPlanner(store)
+        self.policies = PolicyEngine(store)
+        self.pricing = pricing if pricing is not None else PricingEngine(store)
+        self.tracer = Tracer()
+        self.profiler = SamplingProfiler()
+        traffic = np.bincount(store.origin, minlength=len(store.airports)) + np.bincount(store.destination, minlength=len(store.airports))
+        self.suggest = {
+            "airport": PrefixIndex(airport_suggestions(CITIES, store.airports, dict(zip(store.airports, traffic.tolist())))),
+        }
+        if hotels is not None:
+            self.suggest["place"] = PrefixIndex(place_suggestions(CITIES, hotels.properties))
+        self.routes: dict[str, Handler] = {
+            "/": self.page,
+            "/api/flights/search": self.flight_search,
+            "/api/flights/stream": self.flight_stream,
+            "/api/flights/calendar": self.tracer.wrap("calendar", self.fare_calendar),
+            "/api/flights/itineraries": self.itineraries,
+            "/api/hotels/search": self.hotel_search,
+            "/api/autocomplete": self.autocomplete,
+            "/api/cache/stats": self.cache_stats,
+            "/api/bookings/confirm": self.tracer.wrap("confirm", self.confirm_booking),
+            "/api/pricing/quote": self.price_quote,
+            "/api/ancillaries/seatmap": self.seat_map,
+            "/api/ancillaries/hold": self.hold_ancillaries,
+            "/api/ancillaries/release": self.release_ancillaries,
+            "/api/agents/wallet": self.agent_wallet,
+            "/api/agents/recharge": self.recharge,
+            "/api/results/filter": self.tracer.wrap("filter", self.filter_results),
+            "/api/results/export": self.export_results,
+            "/api/traces": self.client_traces,
+            "/api/debug/profiler": self.profiler_control,
+            "/metrics": self.metrics,
+        }
+
+    def __call__(self, environ: dict[str, Any], start_response: StartResponse) -> Iterable[bytes]:
+        handler = self.routes.get(environ.get("PATH_INFO", "/"))
+        status = "200 OK"
+        trace = self.tracer.begin()
+        try:
+            if handler is None:
+                raise HTTPError("404 Not Found", "no such route")
+            result = handler(environ, read_params(environ))
+        except HTTPError as exc:
+            result, status = {"error": str(exc), **exc.details}, exc.status
+        except (ValueError, TypeError) as exc:
+            result, status = {"error": str(exc)}, "400 Bad Request"
+        except LookupError as exc:
+            # A missing key or column the handler did not anticipate: still the request's fault.
+            result, status = {"error": str(exc.args[0]) if exc.args else "missing parameter"}, "400 Bad Request"
+        finally:
+            spans = self.tracer.end(trace)
+        if callable(result):
+            return result(start_response)
+        return self._json(start_response, result, status, spans)
+
+    @staticmethod
+    def _json(start_response: StartResponse, payload: Any, status: str = "200 OK", spans: list[tuple[str, float]] | None = None) -> list[bytes]:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        headers = [("Content-Type", "application/json"), ("Content-Length", str(len(body)))]
+        if spans:
+            headers.append(("Server-Timing", server_timing(spans)))
+        start_response(status, headers)
+        return [body]
+
+    def page(self, environ: dict[str, Any], params: dict[str, str]) -> Callable[[StartResponse], list[bytes]]:
+        """Serve the pre-rendered snapshot for the request's language and encoding."""
+        lang = pick_language(params.get("lang"), environ.get("HTTP_ACCEPT_LANGUAGE", ""))
+        page = self.pages.get(lang, environ.get("HTTP_ACCEPT_ENCODING", ""))
+        headers = [
+            ("Content-Type", "text/html; charset=utf-8"),
+            ("Content-Language", lang),
+            ("ETag", page.etag),
+            ("Cache-Control", "no-cache"),
+            ("Vary", "Accept-Encoding, Accept-Language"),
+        ]
+        if page.encoding is not None:
+            headers.append(("Content-Encoding", page.encoding))
+
+        def respond(start_response: StartResponse) -> list[bytes]:
+            if page.etag in (tag.strip() for tag in environ.get("HTTP_IF_NONE_MATCH", "").split(",")):
+                start_response("304 Not Modified", headers)
+                return []
+            start_response("200 OK", headers + [("Content-Length", str(len(page.body)))])
+            return [page.body]
+
+        return respond
+
+    def flight_search(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Search both legs; each leg gets its own filter session, priced and policy-flagged the same way."""
+        query = FlightQuery.from_form(params)
+        if query.departure is None:
+            raise ValueError("departure date is required")
+        limit = int(params.get("limit") or 50)
+        company = params.get("company") or "default"
+        if company not in self.policies:
+            raise HTTPError("404 Not Found", f"no travel policy for company {company!r}")
+        with self.tracer.span("search"):
+            response = self.search_cache.search(query)
+        outbound, inbound = response.outbound, response.inbound
+        result_filter = self._flight_filter(outbound, company)
+        payload = {
+            "session": self.sessions.open(result_filter, outbound),
+            "outbound": self._cards(result_filter, outbound, np.arange(min(limit, len(outbound)))),
+            "outbound_count": len(outbound),
+            "out_of_policy": int(np.count_nonzero(result_filter.columns["policy"])),
+            "inbound_session": None,
+            "inbound": None,
+            "inbound_count": 0,
+            "inbound_out_of_policy": 0,
+        }
+        if inbound is not None:
+            inbound_filter = self._flight_filter(inbound, company)
+            payload["inbound_session"] = self.sessions.open(inbound_filter, inbound)
+            payload["inbound"] = self._cards(inbound_filter, inbound, np.arange(min(limit, len(inbound))))
+            payload["inbound_count"] = len(inbound)
+            payload["inbound_out_of_policy"] = int(np.count_nonzero(inbound_filter.columns["policy"]))
+        return payload
+
+    def _flight_filter(self, result: ResultSet, company: str) -> ResultFilter:
+        with self.tracer.span("pricing"):
+            prices = self.pricing.price(result)
+        columns = {"fare": result.column("fare"), "total": prices.total, "stops": result.column("stops"), "carrier": result.column("carrier")}
+        # Flag every row once here so cards never need a per-click policy check.
+        with self.tracer.span("policy"):
+            columns["policy"] = self.policies.evaluate(company, result)
+        return ResultFilter(columns, handling_fee=self.pricing.handling_fee)
+
+    @property
+    def suppliers(self) -> AggregatorThread:
+        if self._suppliers is None:
+            self._suppliers = AggregatorThread(SupplierAggregator(mock_suppliers(self.store, 4, source=self.search_cache.search)))
+        return self._suppliers
+
+    def flight_stream(self, environ: dict[str, Any], params: dict[str, str]) -> Callable[[StartResponse], Iterable[bytes]]:
+        """Fan the search out to every supplier and stream one NDJSON line per supplier answer.
+
+        Cards cover both legs of a return search (``leg`` is ``outbound`` or
+        ``inbound``) and carry the ``company`` policy verdict for the
+        supplier's fare, as :meth:`flight_search` cards do.
+        """
+        query = FlightQuery.from_form(params)
+        if query.departure is None:
+            raise ValueError("departure date is required")
+        include_fees = params.get("fees", "1") not in ("0", "false", "")
+        company = params.get("company") or "default"
+        if company not in self.policies:
+            raise HTTPError("404 Not Found", f"no travel policy for company {company!r}")
+
+        def priced(offers: list[Any]) -> tuple[ResultSet, np.ndarray, Any, np.ndarray]:
+            result = ResultSet(self.store, np.array([int(offer.ref) for offer in offers], dtype=np.int64), query.passengers)
+            fares = np.array([offer.fare for offer in offers], dtype=np.float64)
+            with self.tracer.span("policy"):
+                policy = self.policies.evaluate(company, result, fares=fares)
+            return result, fares, self.pricing.price(result, fares=fares), policy
+
+        def cards(offers: list[Any]) -> list[dict[str, Any]]:
+            if not offers:
+                return []
+            _, _, prices, policy = priced(offers)
+            fee = prices.handling_fee if include_fees else 0.0
+            return [
+                {
+                    **offer.to_dict(),
+                    "leg": "outbound" if offer.origin == query.origin else "inbound",
+                    "base": base,
+                    "taxes": taxes,
+                    "total": round(total, 2),
+                    "price": round(total + fee, 2),
+                    "in_policy": not mask,
+                    "policy_violations": violation_names(mask),
+                }
+                for offer, base, taxes, total, mask in zip(offers, prices.base.tolist(), prices.taxes.tolist(), prices.total.tolist(), policy.tolist())
+            ]
+
+        def session(offers: list[Any]) -> str:
+            # Merged offers in arrival order, so session positions match the page's card order.
+            result, fares, prices, policy = priced(offers)
+            columns = {"fare": fares, "total": prices.total, "stops": result.column("stops"), "carrier": result.column("carrier"), "policy": policy}
+            result_filter = ResultFilter(columns, handling_fee=prices.handling_fee)
+            result_filter.show_fees(include_fees)
+            return self.sessions.open(result_filter, result)
+
+        def lines() -> Iterator[bytes]:
+            count, first, statuses = 0, None, {}
+            merged: dict[str, Any] = {}
+            batch: Batch | None = None
+            for batch in self.suppliers.stream(query):
+                for offer in batch.added + batch.updated:
+                    merged[offer.key] = offer
+                # Quotes and bookings for these cards charge the offered fare.
+                self.offers.remember(batch.added + batch.updated)
+                statuses[batch.supplier] = batch.status
+                count += len(batch.added)
+                if batch.added and first is None:
+                    first = batch.elapsed
+                payload = {
+                    "supplier": batch.supplier,
+                    "status": batch.status,
+                    "error": batch.error,
+                    "elapsed_ms": round(batch.elapsed * 1000, 1),
+                    "offers": cards(batch.added),
+                    "updated": cards(batch.updated),
+                }
+                yield json.dumps(payload).encode("utf-8") + b"\n"
+            summary = {
+                "done": True,
+                "count": count,
+                "suppliers": statuses,
+                "first_result_ms": None if first is None else round(first * 1000, 1),
+                "elapsed_ms": round(batch.elapsed * 1000, 1) if batch is not None else 0.0,
+                "session": session(list(merged.values())) if merged else None,
+                "handling_fee": self.pricing.handling_fee,
+            }
+            yield json.dumps(summary).encode("utf-8") + b"\n"
+
+        def respond(start_response: StartResponse) -> Iterable[bytes]:
+            start_response("200 OK", [("Content-Type", "application/x-ndjson"), ("Cache-Control", "no-cache")])
+            return lines()
+
+        return respond
+
+    @property
+    def bookings(self) -> PipelineThread:
+        if self._bookings is None:
+            self._bookings = PipelineThread(BookingPipeline(StubSupplier(self.store), wallet=self.wallets, pricing=self.pricing))
+        return self._bookings
+
+    def confirm_booking(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        if environ.get("REQUEST_METHOD", "POST") != "POST":
+            raise HTTPError("405 Method Not Allowed", "bookings must be confirmed with POST")
+        if not params.get("key"):
+            raise ValueError("key is required")
+        row, offer = self._offer_row(params)
+        request = BookingRequest(
+            idempotency_key=params["key"],
+            row=row,
+            passengers=int(params.get("passengers") or 1),
+            quoted_total=float(params.get("quoted_total") or 0),
+            payment_method=params.get("payment") or "card",
+            agent_id=params.get("agent") or None,
+            promo_code=params.get("promo") or None,
+            fare=None if offer is None else offer.fare,
+        )
+        if params.get("ancillaries") and self._hold_row(params["ancillaries"]) != request.row:
+            raise ValueError("the ancillary hold was taken for a different fare row")
+        try:
+            result = self.bookings.submit(request)
+        except Overloaded as exc:
+            raise HTTPError("503 Service Unavailable", str(exc)) from None
+        except TimeoutError:
+            # The booking is still running; retrying with the same key returns its outcome.
+            raise HTTPError(
+                "504 Gateway Timeout",
+                "booking is still being confirmed, retry with the same key",
+                {"status": "pending", "idempotency_key": request.idempotency_key},
+            ) from None
+        payload = {key: value for key, value in vars(result).items() if key != "latency"}
+        if result.status == "confirmed" and params.get("ancillaries"):
+            try:
+                payload["ancillaries"] = self.ancillaries.confirm(params["ancillaries"], row=request.row)
+            except KeyError as exc:
+                payload["ancillaries"] = {"error": exc.args[0]}
+        return payload
+
+    def _promo(self, code: str) -> Promo:
+        try:
+            return self.pricing.promo(code)
+        except KeyError as exc:
+            raise HTTPError("404 Not Found", exc.args[0]) from None
+
+    def price_quote(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Price summary for one fare ``row`` or streamed ``offer``: what the booking will charge, with ``promo`` if given."""
+        passengers = int(params.get("passengers") or 1)
+        if passengers < 1:
+            raise ValueError("passengers must be at least 1")
+        row, offer = self._offer_row(params)
+        result = ResultSet(self.store, np.array([row]), passengers)
+        promo = self._promo(params["promo"]) if params.get("promo") else None
+        prices = self.pricing.price(result, promo, fares=None if offer is None else [offer.fare])
+        return {"row": row, "offer": None if offer is None else offer.key, "passengers": passengers, **prices.breakdown()}
+
+    def _offer_row(self, params: dict[str, str]) -> tuple[int, Offer | None]:
+        """The fare row to price, and the streamed offer whose fare applies when ``offer`` is given."""
+        if not params.get("offer"):
+            return self._fare_row(params), None
+        try:
+            offer = self.offers.get(params["offer"])
+        except KeyError as exc:
+            raise HTTPError("404 Not Found", exc.args[0]) from None
+        if params.get("row") and self._fare_row(params) != int(offer.ref):
+            raise ValueError("row does not match the offer")
+        return int(offer.ref), offer
+
+    def _fare_row(self, params: dict[str, str]) -> int:
+        if not params.get("row"):
+            raise ValueError("row is required")
+        row = int(params["row"])
+        if not 0 <= row < len(self.store):
+            raise ValueError("unknown fare row")
+        return row
+
+    def _hold_row(self, hold_id: str) -> int:
+        try:
+            return self.ancillaries.hold_row(hold_id)
+        except KeyError as exc:
+            raise HTTPError("404 Not Found", exc.args[0]) from None
+
+    def seat_map(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        return self.ancillaries.seat_map(self._fare_row(params))
+
+    def hold_ancillaries(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Take or amend (``hold``) a seat/meal/bag hold: ``seats=12A,12B``, ``meals=vegetarian:1``, ``bags=23kg:2``."""
+        if environ.get("REQUEST_METHOD", "POST") != "POST":
+            raise HTTPError("405 Method Not Allowed", "holds must be placed with POST")
+        seats = params.get("seats")
+        try:
+            return self.ancillaries.hold(
+                self._fare_row(params),
+                seats=None if seats is None else [seat.strip() for seat in seats.split(",") if seat.strip()],
+                meals=read_counts(params.get("meals")),
+                bags=read_counts(params.get("bags")),
+                hold_id=params.get("hold") or None,
+            )
+        except AncillaryUnavailable as exc:
+            raise HTTPError("409 Conflict", str(exc)) from None
+        except KeyError as exc:
+            raise HTTPError("404 Not Found", exc.args[0]) from None
+
+    def release_ancillaries(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        if environ.get("REQUEST_METHOD", "POST") != "POST":
+            raise HTTPError("405 Method Not Allowed", "holds must be released with POST")
+        try:
+            self.ancillaries.release(params.get("hold", ""))
+        except KeyError as exc:
+            raise HTTPError("404 Not Found", exc.args[0]) from None
+        return {"released": params.get("hold")}
+
+    def _agent(self, params: dict[str, str]) -> str:
+        agent = params.get("agent", "")
+        if agent not in self.wallets:
+            raise HTTPError("404 Not Found", f"unknown agent {agent!r}")
+        return agent
+
+    def agent_wallet(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        agent = self._agent(params)
+        entries = self.wallets.entries(agent, int(params.get("since") or 0))
+        return {**self.wallets.summary(agent), "ledger": [entry.to_dict() for entry in entries[-int(params.get("limit") or 50):]]}
+
+    def _require_operator(self, environ: dict[str, Any], action: str) -> None:
+        if not self.operator_token:
+            raise HTTPError("403 Forbidden", f"{action} is disabled; start the server with --operator-token")
+        scheme, _, token = environ.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode("utf-8"), self.operator_token.encode("utf-8")):
+            raise HTTPError("401 Unauthorized", f"{action} needs a back-office token")
+
+    def recharge(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Credit an agent's deposit; a back-office action, so it needs the operator token."""
+        if environ.get("REQUEST_METHOD", "POST") != "POST":
+            raise HTTPError("405 Method Not Allowed", "recharges must be sent with POST")
+        self._require_operator(environ, "recharging a wallet")
+        agent = self._agent(params)
+        entry = self.wallets.deposit(agent, float(params.get("amount") or 0), reference=params.get("key") or None)
+        return {**self.wallets.summary(agent), "entry": entry.to_dict()}
+
+    def cache_stats(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        return self.search_cache.cache.stats()
+
+    def metrics(self, environ: dict[str, Any], params: dict[str, str]) -> Callable[[StartResponse], list[bytes]]:
+        """Span latencies and backend counters in the Prometheus text format."""
+        cache = self.search_cache.cache.stats()
+        holds = self.ancillaries.stats()
+        promos = self.pricing.promos.stats()
+        lines = [
+            *metric("travelsmart_cache_events_total", "counter", "Search-cache lookups, evictions and invalidations.", {event: cache[event] for event in self.search_cache.cache.counters}, "event"),
+            *metric("travelsmart_cache_entries", "gauge", "Result sets held in the search cache.", cache["entries"]),
+            *metric("travelsmart_ancillary_holds_total", "counter", "Seat/meal/bag holds by outcome.", {event: holds[event] for event in holds if event != "active"}, "event"),
+            *metric("travelsmart_ancillary_holds_active", "gauge", "Unexpired seat/meal/bag holds.", holds["active"]),
+            *metric("travelsmart_promo_lookups_total", "counter", "Promo-code lookups by outcome (filtered = rejected by the Bloom filter).", {outcome: promos[outcome] for outcome in PROMO_OUTCOMES}, "outcome"),
+            *metric("travelsmart_filter_sessions", "gauge", "Open result-filter sessions.", len(self.sessions)),
+            *metric("travelsmart_profiler_samples", "gauge", "Stack samples taken by the sampling profiler.", self.profiler.samples),
+        ]
+        body = (self.tracer.prometheus() + "\n".join(lines) + "\n").encode("utf-8")
+
+        def respond(start_response: StartResponse) -> list[bytes]:
+            start_response("200 OK", [("Content-Type", "text/plain; version=0.0.4; charset=utf-8"), ("Content-Length", str(len(body)))])
+            return [body]
+
+        return respond
+
+    def client_traces(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Record page-side timings sent as ``spans=search:812.5,calendar:14.2`` (milliseconds)."""
+        if environ.get("REQUEST_METHOD", "POST") != "POST":
+            raise HTTPError("405 Method Not Allowed", "traces must be sent with POST")
+        recorded = 0
+        for part in filter(None, params.get("spans", "").split(",")):
+            stage, _, ms = part.partition(":")
+            duration = float(ms)
+            # Only known stages, so a client cannot mint unbounded metric labels.
+            if stage in CLIENT_SPANS and 0 <= duration < 600_000:
+                self.tracer.record(f"client.{stage}", duration / 1000)
+                recorded += 1
+        return {"recorded": recorded}
+
+    def profiler_control(self, environ: dict[str, Any], params: dict[str, str]) -> Any:
+        """``GET`` profile so far (``format=collapsed`` for flame graphs); ``POST action=start|stop|reset``.
+
+        Stacks expose code paths and sampling costs CPU, so both need the operator token.
+        """
+        self._require_operator(environ, "the profiler")
+        if environ.get("REQUEST_METHOD", "GET") == "POST":
+            action = params.get("action", "")
+            if action == "start":
+                self.profiler.start(float(params["interval"]) if params.get("interval") else None)
+            elif action == "stop":
+                self.profiler.stop()
+            elif action == "reset":
+                self.profiler.reset()
+            else:
+                raise ValueError("action must be start, stop or reset")
+        if params.get("format") == "collapsed":
+            body = self.profiler.collapsed().encode("utf-8")
+
+            def respond(start_response: StartResponse) -> list[bytes]:
+                start_response("200 OK", [("Content-Type", "text/plain; charset=utf-8"), ("Content-Length", str(len(body)))])
+                return [body]
+
+            return respond
+        return {**self.profiler.stats(int(params.get("limit") or 20)), "spans": self.tracer.stats()}
+
+    def autocomplete(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Suggestions for ``q``; ``field=airport`` for flight inputs, ``field=place`` for the hotel input."""
+        index = self.suggest.get(params.get("field") or "airport")
+        if index is None:
+            raise HTTPError("404 Not Found", "no suggestions for that field")
+        suggestions = index.suggest(params.get("q", ""), int(params.get("limit") or 8))
+        return {"suggestions": [vars(suggestion) for suggestion in suggestions]}
+
+    def hotel_search(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        if self.hotels is None:
+            raise HTTPError("404 Not Found", "hotel inventory is not loaded")
+        query = HotelQuery.from_form(params)
+        # City names ("Riyadh", "الرياض") and hotel suggestions resolve to the
+        # code the autocomplete hands out, which the inventory matches on.
+        place = self.suggest["place"].resolve(query.destination)
+        if place is not None:
+            query = replace(query, destination=place.code)
+        results = self.hotels.search(query)
+        limit = int(params.get("limit") or 50)
+        result_filter = ResultFilter({"total": results.column("total"), "stars": results.column("stars")})
+        return {
+            "session": self.sessions.open(result_filter, results),
+            "hotels": self._cards(result_filter, results, np.arange(min(limit, len(results)))),
+            "hotel_count": len(results),
+        }
+
+    def _session(self, params: dict[str, str]) -> tuple[ResultFilter, Any]:
+        try:
+            return self.sessions.get(params.get("session", ""))
+        except KeyError as exc:
+            raise HTTPError("404 Not Found", exc.args[0]) from None
+
+    @staticmethod
+    def _cards(result_filter: ResultFilter, result: ResultSet | HotelResults, positions: np.ndarray) -> list[dict[str, Any]]:
+        subset = result.take(positions)
+        records = subset.records()
+        for position, price, record in zip(positions.tolist(), result_filter.prices(positions).tolist(), records):
+            record["id"] = position
+            record["price"] = price
+        if isinstance(subset, ResultSet):
+            for row, record in zip(subset.rows.tolist(), records):
+                record["row"] = row
+        if "policy" in result_filter.columns:
+            for mask, record in zip(result_filter.columns["policy"][positions].tolist(), records):
+                record["in_policy"] = not mask
+                record["policy_violations"] = violation_names(mask)
+        return records
+
+    def filter_results(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Apply sidebar filter changes to a cached result set and return the visibility delta."""
+        result_filter, result = self._session(params)
+        before = result_filter.visible
+        changed = repriced = False
+        if "fees" in params:
+            include_fees = params["fees"] not in ("0", "false", "")
+            if include_fees != result_filter.include_fees:
+                result_filter.show_fees(include_fees)
+                repriced = True
+            changed = True
+        if "promo" in params:
+            if not isinstance(result, ResultSet):
+                raise ValueError("promo codes apply to flight results only")
+            promo = self._promo(params["promo"]) if params["promo"] != "-" else None
+            with self.tracer.span("pricing"):
+                prices = self.pricing.price(result, promo, fares=result_filter.columns["fare"])
+            result_filter.reprice(prices.total)
+            changed = repriced = True
+        if "min_price" in params or "max_price" in params:
+            low, high = params.get("min_price"), params.get("max_price")
+            result_filter.price_range(float(low) if low else None, float(high) if high else None)
+            changed = True
+        if "stops" in params and "stops" in result_filter.columns:
+            stops = None if params["stops"] == "any" else [int(s) for s in params["stops"].split(",") if s]
+            result_filter.one_of("stops", stops)
+            changed = True
+        if "in_policy" in params and "policy" in result_filter.columns:
+            result_filter.one_of("policy", [0] if params["in_policy"] not in ("0", "false", "") else None)
+            changed = True
+        if "stars" in params and "stars" in result_filter.columns:
+            result_filter.at_least("stars", float(params["stars"]) if params["stars"] else None)
+            changed = True
+        if not changed:
+            raise ValueError("no filter change given")
+        delta = result_filter.delta_since(before)
+        payload = {
+            "count": delta.count,
+            "added": self._cards(result_filter, result, delta.added[: int(params.get("limit") or 200)]),
+            "removed": delta.removed.tolist(),
+        }
+        if repriced:
+            # Switching fees or applying a promo reprices every visible card; send the new price column.
+            visible = result_filter.rows()
+            payload["price_ids"] = visible.tolist()
+            payload["prices"] = result_filter.prices(visible).tolist()
+        return payload
+
+    def export_results(self, environ: dict[str, Any], params: dict[str, str]) -> Callable[[StartResponse], Iterable[bytes]]:
+        """Stream the visible rows of a result session as CSV or XLSX."""
+        result_filter, result = self._session(params)
+        fmt = params.get("format", "xlsx")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"unknown export format {fmt!r}")
+        positions = result_filter.rows()
+        frames = (hotel_frames if isinstance(result, HotelResults) else flight_frames)(result, positions, result_filter.prices(positions))
+        body = iter_csv(frames) if fmt == "csv" else iter_xlsx(frames)
+        content_type, filename = EXPORT_FORMATS[fmt]
+
+        def respond(start_response: StartResponse) -> Iterable[bytes]:
+            start_response("200 OK", [("Content-Type", content_type), ("Content-Disposition", f'attachment; filename="{filename}"')])
+            return body
+
+        return respond
+
+    def fare_calendar(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        origin, destination = params.get("origin", ""), params.get("destination", "")
+        cabin = parse_cabin(params.get("cabin"))
+        if params.get("month"):
+            year, _, month = params["month"].partition("-")
+            if not (year.isdigit() and month.isdigit()):
+                raise ValueError(f"month {params['month']!r} must be YYYY-MM")
+            year, month = int(year), int(month)
+            days = self.calendar.month(origin, destination, year, month, cabin)
+        else:
+            departure = parse_date(params.get("departure"))
+            if departure is None:
+                raise ValueError("departure date or month is required")
+            days = self.calendar.around(origin, destination, departure, int(params.get("days") or 3), cabin)
+        return {"labels": [day.isoformat() for day, _ in days], "fares": [fare for _, fare in days]}
+
+    def _itinerary(self, itinerary: Itinerary | None) -> dict[str, Any] | None:
+        if itinerary is None:
+            return None
+        return {
+            "fare": itinerary.fare,
+            "stops": itinerary.stops,
+            "duration": itinerary.duration,
+            "segments": ResultSet(self.store, np.asarray(itinerary.rows)).records(),
+        }
+
+    def itineraries(self, environ: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        """Connecting itineraries for one O&D, or ``legs=RUH:LHR:2026-11-20,LHR:JFK:2026-11-23`` for multi-city."""
+        options = {
+            "max_stops": int(params.get("max_stops") or 2),
+            "passengers": int(params.get("passengers") or 1),
+            "cabin": parse_cabin(params.get("cabin")),
+        }
+        if params.get("legs"):
+            legs = parse_legs(params["legs"])
+            objective = params.get("objective") or "cheapest"
+            return {"legs": [self._itinerary(plan) for plan in self.planner.multi_city(legs, objective=objective, **options)]}
+        departure = parse_date(params.get("departure"))
+        if departure is None:
+            raise ValueError("departure date is required")
+        plans = self.planner.plan(params.get("origin", ""), params.get("destination", ""), departure, **options)
+        return {objective: self._itinerary(plan) for objective, plan in plans.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic fare rows to load")
+    parser.add_argument("--hotels", type=int, default=10_000, help="synthetic hotel properties to load")
+    parser.add_argument("--cache-entries", type=int, default=10_000)
+    parser.add_argument("--cache-ttl", type=float, default=300.0, help="seconds a cached search stays fresh")
+    parser.add_argument("--shared-cache", action="store_true", help="add the in-memory stand-in for a shared cache tier")
+    parser.add_argument("--suppliers", type=int, default=4, help="mock suppliers behind /api/flights/stream")
+    parser.add_argument("--supplier-deadline", type=float, default=2.0, help="seconds each supplier gets per search")
+    parser.add_argument("--hold-ttl", type=float, default=120.0, help="seconds a seat/meal/bag hold lasts")
+    parser.add_argument("--policies", type=Path, help="JSON list of company travel policies")
+    parser.add_argument("--promos", type=Path, help="JSON list of promo codes, added to the demo ones")
+    parser.add_argument("--tracing", action=argparse.BooleanOptionalAction, default=True, help="time request stages into /metrics")
+    parser.add_argument("--profile", action="store_true", help="start the sampling profiler at boot (else POST /api/debug/profiler)")
+    parser.add_argument(
+        "--operator-token",
+        default=os.environ.get("TRAVELSMART_OPERATOR_TOKEN"),
+        help="bearer token for wallet recharges and the profiler (default: $TRAVELSMART_OPERATOR_TOKEN; unset disables them)",
+    )
+    parser.add_argument(
+        "--promo-key",
+        default=os.environ.get("TRAVELSMART_PROMO_KEY"),
+        help="16-64 byte key for promo-code digests, shared by every worker (default: $TRAVELSMART_PROMO_KEY; unset uses a per-process key)",
+    )
+    args = parser.parse_args(argv)
+
+    properties, rooms, rates = synthetic_hotels(args.hotels)
+    cache = ResultCache(args.cache_entries, args.cache_ttl, LocalSharedTier() if args.shared_cache else None)
+    wallets = AgentWallets()
+    agent, opening_balance, threshold = DEMO_AGENT
+    wallets.open(agent, threshold=threshold, opening_balance=opening_balance)
+    store = FareStore.from_frame(synthetic_fares(args.rows))
+    search_cache = CachedFareSearch(store, cache)
+    promos = list(DEMO_PROMOS)
+    if args.promos is not None:
+        promos += [Promo.from_dict(config) for config in json.loads(args.promos.read_text(encoding="utf-8"))]
+    app = App(
+        store,
+        HotelInventory(properties, rooms, rates, dt.date.today()),
+        wallets=wallets,
+        suppliers=AggregatorThread(SupplierAggregator(mock_suppliers(store, args.suppliers, source=search_cache.search), deadline=args.supplier_deadline)),
+        ancillaries=AncillaryService(store, ttl=args.hold_ttl),
+        pricing=PricingEngine(store, promos, promo_key=args.promo_key),
+        operator_token=args.operator_token,
+        search_cache=search_cache,
+    )
+    app.tracer.enabled = args.tracing
+    if args.profile:
+        app.profiler.start()
+    if args.policies is not None:
+        for config in json.loads(args.policies.read_text(encoding="utf-8")):
+            app.policies.set_policy(TravelPolicy.from_dict(config))
+    with make_server(args.host, args.port, app) as httpd:
+        print(f"Serving on http://{args.host}:{args.port}")
+        httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Purged, precompiled utility stylesheet for the portal page.
+
+The page is written against Tailwind utility classes and used to load the
+Tailwind CDN compiler, which scans the DOM and generates CSS in the browser
+on every load. :func:`purged_stylesheet` does that once on the server: it
+collects the class names the page (and its scripts) actually use and emits
+rules for exactly those utilities, in Tailwind's layer order, after a
+compact preflight. Class names it does not know (the page's own hooks such
+as ``book-now-btn``) produce no CSS, as with the CDN build.
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+from typing import Callable, Iterable
+
+BREAKPOINTS = {"sm": "640px", "md": "768px", "lg": "1024px", "xl": "1280px"}
+STATES = {"hover": ":hover", "focus": ":focus"}
+
+PALETTE = {
+    "gray": ("#f9fafb", "#f3f4f6", "#e5e7eb", "#d1d5db", "#9ca3af", "#6b7280", "#4b5563", "#374151", "#1f2937", "#111827"),
+    "red": ("#fef2f2", "#fee2e2", "#fecaca", "#fca5a5", "#f87171", "#ef4444", "#dc2626", "#b91c1c", "#991b1b", "#7f1d1d"),
+    "yellow": ("#fefce8", "#fef9c3", "#fef08a", "#fde047", "#facc15", "#eab308", "#ca8a04", "#a16207", "#854d0e", "#713f12"),
+    "green": ("#f0fdf4", "#dcfce7", "#bbf7d0", "#86efac", "#4ade80", "#22c55e", "#16a34a", "#15803d", "#166534", "#14532d"),
+    "blue": ("#eff6ff", "#dbeafe", "#bfdbfe", "#93c5fd", "#60a5fa", "#3b82f6", "#2563eb", "#1d4ed8", "#1e40af", "#1e3a8a"),
+    "indigo": ("#eef2ff", "#e0e7ff", "#c7d2fe", "#a5b4fc", "#818cf8", "#6366f1", "#4f46e5", "#4338ca", "#3730a3", "#312e81"),
+}
+_SHADES = (50, 100, 200, 300, 400, 500, 600, 700, 800, 900)
+_NAMED_COLORS = {"white": "#fff", "black": "#000", "transparent": "transparent"}
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"), "base": ("1rem", "1.5rem"), "lg": ("1.125rem", "1.75rem"),
+    "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"), "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"),
+}
+FONT_WEIGHTS = {"normal": 400, "medium": 500, "semibold": 600, "bold": 700, "extrabold": 800, "black": 900}
+RADII = {"": "0.25rem", "md": "0.375rem", "lg": "0.5rem", "xl": "0.75rem", "2xl": "1rem", "full": "9999px"}
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "xl": "0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)",
+    "2xl": "0 25px 50px -12px rgb(0 0 0 / 0.25)",
+    "inner": "inset 0 2px 4px 0 rgb(0 0 0 / 0.05)",
+}
+MAX_WIDTHS = {"sm": "24rem", "md": "28rem", "lg": "32rem", "xl": "36rem", "2xl": "42rem", "4xl": "56rem", "7xl": "80rem", "full": "100%"}
+
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,sans-serif}"
+    "body{margin:0;line-height:inherit}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "button,input,optgroup,select,textarea{font-family:inherit;font-size:100%;font-weight:inherit;line-height:inherit;color:inherit;margin:0;padding:0}"
+    "button,select{text-transform:none}"
+    "button,[type=button],[type=reset],[type=submit]{-webkit-appearance:button;background-color:transparent;background-image:none}"
+    "button,[role=button]{cursor:pointer}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}"
+    "ol,ul{list-style:none;margin:0;padding:0}"
+    "textarea{resize:vertical}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}"
+    "img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}"
+    "[hidden]{display:none}"
+)
+
+_CLASS_ATTR = re.compile(r"""class\s*=\s*(["'])(.*?)\1""", re.S)
+_CLASS_NAME = re.compile(r"className\s*=\s*([^;\n]*)")
+_CLASS_LIST = re.compile(r"classList\.(?:add|remove|toggle)\(([^)]*)\)")
+_QUOTED = re.compile(r"""(["'])([^"']+)\1""")
+
+Rule = tuple[str, str]  # (selector suffix, declarations)
+
+
+def collect_classes(text: str) -> set[str]:
+    """Class names used in markup attributes, ``className`` strings and ``classList`` calls."""
+    classes: set[str] = set()
+    for match in _CLASS_ATTR.finditer(text):
+        classes.update(match.group(2).split())
+    # Every string literal in a ``className`` expression, so ternaries count too.
+    for match in itertools.chain(_CLASS_NAME.finditer(text), _CLASS_LIST.finditer(text)):
+        for _, value in _QUOTED.findall(match.group(1)):
+            classes.update(value.split())
+    # Skip fragments of string concatenation such as ``class="' + cls + '"``.
+    return {name for name in classes if re.fullmatch(r"[\w:/.\-]+", name)}
+
+
+def _spacing(value: str) -> str | None:
+    if value == "0":
+        return "0px"
+    if value == "px":
+        return "1px"
+    if re.fullmatch(r"\d+(\.5)?", value):
+        return f"{float(value) / 4:g}rem"
+    return None
+
+
+def _color(value: str) -> str | None:
+    name, _, alpha = value.partition("/")
+    if name in _NAMED_COLORS:
+        color = _NAMED_COLORS[name]
+    else:
+        hue, _, shade = name.rpartition("-")
+        if hue not in PALETTE or not shade.isdigit() or int(shade) not in _SHADES:
+            return None
+        color = PALETTE[hue][_SHADES.index(int(shade))]
+    if not alpha:
+        return color
+    if color == "transparent" or not alpha.isdigit():
+        return None
+    hexa = color.lstrip("#")
+    if len(hexa) == 3:
+        hexa = "".join(ch * 2 for ch in hexa)
+    r, g, b = (int(hexa[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgb({r} {g} {b} / {int(alpha) / 100:g})"
+
+
+_SIDES = {"": ("",), "x": ("-left", "-right"), "y": ("-top", "-bottom"), "t": ("-top",), "b": ("-bottom",), "l": ("-left",), "r": ("-right",)}
+_SHADOW_STACK = "box-shadow:var(--tw-ring-offset-shadow,0 0 #0000),var(--tw-ring-shadow,0 0 #0000),var(--tw-shadow)"
+
+
+def _box(prop: str, sides: str, value: str) -> str:
+    return ";".join(f"{prop}{side}:{value}" for side in _SIDES[sides])
+
+
+def _rules() -> list[tuple[re.Pattern[str], Callable[[re.Match[str]], Rule | None]]]:
+    """Utility patterns in Tailwind's emission order, so later groups win ties."""
+
+    def spaced(prop: str) -> Callable[[re.Match[str]], Rule | None]:
+        def rule(m: re.Match[str]) -> Rule | None:
+            value = "auto" if m.group(2) == "auto" else _spacing(m.group(2))
+            return None if value is None else ("", _box(prop, m.group(1), value))
+
+        return rule
+
+    def colored(prop: str) -> Callable[[re.Match[str]], Rule | None]:
+        def rule(m: re.Match[str]) -> Rule | None:
+            color = _color(m.group(1))
+            return None if color is None else ("", f"{prop}:{color}")
+
+        return rule
+
+    def fixed(declarations: str) -> Callable[[re.Match[str]], Rule | None]:
+        return lambda m: ("", declarations)
+
+    def space(m: re.Match[str]) -> Rule | None:
+        value = _spacing(m.group(2))
+        if value is None:
+            return None
+        prop = "margin-left" if m.group(1) == "x" else "margin-top"
+        return (" > :not([hidden]) ~ :not([hidden])", f"{prop}:{value}")
+
+    def radius(m: re.Match[str]) -> Rule | None:
+        side, size = m.group(1) or "", m.group(2) or ""
+        if size not in RADII:
+            return None
+        corners = {"": ("",), "t": ("-top-left", "-top-right"), "b": ("-bottom-left", "-bottom-right"),
+                   "l": ("-top-left", "-bottom-left"), "r": ("-top-right", "-bottom-right")}[side]
+        return ("", ";".join(f"border{corner}-radius:{RADII[size]}" for corner in corners))
+
+    def border(m: re.Match[str]) -> Rule | None:
+        return ("", ";".join(f"border{side}-width:{m.group(2) or 1}px" for side in _SIDES[m.group(1) or ""]))
+
+    def sized(prop: str, named: dict[str, str] | None = None) -> Callable[[re.Match[str]], Rule | None]:
+        def rule(m: re.Match[str]) -> Rule | None:
+            value = (named or {}).get(m.group(m.lastindex)) or _spacing(m.group(m.lastindex))
+            return None if value is None else ("", f"{prop or m.group(1)}:{value}")
+
+        return rule
+
+    def shadow(m: re.Match[str]) -> Rule | None:
+        value = SHADOWS.get(m.group(1) or "")
+        return None if value is None else ("", f"--tw-shadow:{value};{_SHADOW_STACK}")
+
+    def ring(m: re.Match[str]) -> Rule | None:
+        width = m.group(1) or "3"
+        if not width.isdigit():
+            color = _color(width)
+            return None if color is None else ("", f"--tw-ring-color:{color}")
+        return ("", f"--tw-ring-shadow:0 0 0 {width}px var(--tw-ring-color,rgb(59 130 246 / 0.5));{_SHADOW_STACK}")
+
+    def font(m: re.Match[str]) -> Rule | None:
+        if m.group(1) in FONT_WEIGHTS:
+            return ("", f"font-weight:{FONT_WEIGHTS[m.group(1)]}")
+        return None
+
+    def text(m: re.Match[str]) -> Rule | None:
+        value = m.group(1)
+        if value in FONT_SIZES:
+            size, height = FONT_SIZES[value]
+            return ("", f"font-size:{size};line-height:{height}")
+        if value in ("left", "center", "right", "justify"):
+            return ("", f"text-align:{value}")
+        color = _color(value)
+        return None if color is None else ("", f"color:{color}")
+
+    rules: list[tuple[str, Callable[[re.Match[str]], Rule | None]]] = [
+        (r"(static|fixed|absolute|relative|sticky)", lambda m: ("", f"position:{m.group(1)}")),
+        (r"inset-(0)", fixed("inset:0px")),
+        (r"(top|right|bottom|left)-([\d.]+|px)", sized("")),
+        (r"z-(\d+)", lambda m: ("", f"z-index:{m.group(1)}")),
+        (r"col-span-(\d+)", lambda m: ("", f"grid-column:span {m.group(1)} / span {m.group(1)}")),
+        (r"m([xytblr]?)-(auto|[\d.]+|px)", spaced("margin")),
+        (r"(block|inline-block|inline|flex|inline-flex|grid|table|hidden)", lambda m: ("", f"display:{'none' if m.group(1) == 'hidden' else m.group(1)}")),
+        (r"h-(full|auto|[\d.]+)", sized("height", {"full": "100%", "auto": "auto"})),
+        (r"w-(full|auto|[\d.]+)", sized("width", {"full": "100%", "auto": "auto"})),
+        (r"max-w-(\w+)", lambda m: ("", f"max-width:{MAX_WIDTHS[m.group(1)]}") if m.group(1) in MAX_WIDTHS else None),
+        (r"flex-1", fixed("flex:1 1 0%")),
+        (r"grid-cols-(\d+)", lambda m: ("", f"grid-template-columns:repeat({m.group(1)},minmax(0,1fr))")),
+        (r"flex-(row|col)", lambda m: ("", f"flex-direction:{'row' if m.group(1) == 'row' else 'column'}")),
+        (r"flex-wrap", fixed("flex-wrap:wrap")),
+        (r"items-(start|end|center|baseline|stretch)", lambda m: ("", f"align-items:{ {'start': 'flex-start', 'end': 'flex-end'}.get(m.group(1), m.group(1))}")),
+        (r"justify-(start|end|center|between|around)", lambda m: ("", "justify-content:" + {"start": "flex-start", "end": "flex-end", "between": "space-between", "around": "space-around"}.get(m.group(1), m.group(1)))),
+        (r"gap-([\d.]+)", sized("gap")),
+        (r"space-(x|y)-([\d.]+)", space),
+        (r"overflow-(auto|hidden|scroll)", lambda m: ("", f"overflow:{m.group(1)}")),
+        (r"rounded(?:-([tblr]))?(?:-(\w+))?", radius),
+        (r"border(?:-([tblr]))?(?:-(\d+))?", border),
+        (r"border-(.+)", colored("border-color")),
+        (r"bg-(.+)", colored("background-color")),
+        (r"p([xytblr]?)-([\d.]+|px)", spaced("padding")),
+        (r"font-(\w+)", font),
+        (r"text-(.+)", text),
+        (r"underline", fixed("text-decoration-line:underline")),
+        (r"shadow(?:-(\w+))?", shadow),
+        (r"ring(?:-(.+))?", ring),
+        (
+            r"transition",
+            fixed(
+                "transition-property:color,background-color,border-color,text-decoration-color,fill,stroke,opacity,box-shadow,transform,filter,backdrop-filter;"
+                "transition-timing-function:cubic-bezier(0.4,0,0.2,1);transition-duration:150ms"
+            ),
+        ),
+    ]
+    return [(re.compile(pattern), build) for pattern, build in rules]
+
+
+_RULES = _rules()
+
+
+def _escape(name: str) -> str:
+    return re.sub(r"([:/.])", r"\\\1", name)
+
+
+def compile_utility(name: str) -> tuple[int, str, str | None, str] | None:
+    """``(order, selector, media, declarations)`` for one class name, or ``None`` if unknown."""
+    *variants, utility = name.split(":")
+    media = state = None
+    for variant in variants:
+        if variant in BREAKPOINTS and media is None:
+            media = variant
+        elif variant in STATES and state is None:
+            state = STATES[variant]
+        else:
+            return None
+    for order, (pattern, build) in enumerate(_RULES):
+        match = pattern.fullmatch(utility)
+        if match is None:
+            continue
+        rule = build(match)
+        if rule is None:
+            continue
+        suffix, declarations = rule
+        return order, f".{_escape(name)}{state or ''}{suffix}", media, declarations
+    return None
+
+
+def compile_css(classes: Iterable[str]) -> tuple[str, set[str]]:
+    """Stylesheet for ``classes`` plus the names that produced no CSS."""
+    compiled, unknown = [], set()
+    for name in sorted(set(classes)):
+        rule = compile_utility(name)
+        if rule is None:
+            unknown.add(name)
+        else:
+            compiled.append(rule)
+    parts = [PREFLIGHT]
+    for media in (None, *BREAKPOINTS):
+        group = sorted((order, selector, declarations) for order, selector, rule_media, declarations in compiled if rule_media == media)
+        if not group:
+            continue
+        body = "".join(f"{selector}{{{declarations}}}" for _, selector, declarations in group)
+        parts.append(body if media is None else f"@media (min-width:{BREAKPOINTS[media]}){{{body}}}")
+    return "".join(parts), unknown
+
+
+def purged_stylesheet(page: str) -> str:
+    return compile_css(collect_classes(page))[0]
@@ -0,0 +1,391 @@
+"""Fan-out flight search over external GDS/NDC suppliers.
+
+:class:`SupplierAggregator` sends one :class:`FlightQuery` to every supplier
+at once and yields a :class:`Batch` as each one answers, so the first cards
+can render while slower suppliers are still working. Each supplier has its
+own deadline and :class:`CircuitBreaker`, and talks through a
+:class:`ConnectionPool` that keeps connections open between searches.
+Offers for the same flight from different suppliers share a hash key; the
+cheapest copy wins and later, cheaper copies are reported as updates.
+
+:class:`MockSupplier` answers from a :class:`FareStore` with configurable
+latency, coverage and markup, for local runs and benchmarks. Streamed
+offers are kept in an :class:`OfferBook` by key, so a quote or booking for
+a card is priced at the fare the supplier offered rather than the store's.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, replace
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Mapping, Protocol, Sequence
+
+import numpy as np
+
+from .inventory import CABINS, FareStore, FlightQuery, SearchResponse
+
+DEFAULT_DEADLINE = 2.0
+
+
+@dataclass(frozen=True)
+class Offer:
+    """One priced flight as a supplier returned it (fares per passenger)."""
+
+    carrier: str
+    flight_number: int
+    origin: str
+    destination: str
+    departure: str
+    arrival: str
+    cabin: str
+    stops: int
+    fare: float
+    seats: int
+    suppliers: tuple[str, ...] = ()
+    ref: str = ""
+
+    @property
+    def key(self) -> str:
+        """Supplier-independent identity of the flight, for de-duplication."""
+        identity = f"{self.carrier}|{self.flight_number}|{self.origin}|{self.destination}|{self.departure}|{self.cabin}"
+        return hashlib.blake2b(identity.encode("utf-8"), digest_size=8).hexdigest()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "suppliers": list(self.suppliers), "key": self.key}
+
+
+@dataclass
+class Batch:
+    """What one supplier contributed to the merged result."""
+
+    supplier: str
+    status: str
+    added: list[Offer]
+    updated: list[Offer]
+    elapsed: float
+    error: str | None = None
+
+
+class SearchSupplier(Protocol):
+    name: str
+
+    async def search(self, query: FlightQuery) -> list[Offer]: ...
+
+
+class ConnectionPool:
+    """Bounded pool of reusable (keep-alive) connections for one supplier."""
+
+    def __init__(self, connect: Callable[[], Awaitable[Any]], size: int = 16) -> None:
+        self._connect = connect
+        self.size = size
+        self._idle: list[Any] = []
+        self._slots: asyncio.Semaphore | None = None
+        self.counters = dict.fromkeys(("opened", "reused", "dropped"), 0)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            if self._idle:
+                conn = self._idle.pop()
+                self.counters["reused"] += 1
+            else:
+                conn = await self._connect()
+                self.counters["opened"] += 1
+            try:
+                yield conn
+            except BaseException:
+                # A failed or cancelled exchange leaves the connection in an unknown state.
+                self.counters["dropped"] += 1
+                raise
+            self._idle.append(conn)
+
+
+class CircuitBreaker:
+    """Stops calling a supplier after repeated failures, probing again after ``reset_after``."""
+
+    def __init__(self, failures: int = 5, reset_after: float = 30.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failures = failures
+        self.reset_after = reset_after
+        self._clock = clock
+        self._failed = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._clock() - self._opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def abandon(self) -> None:
+        """Give the probe slot back without a verdict, e.g. when the probing call was cancelled."""
+        self._probing = False
+
+    def record(self, ok: bool) -> None:
+        self._probing = False
+        if ok:
+            self._failed = 0
+            self._opened_at = None
+            return
+        self._failed += 1
+        if self._opened_at is not None or self._failed >= self.failures:
+            self._opened_at = self._clock()
+
+
+class MockSupplier:
+    """Supplier answering from a :class:`FareStore` after a simulated round trip.
+
+    ``coverage`` is the share of the store's flights this supplier sells, so
+    several mocks over one store overlap the way real suppliers do;
+    ``markup`` scales their fares. ``stall_rate`` is the share of calls that
+    hang for ``stall`` seconds, to exercise deadlines. ``source`` answers the
+    query (default :meth:`FareStore.search`; the server passes its cached
+    search so supplier fan-out shares the search cache). Offers cover both
+    legs of a return query.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store: FareStore,
+        *,
+        latency: tuple[float, float] = (0.05, 0.3),
+        connect_latency: float = 0.05,
+        coverage: float = 0.6,
+        markup: float = 1.0,
+        failure_rate: float = 0.0,
+        stall_rate: float = 0.0,
+        stall: float = 5.0,
+        pool_size: int = 16,
+        seed: int = 0,
+        source: Callable[[FlightQuery], SearchResponse] | None = None,
+    ) -> None:
+        self.name = name
+        self.store = store
+        self.source = source if source is not None else store.search
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.coverage = coverage
+        self.markup = markup
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self.pool = ConnectionPool(self._open, pool_size)
+
+    async def _open(self) -> object:
+        # TCP + TLS handshake; paid once per pooled connection.
+        await asyncio.sleep(self.connect_latency)
+        return object()
+
+    def _sells(self, rows: np.ndarray) -> np.ndarray:
+        spread = (rows.astype(np.uint64) * np.uint64(2654435761) + np.uint64(self.seed * 40503)) % np.uint64(1000)
+        return spread < np.uint64(self.coverage * 1000)
+
+    async def search(self, query: FlightQuery) -> list[Offer]:
+        async with self.pool.connection():
+            stalled = self._rng.random() < self.stall_rate
+            await asyncio.sleep(self.stall if stalled else self._rng.uniform(*self.latency))
+            if self._rng.random() < self.failure_rate:
+                raise ConnectionError(f"{self.name} returned an error")
+            response = self.source(query)
+            rows = response.outbound.rows
+            if response.inbound is not None:
+                rows = np.concatenate([rows, response.inbound.rows])
+            return self._offers(rows[self._sells(rows)])
+
+    def _offers(self, rows: np.ndarray) -> list[Offer]:
+        # Column reads rather than ``ResultSet.records()``: the mock must stay
+        # cheap enough that the benchmark measures fan-out, not pandas.
+        store = self.store
+        departure = (store.day[rows].astype(np.int64) * 1440 + store.minute[rows]).astype("datetime64[m]")
+        arrival = departure + store.duration[rows].astype("timedelta64[m]")
+        columns = zip(
+            np.asarray(store.carriers)[store.carrier[rows]].tolist(),
+            store.flight_number[rows].tolist(),
+            np.asarray(store.airports)[store.origin[rows]].tolist(),
+            np.asarray(store.airports)[store.destination[rows]].tolist(),
+            np.datetime_as_string(departure, unit="m").tolist(),
+            np.datetime_as_string(arrival, unit="m").tolist(),
+            np.asarray(CABINS)[store.cabin[rows]].tolist(),
+            store.stops[rows].tolist(),
+            np.round(store.fare[rows] * self.markup, 2).tolist(),
+            store.seats[rows].tolist(),
+            rows.tolist(),
+        )
+        return [Offer(*values, (self.name,), str(row)) for *values, row in columns]
+
+
+def mock_suppliers(store: FareStore, count: int, **options: Any) -> list[MockSupplier]:
+    """``count`` overlapping mock suppliers with slightly different markups."""
+    return [MockSupplier(f"supplier-{i + 1}", store, markup=1.0 + 0.02 * (i % 4), seed=i, **options) for i in range(count)]
+
+
+class SupplierAggregator:
+    """Concurrent, deadline-bound, de-duplicating search over several suppliers."""
+
+    def __init__(
+        self,
+        suppliers: Sequence[SearchSupplier],
+        *,
+        deadline: float = DEFAULT_DEADLINE,
+        deadlines: Mapping[str, float] | None = None,
+        breaker: Callable[[], CircuitBreaker] = CircuitBreaker,
+    ) -> None:
+        self.suppliers = list(suppliers)
+        self.deadline = deadline
+        self.deadlines = dict(deadlines or {})
+        self.breakers = {supplier.name: breaker() for supplier in self.suppliers}
+
+    async def _call(self, supplier: SearchSupplier, query: FlightQuery) -> tuple[str, list[Offer], str | None]:
+        breaker = self.breakers[supplier.name]
+        try:
+            offers = await asyncio.wait_for(supplier.search(query), self.deadlines.get(supplier.name, self.deadline))
+        except asyncio.TimeoutError:
+            breaker.record(False)
+            return "timeout", [], None
+        except Exception as exc:  # noqa: BLE001 - one supplier's fault must not fail the search
+            breaker.record(False)
+            return "error", [], str(exc)
+        breaker.record(True)
+        return "ok", offers, None
+
+    @staticmethod
+    def _merge(merged: dict[str, Offer], offers: list[Offer]) -> tuple[list[Offer], list[Offer]]:
+        added: list[Offer] = []
+        updated: dict[str, Offer] = {}
+        for offer in offers:
+            key = offer.key
+            best = merged.get(key)
+            if best is None:
+                merged[key] = offer
+                added.append(offer)
+            elif offer.fare < best.fare:
+                merged[key] = updated[key] = replace(offer, suppliers=best.suppliers + offer.suppliers)
+            else:
+                merged[key] = replace(best, suppliers=best.suppliers + offer.suppliers)
+        # An offer first seen in this batch is "added", even if a cheaper copy followed it.
+        fresh = {offer.key for offer in added}
+        added = [merged[offer.key] for offer in added]
+        return added, [offer for key, offer in updated.items() if key not in fresh]
+
+    async def stream(self, query: FlightQuery) -> AsyncIterator[Batch]:
+        """Yield one :class:`Batch` per supplier, in the order they answer."""
+        started = time.perf_counter()
+        merged: dict[str, Offer] = {}
+        tasks: dict[asyncio.Task, str] = {}
+        probes: set[asyncio.Task] = set()
+        for supplier in self.suppliers:
+            breaker = self.breakers[supplier.name]
+            probing = breaker.state == "half_open"
+            if breaker.allow():
+                task = asyncio.create_task(self._call(supplier, query))
+                tasks[task] = supplier.name
+                if probing:
+                    probes.add(task)
+            else:
+                yield Batch(supplier.name, "circuit_open", [], [], 0.0)
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    status, offers, error = task.result()
+                    added, updated = self._merge(merged, offers)
+                    yield Batch(tasks[task], status, added, updated, time.perf_counter() - started, error)
+        finally:
+            for task in pending:
+                task.cancel()
+                # A cancelled call never reaches ``record``; an unreleased probe would keep the breaker open for good.
+                if task in probes:
+                    self.breakers[tasks[task]].abandon()
+
+    async def search(self, query: FlightQuery) -> tuple[list[Offer], list[Batch]]:
+        """Collect every batch; returns merged offers cheapest first and the batches."""
+        merged: dict[str, Offer] = {}
+        batches = []
+        async for batch in self.stream(query):
+            batches.append(batch)
+            for offer in batch.added + batch.updated:
+                merged[offer.key] = offer
+        return sorted(merged.values(), key=lambda offer: offer.fare), batches
+
+    def pool_stats(self) -> dict[str, dict[str, int]]:
+        return {supplier.name: dict(supplier.pool.counters) for supplier in self.suppliers if hasattr(supplier, "pool")}
+
+
+class OfferBook:
+    """Bounded LRU of recently streamed offers by :attr:`Offer.key`; the latest copy of a key wins."""
+
+    def __init__(self, max_offers: int = 100_000) -> None:
+        self.max_offers = max_offers
+        self._offers: OrderedDict[str, Offer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._offers)
+
+    def remember(self, offers: Sequence[Offer]) -> None:
+        with self._lock:
+            for offer in offers:
+                self._offers[offer.key] = offer
+                self._offers.move_to_end(offer.key)
+            while len(self._offers) > self.max_offers:
+                self._offers.popitem(last=False)
+
+    def get(self, key: str) -> Offer:
+        with self._lock:
+            try:
+                return self._offers[key]
+            except KeyError:
+                raise KeyError(f"unknown or expired offer {key!r}; search again") from None
+
+
+class AggregatorThread:
+    """Runs a :class:`SupplierAggregator` on its own event loop for synchronous callers (e.g. WSGI)."""
+
+    def __init__(self, aggregator: SupplierAggregator) -> None:
+        self.aggregator = aggregator
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="supplier-aggregator", daemon=True)
+        self._thread.start()
+
+    def stream(self, query: FlightQuery) -> Iterator[Batch]:
+        batches: queue.Queue[Batch | None] = queue.Queue()
+
+        async def pump() -> None:
+            try:
+                async for batch in self.aggregator.stream(query):
+                    batches.put(batch)
+            finally:
+                batches.put(None)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while (batch := batches.get()) is not None:
+                yield batch
+            future.result()
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
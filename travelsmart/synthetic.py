@@ -0,0 +1,119 @@
+"""Synthetic schedule and fare data for local runs and benchmarks."""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+AIRPORTS = (
+    "RUH", "JED", "DMM", "MED", "AHB", "DXB", "AUH", "SHJ", "DOH", "BAH",
+    "KWI", "MCT", "CAI", "AMM", "BEY", "IST", "LHR", "CDG", "FRA", "BOM",
+    "DEL", "KHI", "ISB", "KUL", "SIN", "BKK", "JFK", "NBO", "ADD", "KRT",
+)
+
+CARRIERS = ("EK", "SV", "QR", "EY", "GF", "MS", "RJ", "TK", "XY", "F3", "FZ", "WY")
+
+
+def synthetic_fares(
+    rows: int,
+    *,
+    start: dt.date | None = None,
+    days: int = 365,
+    seed: int = 7,
+) -> pd.DataFrame:
+    """Return ``rows`` random fare rows in the :class:`FareStore` frame layout."""
+    rng = np.random.default_rng(seed)
+    start = start or dt.date.today()
+    n_air = len(AIRPORTS)
+
+    origin = rng.integers(0, n_air, rows, dtype=np.int16)
+    # Shift by 1..n-1 so a row never departs and arrives at the same airport.
+    destination = ((origin + rng.integers(1, n_air, rows, dtype=np.int16)) % n_air).astype(np.int16)
+    day = rng.integers(0, days, rows, dtype=np.int32)
+    minute = rng.integers(0, 288, rows, dtype=np.int32) * 5
+    duration = rng.integers(12, 120, rows, dtype=np.int32) * 5
+    cabin = np.where(rng.random(rows) < 0.8, 0, 1).astype(np.int8)
+    stops = rng.choice(np.array([0, 1, 2], dtype=np.int8), rows, p=[0.6, 0.3, 0.1])
+    base = rng.gamma(4.0, 80.0, rows) + duration * 0.6
+    fare = np.round(base * np.where(cabin == 1, 3.0, 1.0) * (1.0 - 0.08 * stops), 2)
+
+    departure = (
+        np.datetime64(start, "m")
+        + day.astype("timedelta64[D]").astype("timedelta64[m]")
+        + minute.astype("timedelta64[m]")
+    )
+    return pd.DataFrame(
+        {
+            "origin": pd.Categorical.from_codes(origin, AIRPORTS),
+            "destination": pd.Categorical.from_codes(destination, AIRPORTS),
+            "carrier": pd.Categorical.from_codes(rng.integers(0, len(CARRIERS), rows, dtype=np.int16), CARRIERS),
+            "flight_number": rng.integers(1, 9999, rows, dtype=np.int32),
+            "departure": departure,
+            "duration": duration.astype(np.int16),
+            "cabin": pd.Categorical.from_codes(cabin, ("Economy", "Business")),
+            "stops": stops,
+            "seats": rng.integers(0, 10, rows, dtype=np.int16),
+            "fare": fare,
+        }
+    )
+
+
+CITIES = {
+    "RUH": ("Riyadh", "الرياض"),
+    "JED": ("Jeddah", "جدة"),
+    "DMM": ("Dammam", "الدمام"),
+    "MED": ("Medina", "المدينة المنورة"),
+    "DXB": ("Dubai", "دبي"),
+    "AUH": ("Abu Dhabi", "أبوظبي"),
+    "DOH": ("Doha", "الدوحة"),
+    "BAH": ("Manama", "المنامة"),
+    "KWI": ("Kuwait City", "مدينة الكويت"),
+    "MCT": ("Muscat", "مسقط"),
+    "CAI": ("Cairo", "القاهرة"),
+    "AMM": ("Amman", "عمّان"),
+    "IST": ("Istanbul", "إسطنبول"),
+    "LHR": ("London", "لندن"),
+    "CDG": ("Paris", "باريس"),
+}
+
+_HOTEL_BRANDS = (
+    ("Grand", "جراند"), ("Palace", "بالاس"), ("Royal", "رويال"), ("Plaza", "بلازا"),
+    ("Tower", "تاور"), ("Residence", "ريزيدنس"), ("Suites", "سويتس"), ("Inn", "إن"),
+)
+
+
+def synthetic_hotels(
+    properties: int,
+    *,
+    nights: int = 365,
+    seed: int = 11,
+) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """Return ``(properties, rooms, rates)`` in the :class:`HotelInventory` layout.
+
+    ``rooms`` is a ``(property, night)`` int16 matrix of rooms left and
+    ``rates`` the matching nightly rate in cents.
+    """
+    rng = np.random.default_rng(seed)
+    codes = tuple(CITIES)
+    city = rng.integers(0, len(codes), properties)
+    brand = rng.integers(0, len(_HOTEL_BRANDS), properties)
+    stars = rng.choice(np.array([2, 3, 4, 5], dtype=np.int8), properties, p=[0.15, 0.35, 0.35, 0.15])
+    names_en = [f"{CITIES[codes[c]][0]} {_HOTEL_BRANDS[b][0]} {i}" for i, (c, b) in enumerate(zip(city, brand))]
+    names_ar = [f"{_HOTEL_BRANDS[b][1]} {CITIES[codes[c]][1]} {i}" for i, (c, b) in enumerate(zip(city, brand))]
+    frame = pd.DataFrame(
+        {
+            "hotel_id": np.arange(properties, dtype=np.int32),
+            "name": names_en,
+            "name_ar": names_ar,
+            "city": [codes[c] for c in city],
+            "stars": stars,
+        }
+    )
+    rooms = rng.integers(0, 6, (properties, nights), dtype=np.int16)
+    base = (40 + 45 * stars.astype(np.float32) ** 2)[:, None]
+    weekly = np.float32(1.0) + np.float32(0.15) * (np.arange(nights) % 7 >= 5)
+    noise = np.float32(0.8) + np.float32(0.5) * rng.random((properties, nights), dtype=np.float32)
+    rates = (base * weekly * noise * 100).astype(np.int32)
+    return frame, rooms, rates
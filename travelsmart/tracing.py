@@ -0,0 +1,316 @@
+"""Per-stage spans, latency histograms and an opt-in sampling profiler.
+
+:class:`Tracer` times named stages (``search``, ``policy``, ``pricing``,
+``filter``, ``calendar``, ``confirm``, plus what the page reports as
+``client.*``) into :class:`Histogram`\\ s. A histogram is a fixed array of
+log-linear buckets in the style of HdrHistogram: recording is an index
+computation and an increment, and any percentile is within ~1.6% of the
+true value. Spans opened while a request is being traced are also
+collected for that request's ``Server-Timing`` header.
+:meth:`Tracer.prometheus` renders everything in the Prometheus text
+exposition format.
+
+:class:`SamplingProfiler` is off by default. Once started, it periodically
+snapshots every other thread's Python stack and counts collapsed stacks,
+the input format for flame graphs. It can be started and stopped while the
+server is running.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, TypeVar
+
+import numpy as np
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+MAX_SECONDS = 3600.0
+# Below this the sampler thread spends more time walking stacks than the server serving.
+MIN_INTERVAL = 0.001
+
+# Buckets are whole microseconds: one per microsecond below 128us, then 64 per power of two.
+_SUB_BITS = 7
+_HALF = 1 << (_SUB_BITS - 1)
+
+_CURRENT: contextvars.ContextVar[list[tuple[str, float]] | None] = contextvars.ContextVar("travelsmart_trace", default=None)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _index(micros: int) -> int:
+    if micros < 2 * _HALF:
+        return micros
+    shift = micros.bit_length() - _SUB_BITS
+    return (shift << (_SUB_BITS - 1)) + (micros >> shift)
+
+
+def _bounds(size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Lower bound and width (in microseconds) of each bucket index."""
+    index = np.arange(size, dtype=np.int64)
+    shift = np.maximum((index >> (_SUB_BITS - 1)) - 1, 0)
+    lower = np.where(index < 2 * _HALF, index, (index - (shift << (_SUB_BITS - 1))) << shift)
+    return lower, np.left_shift(1, shift)
+
+
+class Histogram:
+    """Latency histogram with HDR-style log-linear buckets (1us resolution, ~1.6% relative error)."""
+
+    def __init__(self, max_seconds: float = MAX_SECONDS) -> None:
+        self._last = _index(int(max_seconds * 1e6))
+        self.counts = [0] * (self._last + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        index = _index(int(seconds * 1e6)) if seconds > 0 else 0
+        with self._lock:
+            self.counts[min(index, self._last)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantiles(self, quantiles: Iterable[float] = QUANTILES) -> dict[float, float]:
+        """Bucket-midpoint estimate, in seconds, of each quantile in ``quantiles``."""
+        with self._lock:
+            counts = np.array(self.counts, dtype=np.int64)
+            count = self.count
+        quantiles = list(quantiles)
+        if not count:
+            return dict.fromkeys(quantiles, 0.0)
+        cumulative = np.cumsum(counts)
+        ranks = np.maximum(np.ceil(np.asarray(quantiles) * count), 1)
+        index = np.searchsorted(cumulative, ranks)
+        lower, width = _bounds(len(counts))
+        values = (lower[index] + width[index] / 2) / 1e6
+        return {q: min(float(value), self.max) for q, value in zip(quantiles, values)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (self._last + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_started")
+
+    def __init__(self, tracer: Tracer, name: str) -> None:
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self) -> _Span:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        self._tracer.record(self._name, time.perf_counter() - self._started, error=exc_type is not None)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoSpan:
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Named stage timings; ``enabled`` can be flipped at runtime."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.histograms: dict[str, Histogram] = {}
+        self.errors: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def record(self, name: str, seconds: float, error: bool = False) -> None:
+        self.histogram(name).record(seconds)
+        if error:
+            with self._lock:
+                self.errors[name] += 1
+        spans = _CURRENT.get()
+        if spans is not None:
+            spans.append((name, seconds))
+
+    def span(self, name: str) -> _Span | _NoSpan:
+        """Context manager timing one stage; a shared no-op while disabled."""
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def wrap(self, name: str, fn: F) -> F:
+        """``fn`` with every call timed as span ``name``."""
+
+        @functools.wraps(fn)
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            with self.span(name):
+                return fn(*args, **kwargs)
+
+        return traced  # type: ignore[return-value]
+
+    def begin(self) -> contextvars.Token | None:
+        """Start collecting this context's spans (for ``Server-Timing``)."""
+        return _CURRENT.set([]) if self.enabled else None
+
+    def end(self, token: contextvars.Token | None) -> list[tuple[str, float]]:
+        if token is None:
+            return []
+        spans = _CURRENT.get() or []
+        _CURRENT.reset(token)
+        return spans
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        stats = {}
+        for name, histogram in sorted(self.histograms.items()):
+            quantiles = histogram.quantiles()
+            stats[name] = {
+                "count": histogram.count,
+                "errors": self.errors[name],
+                **{f"p{q * 100:g}_ms": round(value * 1000, 3) for q, value in quantiles.items()},
+                "max_ms": round(histogram.max * 1000, 3),
+            }
+        return stats
+
+    def prometheus(self, prefix: str = "travelsmart") -> str:
+        spans = sorted(self.histograms.items())
+        quantiles = [(name, histogram, histogram.quantiles()) for name, histogram in spans]
+        lines = [
+            f"# HELP {prefix}_span_seconds Time spent in each traced stage.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        for name, histogram, values in quantiles:
+            lines += [f'{prefix}_span_seconds{{span="{name}",quantile="{q:g}"}} {value:.6g}' for q, value in values.items()]
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {histogram.total:.6g}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {histogram.count}')
+        lines += metric(f"{prefix}_span_errors_total", "counter", "Traced stages that raised.", {name: self.errors[name] for name, _ in spans}, "span")
+        return "\n".join(lines) + "\n"
+
+
+def metric(name: str, kind: str, help_text: str, samples: Mapping[str, float] | float, label: str = "") -> list[str]:
+    """Prometheus exposition lines for one metric, optionally keyed by ``label``."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    if isinstance(samples, Mapping):
+        lines += [f'{name}{{{label}="{key}"}} {value:g}' for key, value in samples.items()]
+    else:
+        lines.append(f"{name} {samples:g}")
+    return lines
+
+
+def server_timing(spans: list[tuple[str, float]]) -> str:
+    return ", ".join(f"{name.replace('.', '-')};dur={seconds * 1000:.2f}" for name, seconds in spans)
+
+
+class SamplingProfiler:
+    """Counts collapsed Python stacks of every other thread, sampled every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.busy = 0.0
+        self._labels: dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._stop: threading.Event | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float | None = None) -> None:
+        if interval is not None:
+            if not MIN_INTERVAL <= interval <= MAX_SECONDS:
+                raise ValueError(f"interval must be between {MIN_INTERVAL} and {MAX_SECONDS:.0f} seconds")
+            self.interval = interval
+        if self.running:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.busy = 0.0
+
+    def _label(self, code: Any) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{Path(code.co_filename).name}:{code.co_name}"
+        return label
+
+    def _run(self, stop: threading.Event) -> None:
+        me = threading.get_ident()
+        while not stop.wait(self.interval):
+            started = time.perf_counter()
+            collapsed = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                collapsed.append(";".join(reversed(stack)))
+            with self._lock:
+                self.stacks.update(collapsed)
+                self.samples += 1
+                self.busy += time.perf_counter() - started
+
+    def collapsed(self) -> str:
+        """``frame;frame;leaf count`` lines, as consumed by ``flamegraph.pl`` and speedscope."""
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Functions by samples on top of the stack (self) and anywhere in it (total)."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        with self._lock:
+            stacks = list(self.stacks.items())
+        for stack, count in stacks:
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [{"function": name, "self": count, "total": total[name]} for name, count in own.most_common(limit)]
+
+    def stats(self, limit: int = 20) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "sampler_ms": round(self.busy * 1000, 1),
+            "top": self.top(limit),
+        }
@@ -0,0 +1,190 @@
+"""B2B agent deposit wallets behind ``#agent-balance`` and ``#recharge-btn``.
+
+Every deposit, debit and refund is appended to a per-agent ledger that is
+never rewritten; each entry also records the running balance after it, so
+the account keeps a materialized balance and a balance check is a dict
+lookup. Writers take one of a fixed set of striped locks chosen by agent id:
+bookings for one agent serialize, bookings for different agents rarely
+contend, and there is no global lock. Low-balance alerts fire from the write
+that crosses the threshold, in ledger order, instead of from polling.
+
+Amounts are held as integer cents so concurrent debits never drift.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+KINDS = ("deposit", "debit", "refund")
+DEFAULT_SHARDS = 64
+
+# listener(entry, crossed) where crossed is "below" or "above" the threshold
+BalanceListener = Callable[["LedgerEntry", str], None]
+
+
+class InsufficientFunds(ValueError):
+    """A debit would take the deposit balance below zero."""
+
+
+def to_cents(amount: float) -> int:
+    amount = float(amount)
+    if not math.isfinite(amount):
+        raise ValueError("amount must be a finite number")
+    return int(round(amount * 100))
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    seq: int
+    agent_id: str
+    kind: str
+    amount: int
+    balance: int
+    reference: str | None = None
+    crossed: str | None = None
+    at: float = 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "seq": self.seq,
+            "kind": self.kind,
+            "amount": self.amount / 100,
+            "balance": self.balance / 100,
+            "reference": self.reference,
+            "crossed": self.crossed,
+            "at": self.at,
+        }
+
+
+@dataclass
+class _Account:
+    threshold: int
+    balance: int = 0
+    entries: list[LedgerEntry] = field(default_factory=list)
+    references: dict[str, LedgerEntry] = field(default_factory=dict)
+
+
+class AgentWallets:
+    """Append-only agent ledgers with striped per-agent locks."""
+
+    def __init__(self, shards: int = DEFAULT_SHARDS, clock: Callable[[], float] = time.time) -> None:
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._accounts: dict[str, _Account] = {}
+        self._listeners: list[BalanceListener] = []
+        self._seq = itertools.count(1)
+        self._clock = clock
+
+    def __contains__(self, agent_id: object) -> bool:
+        return agent_id in self._accounts
+
+    def _lock(self, agent_id: str) -> threading.Lock:
+        return self._locks[zlib.crc32(agent_id.encode("utf-8")) % len(self._locks)]
+
+    def _account(self, agent_id: str) -> _Account:
+        try:
+            return self._accounts[agent_id]
+        except KeyError:
+            raise KeyError(f"unknown agent {agent_id!r}") from None
+
+    def subscribe(self, listener: BalanceListener) -> None:
+        """Call ``listener(entry, crossed)`` whenever a write crosses an agent's threshold."""
+        self._listeners.append(listener)
+
+    def open(self, agent_id: str, *, threshold: float = 0.0, opening_balance: float = 0.0) -> None:
+        with self._lock(agent_id):
+            if agent_id in self._accounts:
+                raise ValueError(f"agent {agent_id!r} already has a wallet")
+            self._accounts[agent_id] = _Account(to_cents(threshold))
+        if opening_balance:
+            self.deposit(agent_id, opening_balance, reference="opening balance")
+
+    def balance(self, agent_id: str) -> float:
+        return self._account(agent_id).balance / 100
+
+    def threshold(self, agent_id: str) -> float:
+        return self._account(agent_id).threshold / 100
+
+    def is_low(self, agent_id: str) -> bool:
+        account = self._account(agent_id)
+        return account.balance < account.threshold
+
+    def entries(self, agent_id: str, since: int = 0) -> list[LedgerEntry]:
+        """Ledger entries for ``agent_id`` with ``seq`` greater than ``since``."""
+        entries = self._account(agent_id).entries
+        lo, hi = 0, len(entries)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if entries[mid].seq <= since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return entries[lo:]
+
+    def deposit(self, agent_id: str, amount: float, reference: str | None = None) -> LedgerEntry:
+        cents = to_cents(amount)
+        if cents <= 0:
+            raise ValueError("deposit amount must be positive")
+        return self._append(agent_id, "deposit", cents, reference)
+
+    def debit(self, agent_id: str, amount: float, reference: str | None = None) -> LedgerEntry:
+        """Take ``amount`` from the deposit; raises :class:`InsufficientFunds` rather than going negative."""
+        cents = to_cents(amount)
+        if cents <= 0:
+            raise ValueError("debit amount must be positive")
+        return self._append(agent_id, "debit", -cents, reference)
+
+    def refund(self, agent_id: str, amount: float, reference: str | None = None) -> LedgerEntry:
+        cents = to_cents(amount)
+        if cents <= 0:
+            raise ValueError("refund amount must be positive")
+        return self._append(agent_id, "refund", cents, reference)
+
+    def _append(self, agent_id: str, kind: str, cents: int, reference: str | None) -> LedgerEntry:
+        account = self._account(agent_id)
+        with self._lock(agent_id):
+            # A reference is an idempotency key: replaying it returns the original entry.
+            if reference is not None:
+                key = f"{kind}:{reference}"
+                seen = account.references.get(key)
+                if seen is not None:
+                    if seen.amount != cents:
+                        raise ValueError(f"reference {reference!r} was already used for a different {kind}")
+                    return seen
+            balance = account.balance + cents
+            if balance < 0:
+                raise InsufficientFunds(f"deposit balance {account.balance / 100:.2f} is below {-cents / 100:.2f}")
+            crossed = None
+            if account.balance >= account.threshold > balance:
+                crossed = "below"
+            elif balance >= account.threshold > account.balance:
+                crossed = "above"
+            entry = LedgerEntry(next(self._seq), agent_id, kind, cents, balance, reference, crossed, self._clock())
+            account.entries.append(entry)
+            if reference is not None:
+                account.references[key] = entry
+            account.balance = balance
+            if crossed is not None:
+                # Still under the agent's lock, so alerts arrive in ledger order.
+                for listener in self._listeners:
+                    listener(entry, crossed)
+        return entry
+
+    def replay(self, agent_id: str) -> Iterator[int]:
+        """Running balance recomputed from the ledger, for audits against :meth:`balance`."""
+        return itertools.accumulate(entry.amount for entry in self._account(agent_id).entries)
+
+    def summary(self, agent_id: str) -> dict[str, object]:
+        account = self._account(agent_id)
+        return {
+            "agent": agent_id,
+            "balance": account.balance / 100,
+            "threshold": account.threshold / 100,
+            "low": account.balance < account.threshold,
+            "entries": len(account.entries),
+        }